@@ -0,0 +1,189 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+
+class TokenCache:
+    """
+    Cache of validated (token, user_id) pairs used by the authentication middleware.
+
+    By default entries live in a bounded in-process LRU. Each entry expires after
+    TOKEN_CACHE_TTL seconds or when the token itself expires, whichever comes first.
+
+    When TOKEN_CACHE_BACKEND names a Django cache alias, entries are stored in that
+    cache instead so every worker process shares them.
+
+    Invalidation works through a per-user generation counter: logging out bumps
+    the counter, and entries written under an older generation are ignored (or,
+    in process, not stored). Callers read the generation before validating the
+    token against the database and pass it to set(), so a logout committed
+    while the token was being validated keeps the token out of the cache.
+    """
+
+    KEY_PREFIX = 'token-cache'
+
+    def __init__(self, max_size=10000, ttl=300, backend=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backend = caches[backend] if backend else None
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_size=getattr(settings, 'TOKEN_CACHE_MAX_SIZE', 10000),
+            ttl=getattr(settings, 'TOKEN_CACHE_TTL', 300),
+            backend=getattr(settings, 'TOKEN_CACHE_BACKEND', None),
+        )
+
+    def _shared_key(self, token, user_id):
+        digest = hashlib.sha256(token.encode()).hexdigest()
+        return f"{self.KEY_PREFIX}:{user_id}:{digest}"
+
+    def _generation_key(self, user_id):
+        return f"{self.KEY_PREFIX}-generation:{user_id}"
+
+    def _lifetime(self, expires_at):
+        """Seconds an entry may be cached for, bounded by the token's own expiry."""
+        if expires_at is None:
+            return self.ttl
+        return min(self.ttl, (expires_at - timezone.now()).total_seconds())
+
+    def get(self, token, user_id):
+        """
+        Returns the cached entry (a dict with at least 'user_id') for the pair,
+        or None when it is missing, stale or the token has expired.
+        """
+        user_id = str(user_id)
+        if self.backend is not None:
+            key = self._shared_key(token, user_id)
+            generation_key = self._generation_key(user_id)
+            found = self.backend.get_many([key, generation_key])
+            entry = found.get(key)
+            if entry is None or entry['generation'] != found.get(generation_key, 0):
+                return None
+            return entry['value']
+
+        with self._lock:
+            entry = self._entries.get((token, user_id))
+            if entry is None:
+                return None
+            value, valid_until = entry
+            if valid_until <= time.monotonic():
+                self._evict((token, user_id))
+                return None
+            self._entries.move_to_end((token, user_id))
+            return value
+
+    async def aget(self, token, user_id):
+        """Async variant of get(); only the shared backend does I/O."""
+        if self.backend is None:
+            return self.get(token, user_id)
+        user_id = str(user_id)
+        key = self._shared_key(token, user_id)
+        generation_key = self._generation_key(user_id)
+        found = await self.backend.aget_many([key, generation_key])
+        entry = found.get(key)
+        if entry is None or entry['generation'] != found.get(generation_key, 0):
+            return None
+        return entry['value']
+
+    def generation(self, user_id):
+        """The user's current generation; read it before validating a token against the database."""
+        user_id = str(user_id)
+        if self.backend is not None:
+            return self.backend.get(self._generation_key(user_id), 0)
+        with self._lock:
+            return self._generations.get(user_id, 0)
+
+    async def ageneration(self, user_id):
+        """Async variant of generation(); only the shared backend does I/O."""
+        if self.backend is None:
+            return self.generation(user_id)
+        return await self.backend.aget(self._generation_key(str(user_id)), 0)
+
+    def set(self, token, user_id, generation, expires_at=None, **extra):
+        """
+        Caches a validated pair until the TTL or the token's expiry is reached.
+        ``generation`` is the user's generation read before the pair was
+        validated; the entry is void if the user was invalidated since.
+        """
+        user_id = str(user_id)
+        lifetime = self._lifetime(expires_at)
+        if lifetime <= 0:
+            return
+        value = {'user_id': user_id, 'expires_at': expires_at, **extra}
+
+        if self.backend is not None:
+            self.backend.set(
+                self._shared_key(token, user_id),
+                {'generation': generation, 'value': value},
+                timeout=lifetime,
+            )
+            return
+
+        with self._lock:
+            if self._generations.get(user_id, 0) != generation:
+                return
+            key = (token, user_id)
+            self._entries[key] = (value, time.monotonic() + lifetime)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._evict(next(iter(self._entries)))
+
+    async def aset(self, token, user_id, generation, expires_at=None, **extra):
+        """Async variant of set(); only the shared backend does I/O."""
+        if self.backend is None:
+            return self.set(token, user_id, generation, expires_at=expires_at, **extra)
+        user_id = str(user_id)
+        lifetime = self._lifetime(expires_at)
+        if lifetime <= 0:
+            return
+        await self.backend.aset(
+            self._shared_key(token, user_id),
+            {'generation': generation, 'value': {'user_id': user_id, 'expires_at': expires_at, **extra}},
+            timeout=lifetime,
+        )
+
+    def invalidate_user(self, user_id):
+        """Drops every cached token of the user, e.g. on logout."""
+        user_id = str(user_id)
+        if self.backend is not None:
+            generation_key = self._generation_key(user_id)
+            if not self.backend.add(generation_key, 1, timeout=None):
+                self.backend.incr(generation_key)
+            return
+
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in self._keys_by_user.pop(user_id, set()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _evict(self, key):
+        self._entries.pop(key, None)
+        keys = self._keys_by_user.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[1]]
+
+
+@lru_cache(maxsize=None)
+def get_token_cache():
+    """Process-wide TokenCache configured from settings."""
+    return TokenCache.from_settings()
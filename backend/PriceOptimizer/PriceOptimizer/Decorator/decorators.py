@@ -1,14 +1,60 @@
 from functools import wraps
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from PriceOptimizer.Metrics import metrics
+
+
+def _resolved_role(request):
+    if hasattr(request, 'user_role'):
+        return request.user_role
+    return request.META.get('HTTP_USER_ROLE') 
 
 
 def role_required(required_role):
+    """
+    Restricts a view to the given roles.
+
+    Uses the role resolved server-side by RequestAuthenticationMiddleware; the
+    client-supplied User-Role header is only consulted when the middleware did
+    not run for the request. Works for both sync and async views.
+
+    With metrics enabled, rejected requests are counted and the handler time of
+    sampled requests is recorded per view.
+    """
     def decorator(view_func):
+        view_name = view_func.__qualname__
+        timed_view = metrics.timed(view_name, metrics.VIEW_SECONDS)(view_func)
+
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_async_view(request, *args, **kwargs):
+                if _resolved_role(request) not in required_role:
+                    if metrics.is_enabled():
+                        metrics.ACCESS_DENIED.inc(view_name)
+                    return JsonResponse({'error': 'Forbidden'}, status=403)
+                return await timed_view(request, *args, **kwargs)
+            return _wrapped_async_view
+
         @wraps(view_func)
         def _wrapped_view(request, *args, **kwargs):
-            user_role = request.META.get('HTTP_USER_ROLE') 
+            user_role = _resolved_role(request)
             if user_role not in required_role:
+                if metrics.is_enabled():
+                    metrics.ACCESS_DENIED.inc(view_name)
                 return JsonResponse({'error': 'Forbidden'}, status=403)
-            return view_func(request, *args, **kwargs)
+            return timed_view(request, *args, **kwargs)
         return _wrapped_view
     return decorator
+
+
+def async_method_decorator(decorator):
+    """
+    method_decorator for async handlers of class-based views.
+
+    Django's method_decorator returns a plain function, which hides that the
+    handler is a coroutine function and makes the view run as a sync view.
+    """
+    def _dec(method):
+        return markcoroutinefunction(method_decorator(decorator)(method))
+    return _dec
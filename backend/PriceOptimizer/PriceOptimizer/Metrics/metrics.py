@@ -0,0 +1,255 @@
+"""
+In-process request and hot-path metrics in the Prometheus text format.
+
+Instrumentation is opt-in (METRICS_ENABLED). RequestMetricsMiddleware counts
+every request and picks METRICS_SAMPLE_RATE of them for detailed timing: for
+a sampled request it records the latency, response size and the number and
+total time of its database queries, and the ``timed`` decorators record the
+time spent in views, serializers and the forecasting/pricing code it runs.
+Unsampled requests only pay for one context variable lookup per decorated
+call, so a low rate can stay on in production.
+
+Queries are counted by an execute wrapper installed on every database
+connection when it is opened. The per-request state lives in a context
+variable, which asgiref carries into the threads running sync code for
+async views, so queries of both sync and async views are attributed to
+their request.
+
+Metrics are kept per process: each worker process serves its own on
+/metrics/.
+"""
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}' for labels, value in values)
+        return lines
+
+
+class Histogram:
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        # Per-bucket (not cumulative) counts; the last slot counts values above every bound.
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            values = sorted((labels, [list(state[0]), state[1], state[2]]) for labels, state in self._values.items())
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else _number(float(bound))
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, [("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(float(total))}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'Requests handled, sampled or not.', ['method', 'endpoint', 'status']
+))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'Latency of sampled requests.', ['method', 'endpoint', 'status']
+))
+RESPONSE_BYTES = REGISTRY.register(Histogram(
+    'http_response_size_bytes', 'Body size of sampled non-streaming responses.', ['method', 'endpoint'], SIZE_BUCKETS
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    'db_queries_per_request', 'Database queries run by sampled requests.', ['method', 'endpoint'], QUERY_COUNT_BUCKETS
+))
+REQUEST_QUERY_SECONDS = REGISTRY.register(Histogram(
+    'db_query_duration_seconds_per_request', 'Total database query time of sampled requests.', ['method', 'endpoint']
+))
+VIEW_SECONDS = REGISTRY.register(Histogram(
+    'view_duration_seconds', 'Time spent in role-checked view handlers of sampled requests.', ['view']
+))
+ACCESS_DENIED = REGISTRY.register(Counter(
+    'role_check_denied_total', 'Requests rejected by role_required.', ['view']
+))
+SERIALIZATION_SECONDS = REGISTRY.register(Histogram(
+    'serialization_duration_seconds', 'Time spent serializing responses in sampled calls.', ['serializer']
+))
+FUNCTION_SECONDS = REGISTRY.register(Histogram(
+    'function_duration_seconds', 'Time spent in instrumented forecasting and pricing functions in sampled calls.', ['function']
+))
+
+
+class RequestStats:
+    """Per-request sampling decision and database query totals."""
+    __slots__ = ('sampled', 'queries', 'query_seconds')
+
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def is_enabled():
+    return getattr(settings, 'METRICS_ENABLED', False)
+
+
+def sample():
+    """Sampling decision for a new request or an instrumented call outside any request."""
+    return is_enabled() and random.random() < getattr(settings, 'METRICS_SAMPLE_RATE', 0.01)
+
+
+def is_sampled():
+    """Whether the current request (or, outside requests, this call) is recorded in detail."""
+    stats = _current.get()
+    if stats is not None:
+        return stats.sampled
+    return sample()
+
+
+def begin_request(sampled):
+    """Starts tracking a request; returns the token to pass to end_request."""
+    return _current.set(RequestStats(sampled))
+
+
+def end_request(token):
+    """Stops tracking the request started with the token and returns its RequestStats."""
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding every query's time to the current sampled request."""
+    stats = _current.get()
+    if stats is None or not stats.sampled:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - start
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver installing record_query on every new connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def timed(name, histogram=FUNCTION_SECONDS):
+    """
+    Records the duration of the decorated function (sync or async) in the
+    histogram under the given label, for sampled calls only.
+    """
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def _timed_async(*args, **kwargs):
+                if not is_sampled():
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, name)
+            return _timed_async
+
+        @wraps(func)
+        def _timed(*args, **kwargs):
+            if not is_sampled():
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, name)
+        return _timed
+    return decorator
+
+
+def timed_serializer(name):
+    """timed() recording into the serialization histogram."""
+    return timed(name, SERIALIZATION_SECONDS)
+
+
+def render_metrics():
+    """All metrics of this process in the Prometheus text exposition format."""
+    return REGISTRY.render()
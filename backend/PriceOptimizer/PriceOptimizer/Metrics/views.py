@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from PriceOptimizer.Metrics.metrics import is_enabled, render_metrics
+
+
+class MetricsView(View):
+    """
+    Serves the metrics of this process in the Prometheus text format.
+    Only reachable when METRICS_ENABLED is set, from the addresses in METRICS_ALLOWED_IPS.
+    """
+
+    def get(self, request):
+        """
+        Handles GET requests from the metrics scraper. The endpoint is not authenticated,
+        so it is limited to local addresses by default.
+        """
+        if not is_enabled():
+            return JsonResponse({'error': 'Not found'}, status=404)
+        if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+            return JsonResponse({'error': 'Forbidden'}, status=403)
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
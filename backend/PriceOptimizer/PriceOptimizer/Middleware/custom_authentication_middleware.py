@@ -0,0 +1,157 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.models import OuterRef, Subquery
+from django.http import JsonResponse
+from django.utils import timezone
+from userAuth.models import TokenUsers, UserRoles
+from PriceOptimizer.Cache.token_cache import get_token_cache
+from PriceOptimizer.Exception.custom_exception import TokenValidationError, UserIDValidationError
+
+
+def active_token_lookup(token, user_id):
+    """
+    Query fetching the active token row of a user together with the user's role
+    name, or None when the user ID is not a valid integer. This is the single
+    query of every uncached authentication; check_query_plans explains it.
+    """
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    role = UserRoles.objects.filter(user_id=OuterRef('user_id')).values('role__name')[:1]
+    return (
+        TokenUsers.objects.filter(token=token, user_id=user_id, expired=False)
+        .annotate(role=Subquery(role))
+        .values('id', 'user_id', 'expires_at', 'role')
+    )
+
+
+class RequestAuthenticationMiddleware:
+    """
+    Middleware that authenticates every request in a single pass.
+
+    1. Checks that the token and the user ID are present in the request headers.
+    2. Looks up the active token for that user together with the user's role in
+       one query. The token row references the user, so a match also proves the
+       user exists.
+    3. Verifies that the token has not expired.
+
+    On success the resolved user ID, token and role are attached to the request
+    as request.user_id, request.token and request.user_role. Validated tokens are
+    kept in the token cache, so repeated requests skip the query entirely.
+
+    Skips authentication for certain URLs like login and register.
+
+    The middleware is both sync and async capable: under ASGI it runs natively in
+    the event loop using the async ORM instead of being adapted to a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    skip_urls = frozenset(['/pot/auth/login/', '/pot/auth/register/', '/metrics/'])
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path not in self.skip_urls:
+            try:
+                self.authenticate(request)
+            except (TokenValidationError, UserIDValidationError) as e:
+                return JsonResponse({'error': str(e)}, status=401)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if request.path not in self.skip_urls:
+            try:
+                await self.aauthenticate(request)
+            except (TokenValidationError, UserIDValidationError) as e:
+                return JsonResponse({'error': str(e)}, status=401)
+        return await self.get_response(request)
+
+    def authenticate(self, request):
+        """
+        Validates the Authorization and user_id headers and resolves the user's role.
+
+        Raises:
+            TokenValidationError: If the token is missing, unknown or expired.
+            UserIDValidationError: If the user ID is missing from the request.
+        """
+        token, header_user_id = self.credentials(request)
+
+        token_cache = get_token_cache()
+        cached = token_cache.get(token, header_user_id)
+        if cached:
+            self.attach(request, int(cached['user_id']), token, cached.get('role'))
+            return
+
+        # Read before the lookup, so a logout committed in between voids the cache entry.
+        generation = token_cache.generation(header_user_id)
+        token_record = self.lookup(token, header_user_id)
+        token_record = token_record.first() if token_record is not None else None
+        if not token_record:
+            raise TokenValidationError("Token is invalid or does not exist in the database")
+        if self.is_expired(token_record):
+            TokenUsers.objects.filter(id=token_record['id']).update(expired=True)
+            raise TokenValidationError("Token has expired")
+
+        self.attach(request, token_record['user_id'], token, token_record['role'])
+        token_cache.set(
+            token, token_record['user_id'], generation, expires_at=token_record['expires_at'], role=token_record['role']
+        )
+
+    async def aauthenticate(self, request):
+        """Async variant of authenticate() using the async ORM and cache APIs."""
+        token, header_user_id = self.credentials(request)
+
+        token_cache = get_token_cache()
+        cached = await token_cache.aget(token, header_user_id)
+        if cached:
+            self.attach(request, int(cached['user_id']), token, cached.get('role'))
+            return
+
+        generation = await token_cache.ageneration(header_user_id)
+        token_record = self.lookup(token, header_user_id)
+        token_record = await token_record.afirst() if token_record is not None else None
+        if not token_record:
+            raise TokenValidationError("Token is invalid or does not exist in the database")
+        if self.is_expired(token_record):
+            await TokenUsers.objects.filter(id=token_record['id']).aupdate(expired=True)
+            raise TokenValidationError("Token has expired")
+
+        self.attach(request, token_record['user_id'], token, token_record['role'])
+        await token_cache.aset(
+            token, token_record['user_id'], generation, expires_at=token_record['expires_at'], role=token_record['role']
+        )
+
+    def credentials(self, request):
+        """Returns the (token, user_id) pair from the request headers."""
+        token = request.headers.get('Authorization')
+        if not token:
+            raise TokenValidationError("Token is missing in the request")
+        token = token.replace('Bearer ', '')
+
+        header_user_id = request.headers.get('user_id')
+        if not header_user_id:
+            raise UserIDValidationError("User ID is missing from the request")
+        return token, header_user_id
+
+    def lookup(self, token, user_id):
+        """
+        Builds the query fetching the active token row and the user's role name,
+        or returns None when the user ID is not a valid integer.
+        """
+        return active_token_lookup(token, user_id)
+
+    def is_expired(self, token_record):
+        return token_record['expires_at'] is not None and token_record['expires_at'] < timezone.now()
+
+    def attach(self, request, user_id, token, role):
+        request.user_id = user_id
+        request.token = token
+        request.user_role = role
@@ -0,0 +1,81 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from PriceOptimizer.Metrics import metrics
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware recording request metrics (see PriceOptimizer.Metrics.metrics).
+
+    Every request is counted per method, endpoint (the matched URL route) and
+    status. Sampled requests additionally record their latency, response size
+    and database query count and time. For streaming responses the latency
+    covers producing the response object, not sending its body.
+
+    Only installed when METRICS_ENABLED is set; otherwise Django drops it from
+    the middleware chain. Should come first in MIDDLEWARE so the latency
+    includes the other middleware. Sync and async capable, like
+    RequestAuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    skip_urls = frozenset(['/metrics/'])
+
+    def __init__(self, get_response):
+        if not metrics.is_enabled():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(metrics.install_query_recorder, dispatch_uid='request-metrics-query-recorder')
+        for connection in connections.all(initialized_only=True):
+            metrics.install_query_recorder(None, connection)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if request.path in self.skip_urls:
+            return self.get_response(request)
+        token = metrics.begin_request(metrics.sample())
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = metrics.end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if request.path in self.skip_urls:
+            return await self.get_response(request)
+        token = metrics.begin_request(metrics.sample())
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stats = metrics.end_request(token)
+        self.record(request, response, stats, time.perf_counter() - start)
+        return response
+
+    def endpoint(self, request):
+        match = getattr(request, 'resolver_match', None)
+        return match.route if match is not None else 'unmatched'
+
+    def record(self, request, response, stats, seconds):
+        endpoint = self.endpoint(request)
+        status = str(response.status_code)
+        metrics.REQUESTS.inc(request.method, endpoint, status)
+        if not stats.sampled:
+            return
+        metrics.REQUEST_SECONDS.observe(seconds, request.method, endpoint, status)
+        metrics.REQUEST_QUERIES.observe(stats.queries, request.method, endpoint)
+        metrics.REQUEST_QUERY_SECONDS.observe(stats.query_seconds, request.method, endpoint)
+        if not response.streaming:
+            metrics.RESPONSE_BYTES.observe(len(response.content), request.method, endpoint)
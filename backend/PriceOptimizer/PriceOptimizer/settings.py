@@ -51,14 +51,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'PriceOptimizer.Middleware.metrics_middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'PriceOptimizer.Middleware.custom_token_middleware.TokenValidationMiddleware',
-    'PriceOptimizer.Middleware.custom_auth_middleware.UserIDValidationMiddleware',
+    'PriceOptimizer.Middleware.custom_authentication_middleware.RequestAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -99,6 +99,29 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Set REDIS_URL to add a 'shared' cache that all worker processes can use. Without
+# Redis, CACHE_DIR adds a file based 'shared' cache for the workers of a single host.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+if os.getenv('REDIS_URL'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+elif os.getenv('CACHE_DIR'):
+    CACHES['shared'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_DIR'),
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -167,3 +190,96 @@ CORS_EXPOSE_HEADERS = [
     'Authorization',
     'User-Role',
 ]
+
+
+# Price optimization engine
+# Default price elasticity used when a product has no usable price variation in its history
+PRICE_ELASTICITY_DEFAULT = 1.5
+
+# Optimized prices are capped at selling_price * PRICE_MAX_MARKUP
+PRICE_MAX_MARKUP = 1.5
+
+# Number of products loaded, optimized and written per bulk_update by the repricing job
+REPRICE_CHUNK_SIZE = 2000
+
+# Keyset pagination of the product list
+PRODUCT_LIST_PAGE_SIZE = 100
+PRODUCT_LIST_MAX_PAGE_SIZE = 1000
+
+# Validated (token, user_id) pairs cached by RequestAuthenticationMiddleware
+TOKEN_CACHE_MAX_SIZE = 10000
+TOKEN_CACHE_TTL = 300
+# Name of a CACHES alias (e.g. 'shared') to share the token cache between workers;
+# None keeps it in process memory
+TOKEN_CACHE_BACKEND = os.getenv('TOKEN_CACHE_BACKEND')
+
+# Rows read and encoded per chunk by the streaming product export
+PRODUCT_EXPORT_CHUNK_SIZE = 2000
+
+# Rows validated and inserted per transaction by the bulk product import
+PRODUCT_IMPORT_BATCH_SIZE = 5000
+# Rejected rows listed in the import API response (all are counted)
+PRODUCT_IMPORT_MAX_REPORTED_ERRORS = 1000
+
+# Seconds a process may serve categories from its cache before reloading them
+CATEGORY_CACHE_TTL = 60
+# Name of a CACHES alias (e.g. 'shared') used to propagate category invalidations
+# between workers; None keeps invalidation local to the process
+CATEGORY_CACHE_BACKEND = os.getenv('CATEGORY_CACHE_BACKEND')
+
+# JSON encoder of the fast product list serializer: None renders byte-identical output
+# to the DRF serializer, 'orjson' uses orjson when installed (compact separators)
+FAST_JSON_ENCODER = os.getenv('FAST_JSON_ENCODER')
+
+# CACHES alias of the per-user product list response cache. Writes from any process (job
+# workers, management commands, other servers) must reach it, so it defaults to the
+# 'shared' cache and stays disabled without one; process-local aliases are refused
+PRODUCT_LIST_CACHE_BACKEND = os.getenv('PRODUCT_LIST_CACHE_BACKEND', 'shared' if 'shared' in CACHES else '')
+# Seconds a cached product list is kept; writes invalidate it earlier
+PRODUCT_LIST_CACHE_TTL = 300
+
+# Limits of one price simulation request: products and candidate prices per product
+SIMULATION_MAX_PRODUCTS = 10000
+SIMULATION_MAX_PRICE_POINTS = 500
+
+# Prices each demand curve is sampled at when a forecast is generated
+DEMAND_CURVE_POINTS = 32
+
+# Background jobs (run_job_worker): pool processes (None uses the CPU count), products per
+# chunk, seconds between polls of an empty queue and seconds without progress after which
+# a running job is considered abandoned and claimed again.
+JOB_WORKER_PROCESSES = None
+JOB_CHUNK_SIZE = 1000
+JOB_POLL_INTERVAL = 2
+JOB_STALE_AFTER = 600
+
+# Parallel forecast runs (run_forecasts): products per partition and the run seed
+FORECAST_PARTITION_SIZE = 10000
+FORECAST_RUN_SEED = 0
+
+# Products per latest demand forecast read (demand-forecast/latest/)
+LATEST_FORECASTS_MAX_PRODUCTS = 10000
+
+# Products per bulk update/delete request (products/bulk/)
+BULK_PRODUCTS_MAX_ITEMS = 1000
+
+# Demand forecast retention (compact_forecasts): per product, the newest N versions and
+# every version younger than N days are kept; older versions are summarized and deleted
+FORECAST_RETENTION_VERSIONS = 10
+FORECAST_RETENTION_DAYS = 90
+FORECAST_COMPACTION_CHUNK_SIZE = 1000
+
+# Demand history store: directory of the memory-mapped observation files, product ids per
+# file, observations per ingestion request and products per history read (demand-observations/).
+# The directory is a cache local to each host (it need not be shared): file versions are
+# tracked in the database. Every host must use the same partition size.
+DEMAND_HISTORY_DIR = os.getenv('DEMAND_HISTORY_DIR', str(BASE_DIR / 'demand_history'))
+DEMAND_HISTORY_PARTITION_SIZE = 1000
+DEMAND_OBSERVATIONS_MAX_ITEMS = 10000
+DEMAND_OBSERVATIONS_MAX_PRODUCTS = 1000
+
+# Request instrumentation (RequestMetricsMiddleware, served on /metrics/): opt-in, the share
+# of requests timed in detail, and the client addresses allowed to read the metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', '0.01'))
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
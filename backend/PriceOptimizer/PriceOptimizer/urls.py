@@ -16,9 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
+from PriceOptimizer.Metrics.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('pot/api/', include('manageProduct.urls')),
     path('pot/auth/', include('userAuth.urls')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
@@ -0,0 +1,260 @@
+"""
+Pricing analytics aggregates.
+
+PricingAggregate keeps, per auth0_user_id and category, the totals the
+dashboards show (product count, revenue, margin, stock value, rating and
+forecast totals), so a user's summary is one indexed read of a row per
+category instead of a transfer and scan of the whole product list.
+
+The write paths maintain the aggregates incrementally: the products being
+changed are locked and their contribution to every group is read with one
+grouped query before and after the change (``track_changes``), and the signed
+difference is added to the group rows with one ``UPDATE ... SET field = field
++ delta`` per group. The cost is proportional to the products changed, not to
+the size of their groups, and concurrent chunks of a catalog-wide run only
+touch the aggregate rows briefly, at the end of their transaction. Locking
+the changed products first keeps a concurrent write to the same product from
+being counted twice.
+
+A full recompute of whole groups (``refresh_users``) is left to the
+refresh_pricing_aggregates management command, for changes made outside the
+write paths.
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from manageProduct.models import PricingAggregate, Product
+from PriceOptimizer.Metrics.metrics import timed
+
+
+TOTAL_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+AGGREGATES = {
+    'product_count': Count('id'),
+    'units_sold': Coalesce(Sum('units_sold'), 0),
+    'stock_available': Coalesce(Sum('stock_available'), 0),
+    'revenue': Coalesce(Sum(F('selling_price') * F('units_sold'), output_field=TOTAL_FIELD), Value(Decimal(0)), output_field=TOTAL_FIELD),
+    'margin': Coalesce(Sum((F('selling_price') - F('cost_price')) * F('units_sold'), output_field=TOTAL_FIELD), Value(Decimal(0)), output_field=TOTAL_FIELD),
+    'stock_value': Coalesce(Sum(F('cost_price') * F('stock_available'), output_field=TOTAL_FIELD), Value(Decimal(0)), output_field=TOTAL_FIELD),
+    'rating_sum': Coalesce(Sum('customer_rating'), Value(Decimal(0)), output_field=TOTAL_FIELD),
+    'forecast_count': Count('latest_forecast'),
+    'forecast_units': Coalesce(Sum('latest_forecast__forecast_value', output_field=TOTAL_FIELD), Value(Decimal(0)), output_field=TOTAL_FIELD),
+    'forecast_revenue': Coalesce(Sum(F('latest_forecast__forecast_value') * F('optimized_price'), output_field=TOTAL_FIELD), Value(Decimal(0)), output_field=TOTAL_FIELD),
+}
+
+AGGREGATE_FIELDS = list(AGGREGATES)
+
+# Totals summed over the categories of a user; averages are derived from them.
+SUMMED_FIELDS = [field for field in AGGREGATE_FIELDS if field != 'rating_sum']
+
+
+def _groups_filter(groups):
+    categories = defaultdict(set)
+    for user_id, category_id in groups:
+        categories[user_id].add(category_id)
+    matches = Q(pk__in=[])
+    for user_id, category_ids in categories.items():
+        user_match = Q(category_id__in=[category_id for category_id in category_ids if category_id is not None])
+        if None in category_ids:
+            user_match |= Q(category__isnull=True)
+        matches |= Q(auth0_user_id=user_id) & user_match
+    return matches
+
+
+def _aggregate(products):
+    rows = (
+        products.order_by()
+        .values('auth0_user_id', 'category_id')
+        # Aliased, as 'units_sold' and 'stock_available' would shadow the product fields.
+        .annotate(**{f'total_{field}': aggregate for field, aggregate in AGGREGATES.items()})
+    )
+    return {
+        (row['auth0_user_id'], row['category_id']): {field: row[f'total_{field}'] for field in AGGREGATE_FIELDS}
+        for row in rows
+    }
+
+
+def compute_groups(groups):
+    """
+    Computes the aggregates of the given (auth0_user_id, category_id) groups with one grouped query.
+
+    Returns:
+        dict: group -> dict of AGGREGATE_FIELDS; groups without products are left out.
+    """
+    return _aggregate(Product.objects.filter(_groups_filter(groups)))
+
+
+def product_totals_of(products):
+    """
+    Contribution of a Product queryset to its groups, with one grouped query.
+
+    Returns:
+        dict: group -> dict of AGGREGATE_FIELDS.
+    """
+    return _aggregate(products)
+
+
+def product_totals(product_ids):
+    """product_totals_of the given product ids; ids that do not exist count for nothing."""
+    if not product_ids:
+        return {}
+    return product_totals_of(Product.objects.filter(id__in=product_ids))
+
+
+def _group_sort_key(group):
+    return group[0], group[1] is None, group[1] or 0
+
+
+def _add_to_group(group, delta, create, now):
+    user_id, category_id = group
+    aggregates = PricingAggregate.objects.filter(auth0_user_id=user_id)
+    aggregates = aggregates.filter(category__isnull=True) if category_id is None else aggregates.filter(category_id=category_id)
+    increments = {field: F(field) + value for field, value in delta.items()}
+    for _ in range(2):
+        if aggregates.update(modified_dt=now, **increments) or not create:
+            return
+        try:
+            # A savepoint, so losing the race to another creator leaves the transaction usable.
+            with transaction.atomic():
+                PricingAggregate.objects.create(auth0_user_id=user_id, category_id=category_id, modified_dt=now, **delta)
+            return
+        except IntegrityError:
+            continue
+
+
+@timed('analytics.apply_deltas')
+def apply_deltas(before, after):
+    """
+    Adds the difference between two ``product_totals`` readings of the same
+    products to the stored aggregates. Rows are created for groups the
+    products now belong to and removed once a group has no products left.
+    """
+    groups = sorted(set(before) | set(after), key=_group_sort_key)
+    now = timezone.now()
+    touched = []
+    with transaction.atomic():
+        # Fixed order, so concurrent writers lock overlapping groups without deadlocking.
+        for group in groups:
+            old = before.get(group, {})
+            new = after.get(group, {})
+            delta = {field: new.get(field, 0) - old.get(field, 0) for field in AGGREGATE_FIELDS}
+            delta = {field: value for field, value in delta.items() if value}
+            if delta:
+                _add_to_group(group, delta, create=group in after, now=now)
+                touched.append(group)
+        if touched:
+            PricingAggregate.objects.filter(_groups_filter(touched), product_count__lte=0).delete()
+
+
+@contextmanager
+def track_changes(product_ids):
+    """
+    Runs the enclosed writes to the given products in a transaction and
+    applies their effect to the aggregates when they are done. The products
+    are locked (in id order) before their totals are read.
+    """
+    product_ids = list(product_ids)
+    with transaction.atomic():
+        list(Product.objects.select_for_update().filter(id__in=product_ids).order_by('id').values_list('id', flat=True))
+        before = product_totals(product_ids)
+        yield
+        apply_deltas(before, product_totals(product_ids))
+
+
+def add_products(product_ids):
+    """Adds newly created products to the aggregates."""
+    apply_deltas({}, product_totals(product_ids))
+
+
+@timed('analytics.refresh_groups')
+def refresh_groups(groups):
+    """
+    Recomputes and stores the aggregates of the given (auth0_user_id, category_id)
+    groups from all of their products. Groups left without products are removed.
+    Only used by full rebuilds; the write paths apply deltas instead.
+    """
+    groups = sorted(set(groups), key=_group_sort_key)
+    if not groups:
+        return
+    now = timezone.now()
+    with transaction.atomic():
+        PricingAggregate.objects.bulk_create(
+            [PricingAggregate(auth0_user_id=user_id, category_id=category_id) for user_id, category_id in groups],
+            ignore_conflicts=True,
+        )
+        # Lock in a fixed order so refreshes of overlapping groups cannot deadlock.
+        aggregates = list(
+            PricingAggregate.objects.select_for_update().filter(_groups_filter(groups)).order_by('id')
+        )
+        values = compute_groups(groups)
+
+        updated = []
+        empty = []
+        for aggregate in aggregates:
+            group_values = values.get((aggregate.auth0_user_id, aggregate.category_id))
+            if group_values is None:
+                empty.append(aggregate.id)
+                continue
+            for field, value in group_values.items():
+                setattr(aggregate, field, value)
+            aggregate.modified_dt = now
+            updated.append(aggregate)
+        if updated:
+            PricingAggregate.objects.bulk_update(updated, AGGREGATE_FIELDS + ['modified_dt'])
+        if empty:
+            PricingAggregate.objects.filter(id__in=empty).delete()
+
+
+def refresh_users(user_ids=None):
+    """
+    Rebuilds the aggregates of the given users (every user when omitted), including
+    groups that no longer have products.
+
+    Returns:
+        int: number of groups refreshed.
+    """
+    products = Product.objects.all()
+    aggregates = PricingAggregate.objects.all()
+    if user_ids is not None:
+        products = products.filter(auth0_user_id__in=user_ids)
+        aggregates = aggregates.filter(auth0_user_id__in=user_ids)
+    groups = set(products.values_list('auth0_user_id', 'category_id').distinct())
+    groups |= set(aggregates.values_list('auth0_user_id', 'category_id'))
+    refresh_groups(groups)
+    return len(groups)
+
+
+def user_summary(user_id, category=None):
+    """
+    Reads the analytics of one user from the stored aggregates.
+
+    Args:
+        category: optional category name to limit the breakdown to.
+
+    Returns:
+        dict: 'totals' over the user's categories and a per-category 'categories' breakdown.
+    """
+    aggregates = PricingAggregate.objects.filter(auth0_user_id=user_id).order_by('category__name', 'category_id')
+    if category:
+        aggregates = aggregates.filter(category__name=category)
+    rows = list(aggregates.values('category__name', 'rating_sum', *SUMMED_FIELDS))
+
+    categories = [{'category': row['category__name'], **_with_averages(row)} for row in rows]
+    totals = {field: sum((row[field] for row in rows), 0) for field in SUMMED_FIELDS + ['rating_sum']}
+    return {'totals': _with_averages(totals), 'categories': categories}
+
+
+def _with_averages(values):
+    count = values['product_count']
+    revenue = values['revenue']
+    return {
+        **{field: values[field] for field in SUMMED_FIELDS},
+        'average_rating': round(values['rating_sum'] / count, 2) if count else None,
+        'margin_rate': round(values['margin'] / revenue, 4) if revenue else None,
+    }
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ManageproductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'manageProduct'
+
+    def ready(self):
+        from manageProduct import signals  # noqa: F401
@@ -0,0 +1,145 @@
+"""
+Set-based bulk product updates and deletes.
+
+Updates load every targeted product with one locking query, apply the
+validated changes in memory and write them back with a single bulk_update;
+the same change applied to many products is a single UPDATE ... WHERE id IN.
+Deletes remove the products and their forecasts with one DELETE per table.
+Every operation runs in one transaction and reports an outcome per id.
+"""
+from django.utils import timezone
+
+from manageProduct import analytics
+from manageProduct.category_cache import get_category_cache
+from manageProduct.change_tracking import PRICING_INPUT_FIELDS, inputs_changed
+from manageProduct.list_cache import invalidate_product_lists
+from manageProduct.models import Product
+from manageProduct.serializer import ProductPatchSerializer
+
+
+UPDATED = 'updated'
+DELETED = 'deleted'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _resolve_categories(changes):
+    """Replaces category_name by category_id in validated changes, resolving all names at once."""
+    category_ids = get_category_cache().resolve(
+        item['category_name'] for item in changes if 'category_name' in item
+    )
+    for item in changes:
+        if 'category_name' in item:
+            item['category_id'] = category_ids[item.pop('category_name')]
+
+
+def update_products(patches):
+    """
+    Applies a partial update per product.
+
+    Args:
+        patches: list of dicts, each with the product 'id' and the fields to change.
+
+    Returns:
+        list: one outcome dict per patch, in input order.
+    """
+    outcomes = [{'id': patch.get('id') if isinstance(patch, dict) else None} for patch in patches]
+    ids = [_parse_id(outcome['id']) for outcome in outcomes]
+    data = [
+        {key: value for key, value in patch.items() if key != 'id'} if isinstance(patch, dict) else patch
+        for patch in patches
+    ]
+
+    serializer = ProductPatchSerializer(data=data, many=True, partial=True)
+    if serializer.is_valid():
+        valid = list(serializer.validated_data)
+        positions = list(range(len(patches)))
+    else:
+        # ListSerializer drops the validated items when any item fails, so the
+        # clean items are validated again on their own.
+        positions = [position for position, errors in enumerate(serializer.errors) if not errors]
+        for position, errors in enumerate(serializer.errors):
+            if errors:
+                outcomes[position].update(status=INVALID, errors=errors)
+        serializer = ProductPatchSerializer(data=[data[position] for position in positions], many=True, partial=True)
+        valid = list(serializer.validated_data) if serializer.is_valid() else []
+
+    for position in [position for position in positions if ids[position] is None]:
+        outcomes[position].update(status=INVALID, errors={'id': ['A valid integer is required.']})
+    changes = [(position, dict(item)) for position, item in zip(positions, valid) if ids[position] is not None]
+    if not changes:
+        return outcomes
+
+    now = timezone.now()
+    product_ids = [ids[position] for position, _ in changes]
+    with analytics.track_changes(product_ids):
+        products = Product.objects.in_bulk(product_ids)
+        _resolve_categories([item for _, item in changes])
+
+        fields = set()
+        for position, item in changes:
+            product = products.get(ids[position])
+            if product is None:
+                outcomes[position]['status'] = NOT_FOUND
+                continue
+            if inputs_changed(product, item):
+                item['inputs_modified_dt'] = now
+            item['modified_dt'] = now
+            for field, value in item.items():
+                setattr(product, field, value)
+            fields.update(item)
+            outcomes[position]['status'] = UPDATED
+
+        updated = list(products.values())
+        if fields and updated:
+            Product.objects.bulk_update(updated, sorted(fields))
+        invalidate_product_lists(*{product.auth0_user_id for product in updated})
+    return outcomes
+
+
+def update_products_with(product_ids, changes):
+    """
+    Applies the same partial update to every listed product with a single UPDATE.
+
+    Returns:
+        tuple: (list of outcome dicts in input order, validation errors or None)
+    """
+    serializer = ProductPatchSerializer(data=changes, partial=True)
+    if not serializer.is_valid():
+        return [], serializer.errors
+    item = dict(serializer.validated_data)
+
+    now = timezone.now()
+    with analytics.track_changes(product_ids):
+        _resolve_categories([item])
+        owners = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'auth0_user_id'))
+        item['modified_dt'] = now
+        if any(field in item for field in PRICING_INPUT_FIELDS):
+            item['inputs_modified_dt'] = now
+        if owners:
+            Product.objects.filter(id__in=list(owners)).update(**item)
+        invalidate_product_lists(*set(owners.values()))
+    return [{'id': product_id, 'status': UPDATED if product_id in owners else NOT_FOUND} for product_id in product_ids], None
+
+
+def delete_products(product_ids):
+    """
+    Deletes the listed products together with their demand forecasts and cached
+    forecast models.
+
+    Returns:
+        list: one outcome dict per id, in input order.
+    """
+    with analytics.track_changes(product_ids):
+        owners = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'auth0_user_id'))
+        if owners:
+            Product.objects.filter(id__in=list(owners)).delete()
+        invalidate_product_lists(*set(owners.values()))
+    return [{'id': product_id, 'status': DELETED if product_id in owners else NOT_FOUND} for product_id in product_ids]
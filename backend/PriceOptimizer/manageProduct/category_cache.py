@@ -0,0 +1,135 @@
+"""
+Process-level cache of the Category table.
+
+Categories change rarely but are read on every product write and on every
+category list request. The cache keeps an immutable snapshot of all
+categories (name -> id map, ordered name list, an ETag for conditional
+GETs) and reloads it when it is invalidated or older than CATEGORY_CACHE_TTL.
+
+Saving or deleting a Category invalidates the cache through signals. With
+CATEGORY_CACHE_BACKEND set to a Django cache alias, invalidation also bumps a
+shared version key, so the other worker processes reload on their next read.
+"""
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+
+from manageProduct.models import Category
+
+
+CategorySnapshot = namedtuple('CategorySnapshot', ['names', 'ids', 'etag', 'version', 'loaded_at'])
+
+
+class CategoryCache:
+
+    VERSION_KEY = 'category-cache-version'
+
+    def __init__(self, ttl=60, backend=None):
+        self.ttl = ttl
+        self.backend = caches[backend] if backend else None
+        self._snapshot = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            ttl=getattr(settings, 'CATEGORY_CACHE_TTL', 60),
+            backend=getattr(settings, 'CATEGORY_CACHE_BACKEND', None),
+        )
+
+    def _fresh(self, version):
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            return None
+        if snapshot.loaded_at + self.ttl <= time.monotonic():
+            return None
+        return snapshot
+
+    def _build(self, rows, version):
+        names = [name for _, name in rows]
+        # The ETag covers the names themselves, so deletes and renames change it too.
+        etag = '"%s"' % hashlib.md5(json.dumps(names).encode()).hexdigest()
+        return CategorySnapshot(
+            names=names,
+            ids={name: category_id for category_id, name in rows},
+            etag=etag,
+            version=version,
+            loaded_at=time.monotonic(),
+        )
+
+    def _store(self, snapshot, generation):
+        with self._lock:
+            # Skip storing if the cache was invalidated while the rows were being read.
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def _rows(self):
+        return Category.objects.order_by('id').values_list('id', 'name')
+
+    def snapshot(self):
+        """Returns the current CategorySnapshot, loading it from the database if needed."""
+        version = self.backend.get(self.VERSION_KEY) if self.backend is not None else None
+        snapshot = self._fresh(version)
+        if snapshot is not None:
+            return snapshot
+        generation = self._generation
+        return self._store(self._build(list(self._rows()), version), generation)
+
+    async def asnapshot(self):
+        """Async variant of snapshot() using the async ORM and cache APIs."""
+        version = await self.backend.aget(self.VERSION_KEY) if self.backend is not None else None
+        snapshot = self._fresh(version)
+        if snapshot is not None:
+            return snapshot
+        generation = self._generation
+        rows = [row async for row in self._rows()]
+        return self._store(self._build(rows, version), generation)
+
+    def get_id(self, name):
+        """
+        Returns (category id, created) for a category name, creating the
+        category when it does not exist yet, like get_or_create.
+        """
+        category_id = self.snapshot().ids.get(name)
+        if category_id is not None:
+            return category_id, False
+        category, created = Category.objects.get_or_create(name=name)
+        return category.id, created
+
+    def resolve(self, names):
+        """
+        Returns a name -> id mapping for the given category names, creating the
+        missing categories with a single bulk_create.
+        """
+        names = set(names)
+        known = self.snapshot().ids
+        category_ids = {name: known[name] for name in names if name in known}
+        missing = names - set(category_ids)
+        if missing:
+            # bulk_create sends no signals, so invalidate explicitly.
+            Category.objects.bulk_create([Category(name=name) for name in missing], ignore_conflicts=True)
+            self.invalidate()
+            category_ids.update(Category.objects.filter(name__in=missing).values_list('name', 'id'))
+        return category_ids
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+        if self.backend is not None:
+            self.backend.set(self.VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+@lru_cache(maxsize=None)
+def get_category_cache():
+    """Process-wide CategoryCache configured from settings."""
+    return CategoryCache.from_settings()
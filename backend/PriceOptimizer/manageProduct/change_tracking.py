@@ -0,0 +1,94 @@
+"""
+Dirty tracking for incremental forecast and reprice runs.
+
+``Product.inputs_modified_dt`` records the last change of a product's pricing
+inputs, including new demand observations. Every catalog-wide run is recorded
+as a ProcessingRun, and the start of the last successful run of a kind is the
+watermark of the next one: an incremental run only processes products whose
+inputs changed after it. Forecasts are not an input of the optimizer, so a new
+forecast does not select a product for repricing.
+
+The watermark is the start rather than the end of the run, so changes made
+while a run is in progress are picked up again by the next run.
+"""
+from contextlib import contextmanager
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from manageProduct.models import ProcessingRun
+
+
+PRICING_INPUT_FIELDS = ('cost_price', 'selling_price', 'units_sold')
+
+
+def inputs_changed(instance, validated_data):
+    """Whether applying validated_data to the product changes any of its pricing inputs."""
+    return any(
+        field in validated_data and validated_data[field] != getattr(instance, field)
+        for field in PRICING_INPUT_FIELDS
+    )
+
+
+def last_watermark(kind):
+    """Start of the last successful run of the kind, None if there was none."""
+    return (
+        ProcessingRun.objects.filter(kind=kind, status=ProcessingRun.SUCCEEDED)
+        .order_by('-started_dt').values_list('started_dt', flat=True).first()
+    )
+
+
+def changed_filter(changed_since=None):
+    """
+    Q matching products whose inputs changed after ``changed_since``, a
+    datetime or an ISO string (as stored in job params). An empty Q matches
+    everything.
+    """
+    if not changed_since:
+        return Q()
+    return Q(inputs_modified_dt__gt=_as_datetime(changed_since))
+
+
+def is_catalog_wide(params):
+    """Whether a run's selection params cover the whole catalog."""
+    return not any(params.get(key) for key in ('user_id', 'category', 'product_id_list'))
+
+
+def changed_params(params, since):
+    """
+    Adds the filter of an incremental run to the selection params; without a
+    previous successful run everything is processed.
+    """
+    if since is None:
+        return params
+    return {**params, 'changed_since': since.isoformat()}
+
+
+def _as_datetime(value):
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+@contextmanager
+def tracked_run(kind, record=True):
+    """
+    Records a run of the given kind and yields the watermark of the previous
+    successful one. The run is marked succeeded when the block exits normally
+    and failed when it raises.
+
+    Args:
+        record: False for runs over a subset of the catalog (one user or
+                category), which must not advance the catalog-wide watermark.
+    """
+    since = last_watermark(kind)
+    if not record:
+        yield since
+        return
+
+    run = ProcessingRun.objects.create(kind=kind)
+    try:
+        yield since
+    except BaseException:
+        ProcessingRun.objects.filter(id=run.id).update(status=ProcessingRun.FAILED, finished_dt=timezone.now())
+        raise
+    ProcessingRun.objects.filter(id=run.id).update(status=ProcessingRun.SUCCEEDED, finished_dt=timezone.now())
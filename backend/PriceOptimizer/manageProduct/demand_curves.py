@@ -0,0 +1,72 @@
+"""
+Precomputed demand-vs-price curves.
+
+When forecasts are generated, the demand curve fitted by the optimization
+engine is sampled at DEMAND_CURVE_POINTS evenly spaced prices between the
+product's cost price and its maximum allowed price, and stored with the
+DemandForecast version as a packed float32 array plus the two price bounds.
+Reading a chart is then a single indexed lookup; the price axis is rebuilt
+from the bounds.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+
+from manageProduct import optimizer
+from PriceOptimizer.Metrics.metrics import timed
+
+
+StoredCurve = namedtuple('StoredCurve', ['min_price', 'max_price', 'demand'])
+
+CURVE_DTYPE = np.dtype('<f4')
+
+
+def _points():
+    return int(getattr(settings, 'DEMAND_CURVE_POINTS', 32))
+
+
+def sample_curves(curves, min_prices, max_prices, points):
+    """
+    Samples every demand curve at ``points`` evenly spaced prices.
+
+    Returns:
+        numpy.ndarray: (n_products, points) float32 demand, never below zero.
+    """
+    steps = np.linspace(0.0, 1.0, points)
+    prices = min_prices[:, None] + (max_prices - min_prices)[:, None] * steps[None, :]
+    demand = np.maximum(curves.intercept[:, None] - curves.slope[:, None] * prices, 0.0)
+    return demand.astype(CURVE_DTYPE)
+
+
+def pack_curve(demand):
+    return np.ascontiguousarray(demand, dtype=CURVE_DTYPE).tobytes()
+
+
+def unpack_curve(data):
+    """Unpacks stored demand bytes into a float64 array."""
+    return np.frombuffer(bytes(data), dtype=CURVE_DTYPE).astype(np.float64)
+
+
+def curve_prices(min_price, max_price, points):
+    return np.linspace(min_price, max_price, points)
+
+
+@timed('demand_curves.build_curves')
+def build_curves(product_ids, points=None):
+    """
+    Fits and samples the demand curves of the given products in one batched pass.
+
+    Returns:
+        dict: product id -> StoredCurve with the packed demand bytes.
+              Unknown ids are left out.
+    """
+    points = points or _points()
+    inputs = optimizer.load_pricing_inputs(product_ids)
+    min_prices = inputs.cost_price
+    max_prices = np.maximum(inputs.selling_price * optimizer._max_markup(), min_prices)
+    demand = sample_curves(optimizer.fit_inputs(inputs), min_prices, max_prices, points)
+    return {
+        int(product_id): StoredCurve(float(low), float(high), pack_curve(row))
+        for product_id, low, high, row in zip(inputs.product_ids, min_prices, max_prices, demand)
+    }
@@ -0,0 +1,79 @@
+"""
+Streaming catalog export.
+
+Products are read with ``.values()`` in chunks through the queryset iterator
+(``aiterator`` under ASGI) and encoded chunk by chunk, so neither model
+instances nor the whole encoded document are ever held in memory.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from PriceOptimizer.Metrics.metrics import timed_serializer
+
+
+EXPORT_FIELDS = [
+    'id', 'name', 'description', 'cost_price', 'selling_price', 'stock_available',
+    'units_sold', 'customer_rating', 'optimized_price',
+]
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+_encoder = DjangoJSONEncoder()
+
+
+def export_queryset(products):
+    """Rows in the same shape as ProductSerializer: category nested as {'name': ...}."""
+    return products.order_by('id').values(*EXPORT_FIELDS, 'category__name')
+
+
+def _shape(row):
+    category_name = row.pop('category__name')
+    row['category'] = {'name': category_name} if category_name is not None else None
+    return row
+
+
+@timed_serializer('export.encode_chunk')
+def _encode(rows, export_format, first):
+    encoded = [_encoder.encode(_shape(row)) for row in rows]
+    if export_format == 'ndjson':
+        return ''.join(line + '\n' for line in encoded)
+    return ('' if first else ',') + ','.join(encoded)
+
+
+def iter_export(products, export_format, chunk_size):
+    """Yields the encoded export of the queryset one chunk of rows at a time."""
+    if export_format == 'json':
+        yield '['
+    batch = []
+    first = True
+    for row in export_queryset(products).iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield _encode(batch, export_format, first)
+            first = False
+            batch = []
+    if batch:
+        yield _encode(batch, export_format, first)
+    if export_format == 'json':
+        yield ']'
+
+
+async def aiter_export(products, export_format, chunk_size):
+    """Async variant of iter_export() so ASGI servers can stream without a thread."""
+    if export_format == 'json':
+        yield '['
+    batch = []
+    first = True
+    async for row in export_queryset(products).aiterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield _encode(batch, export_format, first)
+            first = False
+            batch = []
+    if batch:
+        yield _encode(batch, export_format, first)
+    if export_format == 'json':
+        yield ']'
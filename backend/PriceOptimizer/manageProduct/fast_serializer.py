@@ -0,0 +1,118 @@
+"""
+Fast read path for product lists.
+
+ProductSerializer builds every row through DRF's field machinery, including a
+nested CategorySerializer per product. ProductRowSerializer instead compiles a
+field plan once, from ProductSerializer.Meta.fields and the model field types,
+and renders ``.values_list()`` tuples straight to JSON text. With the default
+encoder the output is byte-identical to
+``JsonResponse(ProductSerializer(products, many=True).data, safe=False)``.
+
+Setting FAST_JSON_ENCODER = 'orjson' renders through orjson instead when it is
+installed. orjson writes compact JSON (no spaces after separators), so that
+output is equivalent but not byte-identical.
+"""
+import decimal
+import json
+from json.encoder import encode_basestring_ascii
+
+from django.conf import settings
+from django.db import models
+
+from manageProduct.models import Product
+from manageProduct.serializer import ProductSerializer
+from PriceOptimizer.Metrics.metrics import timed_serializer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _decimal_value(field):
+    """Matches DRF DecimalField.to_representation with COERCE_DECIMAL_TO_STRING."""
+    exponent = decimal.Decimal('.1') ** field.decimal_places
+    context = decimal.getcontext().copy()
+    context.prec = field.max_digits
+
+    def render(value):
+        if value is None:
+            return ''
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        return '{:f}'.format(value.quantize(exponent, context=context))
+    return render
+
+
+def _int_format(value):
+    return 'null' if value is None else str(int(value))
+
+
+def _str_format(value):
+    return 'null' if value is None else encode_basestring_ascii(value)
+
+
+def _category_format(name):
+    return 'null' if name is None else '{"name": ' + encode_basestring_ascii(name) + '}'
+
+
+def _compile_field(name):
+    """Returns (values_list column, JSON text formatter, python value formatter) for a field."""
+    if name == 'category':
+        return 'category__name', _category_format, lambda value: None if value is None else {'name': value}
+    field = Product._meta.get_field(name)
+    if isinstance(field, models.DecimalField):
+        value_format = _decimal_value(field)
+        return name, lambda value: '"' + value_format(value) + '"', value_format
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return name, _int_format, lambda value: value
+    return name, _str_format, lambda value: value
+
+
+class ProductRowSerializer:
+    """
+    Renders product rows from ``.values_list(*serializer.columns)`` tuples.
+
+    Args:
+        fields: optional subset of ProductSerializer.Meta.fields, like the
+                'fields' argument of ProductSerializer.
+    """
+
+    def __init__(self, fields=None):
+        names = [name for name in ProductSerializer.Meta.fields if fields is None or name in fields]
+        plan = [_compile_field(name) for name in names]
+        self.names = names
+        self.columns = [column for column, _, _ in plan]
+        self._prefixes = [encode_basestring_ascii(name) + ': ' for name in names]
+        self._text_formats = [text_format for _, text_format, _ in plan]
+        self._value_formats = [value_format for _, _, value_format in plan]
+
+    def render_row(self, row):
+        return '{' + ', '.join(
+            [prefix + text_format(value) for prefix, text_format, value in zip(self._prefixes, self._text_formats, row)]
+        ) + '}'
+
+    def rows(self, value_tuples):
+        """Returns the rows as dicts, equal to ProductSerializer(many=True).data."""
+        return [
+            {name: value_format(value) for name, value_format, value in zip(self.names, self._value_formats, row)}
+            for row in value_tuples
+        ]
+
+    def render_text(self, value_tuples):
+        """Renders a JSON array of the rows as text."""
+        if orjson is not None and getattr(settings, 'FAST_JSON_ENCODER', None) == 'orjson':
+            return orjson.dumps(self.rows(value_tuples)).decode()
+        return '[' + ', '.join([self.render_row(row) for row in value_tuples]) + ']'
+
+    @timed_serializer('ProductRowSerializer.render')
+    def render(self, value_tuples):
+        """Renders a JSON array of the rows as bytes, ready for an HttpResponse."""
+        return self.render_text(value_tuples).encode()
+
+    @timed_serializer('ProductRowSerializer.render_page')
+    def render_page(self, value_tuples, next_cursor):
+        """Renders {'results': [...], 'next_cursor': ...} as bytes."""
+        return (
+            '{"results": ' + self.render_text(value_tuples) + ', "next_cursor": ' + json.dumps(next_cursor) + '}'
+        ).encode()
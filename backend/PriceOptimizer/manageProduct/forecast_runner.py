@@ -0,0 +1,125 @@
+"""
+Parallel catalog-wide forecast runs.
+
+The selected products are partitioned by primary key range, or by category
+and then key range, and every partition is forecast in a ProcessPoolExecutor
+worker with its own database connection. Workers read their partition in
+chunks, fit the chunk in one batched pass and write the new DemandForecast
+versions with a single bulk insert per chunk, so partitions share nothing and
+throughput grows with the number of cores. Catalog-wide runs are recorded as
+ProcessingRuns, so a run can be limited to the products changed since the last one.
+
+Every partition seeds ``random`` and NumPy from the run seed and the
+partition key, never from the worker or the scheduling order, so a run with
+the same seed and partitioning is reproducible.
+"""
+import random
+import time
+import zlib
+from collections import namedtuple
+from concurrent.futures import as_completed
+
+import numpy as np
+from django.conf import settings
+
+from manageProduct import change_tracking, jobs, repricing
+
+
+Partition = namedtuple('Partition', ['key', 'filters'])
+
+ForecastRunReport = namedtuple('ForecastRunReport', ['partitions', 'products', 'forecasts_created', 'seconds'])
+
+PARTITION_MODES = ('id', 'category')
+
+
+def id_range_partitions(products, partition_size, filters=None, key=()):
+    """Splits the products into contiguous primary key ranges of partition_size products."""
+    filters = filters or {}
+    for ids in repricing.iter_id_chunks(products, partition_size):
+        yield Partition(key=(*key, ids[0]), filters={**filters, 'id__gte': ids[0], 'id__lte': ids[-1]}), len(ids)
+
+
+def category_partitions(products, partition_size):
+    """Splits the products by category, and large categories further by key range."""
+    category_ids = set(products.order_by().values_list('category_id', flat=True).distinct())
+    for category_id in sorted(category_ids, key=lambda category_id: (category_id is None, category_id or 0)):
+        yield from id_range_partitions(
+            products.filter(category_id=category_id), partition_size, {'category_id': category_id}, (category_id,)
+        )
+
+
+def seed_partition(seed, key):
+    """Seeds random and NumPy from the run seed and the partition key."""
+    partition_seed = zlib.crc32(repr((seed, key)).encode())
+    random.seed(partition_seed)
+    np.random.seed(partition_seed)
+
+
+def forecast_partition(params, partition, seed, chunk_size):
+    """
+    Forecasts one partition inside a pool worker.
+
+    Returns:
+        int: number of forecasts created.
+    """
+    seed_partition(seed, partition.key)
+    products = jobs.select_products(params).filter(**partition.filters)
+    return sum(jobs.forecast_chunk(ids) for ids in repricing.iter_id_chunks(products, chunk_size))
+
+
+def run_forecasts(params=None, partition_by='id', partition_size=None, processes=None, seed=None,
+                  chunk_size=None, changed_only=False, progress=None):
+    """
+    Forecasts every selected product on a process pool.
+
+    Args:
+        params: product selection, as for jobs: 'user_id', 'category', 'product_id_list'.
+        partition_by: 'id' (primary key ranges) or 'category'.
+        partition_size: products per partition.
+        processes: pool size, JOB_WORKER_PROCESSES or the CPU count when omitted.
+        seed: run seed, FORECAST_RUN_SEED when omitted.
+        chunk_size: products fitted and inserted per batch within a partition.
+        changed_only: only forecast products whose pricing inputs changed since the last
+                      successful catalog-wide forecast run.
+        progress: optional callable invoked as ``progress(done, total)`` with product
+                  counts after each partition.
+
+    Returns:
+        ForecastRunReport
+    """
+    if partition_by not in PARTITION_MODES:
+        raise ValueError(f"partition_by must be one of: {', '.join(PARTITION_MODES)}")
+    params = params or {}
+    partition_size = partition_size or settings.FORECAST_PARTITION_SIZE
+    processes = processes or jobs.default_processes()
+    seed = settings.FORECAST_RUN_SEED if seed is None else seed
+    chunk_size = chunk_size or settings.JOB_CHUNK_SIZE
+
+    start = time.perf_counter()
+    with change_tracking.tracked_run('forecast', record=change_tracking.is_catalog_wide(params)) as since:
+        if changed_only:
+            params = change_tracking.changed_params(params, since)
+        products = jobs.select_products(params)
+        if partition_by == 'category':
+            partitions = list(category_partitions(products, partition_size))
+        else:
+            partitions = list(id_range_partitions(products, partition_size))
+        total = sum(size for _, size in partitions)
+
+        pool = jobs.create_pool(processes)
+        try:
+            futures = {
+                pool.submit(forecast_partition, params, partition, seed, chunk_size): size
+                for partition, size in partitions
+            }
+            done = 0
+            created = 0
+            for future in as_completed(futures):
+                created += future.result()
+                done += futures[future]
+                if progress:
+                    progress(done, total)
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    return ForecastRunReport(len(partitions), total, created, time.perf_counter() - start)
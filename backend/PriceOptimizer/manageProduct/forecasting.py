@@ -0,0 +1,172 @@
+"""
+Batched demand forecasting.
+
+Demand is forecast with Holt's linear exponential smoothing. The smoothing
+recursion runs over time steps, but every step is a NumPy operation over all
+products and over a whole grid of (alpha, beta) candidates at once; the best
+pair per product is the one with the lowest one-step-ahead squared error.
+
+The series are built from actual demand inputs only: the product's
+DemandObservations, or its ``units_sold`` when it has none. Fitted parameters
+are cached in ForecastModelState. A product is only refitted when the
+fingerprint of its inputs (``units_sold``, ``selling_price`` and the time its
+inputs or observations last changed) differs from the cached one.
+"""
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+from django.utils import timezone
+
+from manageProduct.history_store import get_demand_history_store
+from manageProduct.models import ForecastModelState, Product
+from manageProduct.optimizer import pad_ragged, to_decimal
+from PriceOptimizer.Metrics.metrics import timed
+
+
+HoltModels = namedtuple('HoltModels', ['level', 'trend', 'alpha', 'beta'])
+
+ALPHA_GRID = (0.1, 0.3, 0.5, 0.7, 0.9)
+BETA_GRID = (0.0, 0.1, 0.3)
+
+MAX_FORECAST = 99999999.99
+
+
+@timed('forecasting.fit_holt')
+def fit_holt(series, alpha_grid=ALPHA_GRID, beta_grid=BETA_GRID):
+    """
+    Fits Holt's linear smoothing for every row of a NaN-padded series matrix.
+
+    Args:
+        series: (n_products, n_steps) array, oldest value first; missing steps are NaN.
+
+    Returns:
+        HoltModels: final level, trend and the selected alpha/beta per product.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    n_products = series.shape[0]
+    alphas, betas = (grid.ravel() for grid in np.meshgrid(alpha_grid, beta_grid, indexing='ij'))
+    a = alphas[:, None]
+    b = betas[:, None]
+
+    level = np.full((alphas.size, n_products), np.nan)
+    trend = np.zeros((alphas.size, n_products))
+    sse = np.zeros((alphas.size, n_products))
+
+    for step in range(series.shape[1]):
+        y = series[None, :, step]
+        has_value = ~np.isnan(y)
+        active = has_value & ~np.isnan(level)
+        first = has_value & np.isnan(level)
+
+        predicted = level + trend
+        error = np.where(active, y - predicted, 0.0)
+        sse += error * error
+
+        new_level = a * y + (1 - a) * predicted
+        new_trend = b * (new_level - level) + (1 - b) * trend
+        trend = np.where(active, new_trend, trend)
+        level = np.where(active, new_level, np.where(first, y, level))
+
+    best = np.argmin(sse, axis=0)
+    columns = np.arange(n_products)
+    return HoltModels(
+        level=np.nan_to_num(level[best, columns]),
+        trend=trend[best, columns],
+        alpha=alphas[best],
+        beta=betas[best],
+    )
+
+
+def forecast_values(level, trend):
+    """One-step-ahead forecast, clipped to what DemandForecast.forecast_value can store."""
+    return np.clip(np.asarray(level) + np.asarray(trend), 0.0, MAX_FORECAST)
+
+
+def inputs_fingerprint(units_sold, selling_price, inputs_modified_dt=None):
+    """
+    Fingerprint of everything the forecast depends on. Recording observations
+    bumps ``inputs_modified_dt``, so it covers the observed series as well.
+    """
+    return hashlib.sha1(f"{units_sold}:{selling_price}:{inputs_modified_dt}".encode()).hexdigest()
+
+
+def load_demand_history(product_ids):
+    """
+    Builds the demand series of the given products from their actual inputs only.
+    Products with recorded DemandObservations use their observed units in day
+    order. Products without observations fall back to a ``units_sold`` baseline:
+    a one-step series whose forecast is their current ``units_sold``. Earlier
+    forecast outputs are never fed back into the fit.
+
+    Returns:
+        tuple: (sorted product id array, NaN-padded series matrix)
+    """
+    ids = np.asarray(sorted(set(product_ids)), dtype=np.int64)
+    observed = get_demand_history_store().rows(ids)
+    observed_ids = set(np.unique(observed.product_ids).tolist())
+    baseline_ids = [int(product_id) for product_id in ids if int(product_id) not in observed_ids]
+    units_sold = dict(Product.objects.filter(id__in=baseline_ids).values_list('id', 'units_sold')) if baseline_ids else {}
+
+    rows = np.concatenate((np.searchsorted(ids, baseline_ids), np.searchsorted(ids, observed.product_ids)))
+    values = np.concatenate((
+        np.asarray([float(units_sold.get(product_id, 0)) for product_id in baseline_ids], dtype=np.float64),
+        observed.units,
+    ))
+    order = np.argsort(rows, kind='stable')
+    return ids, pad_ragged(rows.astype(np.int64)[order], values[order], ids.size)
+
+
+@timed('forecasting.forecast_products')
+def forecast_products(product_ids):
+    """
+    Forecasts demand for the given products.
+
+    Cached models are reused for products whose inputs are unchanged; the rest
+    are refitted in one batched pass and their cached state is upserted.
+
+    Returns:
+        dict: product id -> forecast value (Decimal, two decimal places).
+              Unknown ids are left out.
+    """
+    products = {
+        product_id: inputs_fingerprint(units_sold, selling_price, inputs_modified_dt)
+        for product_id, units_sold, selling_price, inputs_modified_dt in
+        Product.objects.filter(id__in=product_ids).values_list(
+            'id', 'units_sold', 'selling_price', 'inputs_modified_dt'
+        )
+    }
+    cached = ForecastModelState.objects.in_bulk(list(products))
+
+    stale = {
+        product_id for product_id, fingerprint in products.items()
+        if product_id not in cached or cached[product_id].inputs_fingerprint != fingerprint
+    }
+
+    states = [cached[product_id] for product_id in products if product_id not in stale]
+    if stale:
+        ids, series = load_demand_history(stale)
+        models = fit_holt(series)
+        now = timezone.now()
+        refitted = [
+            ForecastModelState(
+                product_id=int(product_id),
+                level=float(models.level[row]),
+                trend=float(models.trend[row]),
+                alpha=float(models.alpha[row]),
+                beta=float(models.beta[row]),
+                inputs_fingerprint=products[int(product_id)],
+                modified_dt=now,
+            )
+            for row, product_id in enumerate(ids)
+        ]
+        ForecastModelState.objects.bulk_create(
+            refitted,
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['level', 'trend', 'alpha', 'beta', 'inputs_fingerprint', 'modified_dt'],
+        )
+        states.extend(refitted)
+
+    values = forecast_values([state.level for state in states], [state.trend for state in states])
+    return {state.product_id: to_decimal(value) for state, value in zip(states, values)}
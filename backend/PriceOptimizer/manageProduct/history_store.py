@@ -0,0 +1,201 @@
+"""
+Columnar, memory-mapped store of the demand observations.
+
+DemandObservation rows are materialized per partition of
+DEMAND_HISTORY_PARTITION_SIZE consecutive product ids into one ``.npy`` file
+of packed 24 byte records (product id, day, price, units) sorted by product
+and day, under DEMAND_HISTORY_DIR. Reads memory-map the file and binary
+search the product id column, so loading the history of thousands of
+products copies only their rows and builds no ORM objects.
+
+The files are a cache local to each host; the database decides whether they
+are current. Every partition has a DemandHistoryPartition row whose version
+is replaced by each observation write, in the write's transaction. A file is
+named after the version it was built at, and a read first fetches the
+versions of the partitions it needs (one indexed query) and rebuilds the
+partitions without a file for their version. Writes on any host are therefore
+seen by the next read on every other host. The version is read before the
+rows of a rebuild, so a file never claims a version newer than its rows.
+Files are replaced atomically, so concurrent readers and builders in other
+processes always see a complete file.
+"""
+import glob
+import os
+import tempfile
+import threading
+import uuid
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from manageProduct.models import DemandHistoryPartition, DemandObservation
+from PriceOptimizer.Metrics.metrics import timed
+
+
+# Prices are float64, which holds every DecimalField(max_digits=10, decimal_places=2)
+# value to the cent; units are stored as the integers they are.
+ROW_DTYPE = np.dtype([('product_id', '<i8'), ('day', '<i4'), ('price', '<f8'), ('units', '<i4')])
+
+EPOCH = date(1970, 1, 1)
+
+HistoryRows = namedtuple('HistoryRows', ['product_ids', 'days', 'prices', 'units'])
+
+
+class DemandHistoryStore:
+
+    def __init__(self, directory, partition_size=1000):
+        self.directory = str(directory)
+        self.partition_size = partition_size
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            directory=settings.DEMAND_HISTORY_DIR,
+            partition_size=getattr(settings, 'DEMAND_HISTORY_PARTITION_SIZE', 1000),
+        )
+
+    def _path(self, partition, version):
+        return os.path.join(self.directory, f'partition-{self.partition_size}-{partition:06d}-{version}.npy')
+
+    def partitions(self, product_ids):
+        return sorted({int(product_id) // self.partition_size for product_id in product_ids})
+
+    def versions(self, partitions):
+        """Current version of each partition; partitions never written to have version '0'."""
+        versions = dict(
+            DemandHistoryPartition.objects.filter(partition_size=self.partition_size, partition__in=list(partitions))
+            .values_list('partition', 'version')
+        )
+        return {partition: versions.get(partition, '0') for partition in partitions}
+
+    def build(self, partition, version=None):
+        """
+        Materializes one partition from the database at the given version (the
+        current one when omitted) and atomically writes its file.
+        """
+        if version is None:
+            version = self.versions([partition])[partition]
+        low = partition * self.partition_size
+        rows = list(
+            DemandObservation.objects.filter(product_id__gte=low, product_id__lt=low + self.partition_size)
+            .order_by('product_id', 'observed_on')
+            .values_list('product_id', 'observed_on', 'price', 'units')
+        )
+        records = np.empty(len(rows), dtype=ROW_DTYPE)
+        if rows:
+            product_ids, observed_on, prices, units = zip(*rows)
+            records['product_id'] = product_ids
+            records['day'] = [(day - EPOCH).days for day in observed_on]
+            records['price'] = np.asarray(prices, dtype=np.float64)
+            records['units'] = units
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(partition, version)
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                np.save(temp_file, records)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        # Files of other versions are stale; processes still mapping one keep reading it until they reopen.
+        for stale_path in glob.glob(os.path.join(self.directory, f'partition-{self.partition_size}-{partition:06d}-*.npy')):
+            if stale_path != path:
+                try:
+                    os.unlink(stale_path)
+                except FileNotFoundError:
+                    pass
+
+    def _open(self, partition, version):
+        with self._lock:
+            cached = self._maps.get(partition)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        path = self._path(partition, version)
+        try:
+            records = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            records = None
+        if records is None or records.dtype != ROW_DTYPE:
+            # Missing, or written by an older layout.
+            self.build(partition, version)
+            records = np.load(path, mmap_mode='r')
+        with self._lock:
+            self._maps[partition] = (version, records)
+        return records
+
+    @timed('history_store.rows')
+    def rows(self, product_ids):
+        """
+        Reads the observations of the given products.
+
+        Returns:
+            HistoryRows: flat arrays ordered by product id and day; days are
+                         counted from 1970-01-01.
+        """
+        ids = np.unique(np.asarray(list(product_ids), dtype=np.int64))
+        parts = []
+        for partition, version in self.versions(self.partitions(ids.tolist())).items():
+            records = self._open(partition, version)
+            if not records.size:
+                continue
+            wanted = ids[(ids // self.partition_size) == partition]
+            column = records['product_id']
+            starts = np.searchsorted(column, wanted, side='left')
+            ends = np.searchsorted(column, wanted, side='right')
+            lengths = ends - starts
+            if not lengths.sum():
+                continue
+            # Concatenated ranges [start, end) of every wanted product.
+            index = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths) + np.arange(lengths.sum())
+            parts.append(np.asarray(records[index]))
+
+        selected = np.concatenate(parts) if parts else np.empty(0, dtype=ROW_DTYPE)
+        return HistoryRows(
+            product_ids=selected['product_id'].astype(np.int64),
+            days=selected['day'].astype(np.int64),
+            prices=selected['price'].astype(np.float64),
+            units=selected['units'].astype(np.float64),
+        )
+
+    def invalidate(self, product_ids):
+        """
+        Gives the partitions of the given products a new version. Call it in the
+        transaction writing the observations, so the new version and the rows
+        become visible together.
+        """
+        partitions = self.partitions(product_ids)
+        if not partitions:
+            return
+        DemandHistoryPartition.objects.bulk_create(
+            [DemandHistoryPartition(partition_size=self.partition_size, partition=partition) for partition in partitions],
+            ignore_conflicts=True,
+        )
+        DemandHistoryPartition.objects.filter(partition_size=self.partition_size, partition__in=partitions).update(
+            version=uuid.uuid4().hex, modified_dt=timezone.now()
+        )
+
+    def rebuild_all(self, progress=None):
+        """Rebuilds the file of every partition that has products; returns the number built."""
+        from manageProduct.models import Product
+
+        last_id = Product.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        partitions = range(last_id // self.partition_size + 1)
+        for done, partition in enumerate(partitions, start=1):
+            self.build(partition)
+            if progress:
+                progress(done, len(partitions))
+        return len(partitions)
+
+
+@lru_cache(maxsize=None)
+def get_demand_history_store():
+    """Process-wide DemandHistoryStore configured from settings."""
+    return DemandHistoryStore.from_settings()
@@ -0,0 +1,149 @@
+"""
+Bulk product import.
+
+Rows are streamed from a CSV or Parquet file and processed in batches: each
+batch is validated with ProductImportSerializer(many=True), its category names
+are resolved through the category cache (plus one bulk_create for unknown names), optimized
+prices are computed in one vectorized pass, and the products are written with a
+single bulk_create inside a transaction. Invalid rows are skipped and reported
+with their row number.
+"""
+import csv
+import io
+import random
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+
+from manageProduct import analytics, optimizer
+from manageProduct.category_cache import get_category_cache
+from manageProduct.list_cache import invalidate_product_lists
+from manageProduct.models import Product
+from manageProduct.serializer import ProductImportSerializer
+
+
+FILE_FORMATS = ('csv', 'parquet')
+
+ImportReport = namedtuple('ImportReport', ['created', 'errors'])
+
+
+def _default_batch_size():
+    return int(getattr(settings, 'PRODUCT_IMPORT_BATCH_SIZE', 5000))
+
+
+def read_csv(fileobj):
+    """
+    Yields rows of a CSV file (text or binary file object) as dicts keyed by the
+    header. Empty cells are left out so optional columns fall back to their defaults.
+    """
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    for row in csv.DictReader(fileobj):
+        yield {key: value for key, value in row.items() if value not in ('', None)}
+
+
+def read_parquet(source, batch_size=None):
+    """
+    Yields rows of a Parquet file as dicts, one record batch at a time.
+
+    Requires the optional pyarrow package.
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet import requires the 'pyarrow' package")
+    parquet_file = pq.ParquetFile(source)
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size or _default_batch_size()):
+        yield from record_batch.to_pylist()
+
+
+def read_rows(source, file_format):
+    if file_format == 'csv':
+        return read_csv(source)
+    if file_format == 'parquet':
+        return read_parquet(source)
+    raise ValueError(f"Unsupported file format '{file_format}', expected one of: {', '.join(FILE_FORMATS)}")
+
+
+def import_batch(rows, user_id, first_row_number):
+    """
+    Validates and inserts one batch of rows.
+
+    Returns:
+        tuple: (number of products created, list of per-row errors)
+    """
+    serializer = ProductImportSerializer(data=rows, many=True)
+    errors = []
+    if serializer.is_valid():
+        valid = serializer.validated_data
+    else:
+        # ListSerializer drops the validated rows when any row fails, so the
+        # clean rows are validated again on their own.
+        errors = [
+            {'row': first_row_number + index, 'errors': row_errors}
+            for index, row_errors in enumerate(serializer.errors) if row_errors
+        ]
+        clean_rows = [row for row, row_errors in zip(rows, serializer.errors) if not row_errors]
+        serializer = ProductImportSerializer(data=clean_rows, many=True)
+        valid = serializer.validated_data if serializer.is_valid() else []
+
+    if not valid:
+        return 0, errors
+
+    prices = optimizer.optimize_new_prices(
+        [item['cost_price'] for item in valid],
+        [item['selling_price'] for item in valid],
+        [item['units_sold'] for item in valid],
+    )
+    with transaction.atomic():
+        category_ids = get_category_cache().resolve(item['category_name'] for item in valid)
+        created = Product.objects.bulk_create([
+            Product(
+                auth0_user_id=user_id,
+                name=item['name'],
+                description=item['description'],
+                cost_price=item['cost_price'],
+                selling_price=item['selling_price'],
+                stock_available=item['stock_available'],
+                units_sold=item['units_sold'],
+                customer_rating=item.get('customer_rating', random.randint(1, 5)),
+                optimized_price=optimizer.to_decimal(price),
+                category_id=category_ids[item['category_name']],
+            )
+            for item, price in zip(valid, prices)
+        ])
+        analytics.add_products([product.id for product in created])
+        invalidate_product_lists(user_id)
+    return len(valid), errors
+
+
+def import_products(rows, user_id, batch_size=None, progress=None):
+    """
+    Imports an iterable of row dicts for the given auth0_user_id.
+
+    Args:
+        rows: iterable of dicts with the ProductImportSerializer fields.
+        user_id: auth0_user_id the products are created for.
+        batch_size: rows validated and inserted per transaction.
+        progress: optional callable invoked as ``progress(rows_read, created)`` after each batch.
+
+    Returns:
+        ImportReport: number of products created and the per-row errors.
+    """
+    batch_size = batch_size or _default_batch_size()
+    rows = iter(rows)
+    created = 0
+    errors = []
+    rows_read = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return ImportReport(created, errors)
+        batch_created, batch_errors = import_batch(batch, user_id, rows_read + 1)
+        created += batch_created
+        errors.extend(batch_errors)
+        rows_read += len(batch)
+        if progress:
+            progress(rows_read, created)
@@ -0,0 +1,171 @@
+"""
+Database-backed background jobs.
+
+Forecast and reprice requests can be queued as Job rows instead of running
+inside the HTTP request. The run_job_worker management command claims queued
+jobs one at a time, splits the selected products into id chunks and runs the
+chunks on a process pool, recording progress after every finished chunk.
+
+Claiming is a conditional UPDATE on (id, status, modified_dt), so several
+workers can poll the same table without a broker or row locks. A running job
+whose modified_dt has not moved for JOB_STALE_AFTER seconds (its worker died)
+is claimed again.
+"""
+import multiprocessing
+import os
+import socket
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from manageProduct import analytics, change_tracking, forecasting, repricing
+from manageProduct.list_cache import invalidate_product_lists
+from manageProduct.models import Job, Product
+from manageProduct.serializer import DemandForecastSerializer
+
+
+JobKind = namedtuple('JobKind', ['run_chunk', 'result_key'])
+
+
+def forecast_chunk(product_ids):
+    """Creates a new demand forecast version for one chunk of products."""
+    products = Product.objects.in_bulk(product_ids)
+    if not products:
+        return 0
+    forecasts = forecasting.forecast_products(list(products))
+    serializer = DemandForecastSerializer(
+        data=[{'product': product_id, 'forecast_value': forecasts[product_id]} for product_id in products],
+        many=True,
+        context={'products': products},
+    )
+    serializer.is_valid(raise_exception=True)
+    with analytics.track_changes(list(products)):
+        serializer.save()
+    invalidate_product_lists(*{product.auth0_user_id for product in products.values()})
+    return len(products)
+
+
+JOB_KINDS = {
+    'forecast': JobKind(run_chunk=forecast_chunk, result_key='forecasts_created'),
+    'reprice': JobKind(run_chunk=repricing.reprice_chunk, result_key='repriced'),
+}
+
+
+def enqueue(kind, params, user_id):
+    """
+    Queues a job.
+
+    Args:
+        kind: one of JOB_KINDS.
+        params: product selection; 'product_id_list' and/or 'user_id' / 'category',
+                and 'changed_only' to only process products changed since the last
+                successful catalog-wide run of the kind.
+        user_id: auth0_user_id of the requester, who can read the job status.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'")
+    return Job.objects.create(kind=kind, params=params, auth0_user_id=user_id)
+
+
+SELECTION_PARAMS = ('user_id', 'category', 'product_id_list', 'changed_since')
+
+
+def select_products(params):
+    """Returns the queryset of products a job runs over."""
+    return repricing.filter_products(**{key: params.get(key) for key in SELECTION_PARAMS})
+
+
+def claim_next(worker):
+    """
+    Claims the oldest queued job, or a running job whose worker stopped
+    reporting progress. Returns the claimed Job or None.
+    """
+    stale_before = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER)
+    candidates = Job.objects.filter(
+        Q(status=Job.QUEUED) | Q(status=Job.RUNNING, modified_dt__lt=stale_before)
+    ).order_by('created_dt', 'id').values_list('id', 'status', 'modified_dt')
+
+    for job_id, status, modified_dt in candidates[:10]:
+        now = timezone.now()
+        claimed = Job.objects.filter(id=job_id, status=status, modified_dt=modified_dt).update(
+            status=Job.RUNNING, worker=worker, started_dt=now, modified_dt=now,
+            progress_done=0, progress_total=0, result=None, error='',
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def _init_worker_process():
+    # Under the 'spawn' start method the child starts without Django configured.
+    import django
+    django.setup()
+
+
+def create_pool(processes):
+    """
+    Starts the process pool. Database connections are closed first so forked
+    children never share the parent's connection sockets; each child opens
+    its own connection on first use.
+    """
+    connections.close_all()
+    pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker_process)
+    # Start the children now, while the parent holds no connection.
+    pool.submit(os.getpid).result()
+    return pool
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def default_processes():
+    return settings.JOB_WORKER_PROCESSES or multiprocessing.cpu_count()
+
+
+def run_job(job, pool, chunk_size=None):
+    """
+    Runs a claimed job to completion on the pool and stores its outcome.
+
+    Returns:
+        Job: the job, refreshed from the database.
+    """
+    chunk_size = chunk_size or settings.JOB_CHUNK_SIZE
+    jobs = Job.objects.filter(id=job.id, worker=job.worker)
+    futures = {}
+    try:
+        kind = JOB_KINDS[job.kind]
+        params = job.params
+        with change_tracking.tracked_run(job.kind, record=change_tracking.is_catalog_wide(params)) as since:
+            if params.get('changed_only'):
+                params = change_tracking.changed_params(params, since)
+            chunks = list(repricing.iter_id_chunks(select_products(params), chunk_size))
+            jobs.update(progress_total=sum(len(ids) for ids in chunks), modified_dt=timezone.now())
+
+            futures = {pool.submit(kind.run_chunk, ids): len(ids) for ids in chunks}
+            done = 0
+            processed = 0
+            for future in as_completed(futures):
+                processed += future.result()
+                done += futures[future]
+                # Also serves as the heartbeat that keeps the job from being reclaimed.
+                jobs.update(progress_done=done, modified_dt=timezone.now())
+
+        now = timezone.now()
+        jobs.update(
+            status=Job.SUCCEEDED, result={kind.result_key: processed}, finished_dt=now, modified_dt=now
+        )
+    except Exception as e:
+        for future in futures:
+            future.cancel()
+        now = timezone.now()
+        jobs.update(status=Job.FAILED, error=str(e) or e.__class__.__name__, finished_dt=now, modified_dt=now)
+        raise
+    finally:
+        job.refresh_from_db()
+    return job
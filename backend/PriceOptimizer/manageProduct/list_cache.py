@@ -0,0 +1,115 @@
+"""
+Per-user response cache of the product list.
+
+Every user (``auth0_user_id``) has a catalog version in the Django cache. A
+rendered product list is stored under the user, the version and the query
+string, and its ETag is derived from the same values, so an unchanged list is
+served from the cache, or as a 304 to a client that already holds it, without
+touching the database.
+
+Writes never update cached bodies: they bump the user's version once the
+transaction commits, which orphans every cached list of that user. Orphaned
+entries expire after PRODUCT_LIST_CACHE_TTL.
+
+PRODUCT_LIST_CACHE_BACKEND names the CACHES alias. Product writes also
+happen in job workers, management commands and other server processes, so
+the versions must live in a cache all of them share: the cache is disabled
+when no alias is configured or the alias is process-local (local memory or
+dummy), as a version bumped in one process would never reach the others.
+"""
+import hashlib
+import logging
+import uuid
+from collections import namedtuple
+from functools import lru_cache
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+
+CachedList = namedtuple('CachedList', ['key', 'etag'])
+
+
+class ProductListCache:
+
+    VERSION_KEY = 'product-list-version:{user_id}'
+    LIST_KEY = 'product-list:{user_id}:{digest}'
+
+    def __init__(self, ttl=300, backend='default'):
+        self.ttl = ttl
+        self.backend = caches[backend]
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            ttl=getattr(settings, 'PRODUCT_LIST_CACHE_TTL', 300),
+            backend=settings.PRODUCT_LIST_CACHE_BACKEND,
+        )
+
+    def _version_key(self, user_id):
+        return self.VERSION_KEY.format(user_id=user_id)
+
+    async def _aversion(self, user_id):
+        key = self._version_key(user_id)
+        version = await self.backend.aget(key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not await self.backend.aadd(key, version, timeout=None):
+                # Another request created the version first; use theirs if it is still there.
+                version = await self.backend.aget(key) or version
+        return version
+
+    async def alookup(self, user_id, query):
+        """
+        Returns the CachedList (cache key and ETag) of a user's list for the
+        given query parameters at the user's current catalog version.
+        """
+        version = await self._aversion(user_id)
+        query_string = urlencode(sorted(query.lists()), doseq=True)
+        digest = hashlib.md5(f"{version}?{query_string}".encode()).hexdigest()
+        return CachedList(key=self.LIST_KEY.format(user_id=user_id, digest=digest), etag=f'"{digest}"')
+
+    async def aget(self, cached):
+        """Returns the cached response body, or None."""
+        return await self.backend.aget(cached.key)
+
+    async def aset(self, cached, body):
+        await self.backend.aset(cached.key, body, timeout=self.ttl)
+
+    def invalidate(self, *user_ids):
+        """
+        Bumps the catalog version of the given users once the current
+        transaction commits (immediately outside of a transaction).
+        """
+        user_ids = {str(user_id) for user_id in user_ids if user_id}
+        if not user_ids:
+            return
+        transaction.on_commit(lambda: self.backend.set_many(
+            {self._version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, timeout=None
+        ))
+
+
+@lru_cache(maxsize=None)
+def get_product_list_cache():
+    """
+    Process-wide ProductListCache configured from settings. None when caching is
+    disabled or the configured alias is not shared between processes.
+    """
+    backend = getattr(settings, 'PRODUCT_LIST_CACHE_BACKEND', None)
+    if not backend:
+        return None
+    if isinstance(caches[backend], (LocMemCache, DummyCache)):
+        logging.warning(f"Product list cache disabled: cache '{backend}' is not shared between processes")
+        return None
+    return ProductListCache.from_settings()
+
+
+def invalidate_product_lists(*user_ids):
+    """Invalidates the cached product lists of the given users, if caching is enabled."""
+    list_cache = get_product_list_cache()
+    if list_cache is not None:
+        list_cache.invalidate(*user_ids)
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.test import AsyncClient, Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from manageProduct.list_cache import get_product_list_cache
+from manageProduct.models import Category, Product
+from userAuth.models import Roles, TokenUsers, UserRoles, Users
+
+
+class Command(BaseCommand):
+    help = (
+        "Load benchmark of GET /pot/api/products/ through the WSGI and the ASGI request "
+        "handlers, with the same number of concurrent in-flight requests on each. Runs against "
+        "a throwaway test database with the product list cache disabled, so every request "
+        "goes through the view and the database."
+    )
+
+    path = '/pot/api/products/'
+    token = 'bench-product-list-token'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500, help="Products seeded for the benchmark user")
+        parser.add_argument('--requests', type=int, default=500, help="Requests sent per handler")
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent in-flight requests")
+        parser.add_argument('--page-size', type=int, default=100, help="page_size query parameter")
+
+    def handle(self, *args, **options):
+        if options['requests'] <= 0 or options['concurrency'] <= 0:
+            raise CommandError("--requests and --concurrency must be positive")
+
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            # The list cache would turn the comparison into one of cache hits.
+            with override_settings(PRODUCT_LIST_CACHE_BACKEND=''):
+                get_product_list_cache.cache_clear()
+                self.benchmark(options)
+        finally:
+            get_product_list_cache.cache_clear()
+            runner.teardown_databases(old_config)
+
+    def benchmark(self, options):
+        user = self.seed(options['products'])
+        query = {'page_size': options['page_size']}
+        headers = {'Authorization': f'Bearer {self.token}', 'user_id': str(user.user_id), 'User-ID': str(user.user_id)}
+
+        # The in-process test clients always send Host: testserver.
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            wsgi_seconds = self.run_wsgi(options['requests'], options['concurrency'], query, headers)
+            asgi_seconds = asyncio.run(self.run_asgi(options['requests'], options['concurrency'], query, headers))
+
+        for label, seconds in (('WSGI', wsgi_seconds), ('ASGI', asgi_seconds)):
+            self.stdout.write(
+                f"{label}: {options['requests']} requests in {seconds:.2f}s "
+                f"({options['requests'] / seconds:.1f} req/s, concurrency {options['concurrency']})"
+            )
+        self.stdout.write(self.style.SUCCESS(f"ASGI/WSGI throughput ratio: {wsgi_seconds / asgi_seconds:.2f}"))
+
+    def seed(self, product_count):
+        now = timezone.now()
+        user = Users.objects.create(
+            username='bench-user', password='', name='bench', email='bench@example.com', created=now
+        )
+        role = Roles.objects.create(name='Admin', description='benchmark')
+        UserRoles.objects.create(user=user, role=role)
+        TokenUsers.objects.create(user=user, token=self.token, created=now, expires_at=now + timedelta(hours=1))
+
+        category, _ = Category.objects.get_or_create(name='bench-category')
+        Product.objects.bulk_create([
+            Product(
+                auth0_user_id=str(user.user_id), name=f'bench-product-{i}', description='benchmark',
+                cost_price=10, selling_price=20, stock_available=100, units_sold=i, customer_rating=4,
+                optimized_price=15, category=category,
+            )
+            for i in range(product_count)
+        ], batch_size=1000)
+        return user
+
+    def run_wsgi(self, requests, concurrency, query, headers):
+        def worker(count):
+            client = Client()
+            for _ in range(count):
+                response = client.get(self.path, query, headers=headers)
+                if response.status_code != 200:
+                    raise CommandError(f"WSGI request failed with status {response.status_code}")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, self.split(requests, concurrency)))
+        return time.perf_counter() - start
+
+    async def run_asgi(self, requests, concurrency, query, headers):
+        client = AsyncClient()
+
+        async def worker(count):
+            for _ in range(count):
+                response = await client.get(self.path, query, headers=headers)
+                if response.status_code != 200:
+                    raise CommandError(f"ASGI request failed with status {response.status_code}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(count) for count in self.split(requests, concurrency)))
+        return time.perf_counter() - start
+
+    def split(self, requests, concurrency):
+        """Spreads the requests over the concurrent workers."""
+        share, extra = divmod(requests, concurrency)
+        return [share + (1 if i < extra else 0) for i in range(concurrency)]
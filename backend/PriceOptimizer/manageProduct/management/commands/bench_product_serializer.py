@@ -0,0 +1,67 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import JsonResponse
+
+from manageProduct.fast_serializer import ProductRowSerializer
+from manageProduct.models import Category, Product
+from manageProduct.serializer import ProductSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the product list serialization: ProductSerializer + JsonResponse against "
+        "ProductRowSerializer over .values_list() rows, and checks that both render the same bytes. "
+        "Runs on unsaved in-memory rows, so no database is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help="Row counts to benchmark"
+        )
+        parser.add_argument('--fields', default=None, help="Comma-separated field subset, like ?fields=")
+
+    def handle(self, *args, **options):
+        fields = [field.strip() for field in options['fields'].split(',')] if options['fields'] else None
+        fast = ProductRowSerializer(fields=fields)
+
+        for size in options['sizes']:
+            products = self.build_products(size)
+            rows = [self.values_row(product, fast.columns) for product in products]
+
+            start = time.perf_counter()
+            expected = JsonResponse(ProductSerializer(products, many=True, fields=fields).data, safe=False).content
+            drf_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            rendered = fast.render(rows)
+            fast_seconds = time.perf_counter() - start
+
+            if rendered != expected:
+                raise CommandError(f"Fast serializer output differs from ProductSerializer at {size} rows")
+            self.stdout.write(
+                f"{size} rows: ProductSerializer {drf_seconds * 1000:.1f} ms, "
+                f"ProductRowSerializer {fast_seconds * 1000:.1f} ms ({drf_seconds / fast_seconds:.1f}x)"
+            )
+        self.stdout.write(self.style.SUCCESS("Outputs are byte-identical"))
+
+    def build_products(self, size):
+        categories = [Category(id=i + 1, name=f'category-{i}') for i in range(10)]
+        return [
+            Product(
+                id=i + 1, name=f'product "{i}"', description='Bench product – ünïcode', auth0_user_id='bench',
+                cost_price=Decimal('10.5'), selling_price=Decimal('20.00'), stock_available=i % 500,
+                units_sold=i, customer_rating=i % 5 + 1, optimized_price=Decimal('15.25'),
+                category=categories[i % 10] if i % 7 else None,
+            )
+            for i in range(size)
+        ]
+
+    def values_row(self, product, columns):
+        """Builds the tuple .values_list(*columns) would return for the product."""
+        return tuple(
+            (product.category.name if product.category else None) if column == 'category__name'
+            else getattr(product, column)
+            for column in columns
+        )
@@ -0,0 +1,27 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from manageProduct.history_store import get_demand_history_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds every partition file of the memory-mapped demand history store from the "
+        "DemandObservation table. Stale partitions are otherwise rebuilt lazily on first read."
+    )
+
+    def handle(self, *args, **options):
+        store = get_demand_history_store()
+
+        def report(done, total):
+            self.stdout.write(f"Built {done}/{total} partitions")
+
+        built = store.rebuild_all(progress=report)
+        size = sum(
+            os.path.getsize(os.path.join(store.directory, name))
+            for name in os.listdir(store.directory) if name.endswith('.npy')
+        ) if os.path.isdir(store.directory) else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {built} partitions in {store.directory} ({size / 1024 / 1024:.1f} MiB)"
+        ))
@@ -0,0 +1,90 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from manageProduct.models import DemandForecast, Product
+from PriceOptimizer.Middleware.custom_authentication_middleware import active_token_lookup
+from userAuth.models import TokenUsers
+
+
+class Command(BaseCommand):
+    help = (
+        "Explains the hot Product/DemandForecast/TokenUsers queries against the local database, "
+        "asserts that each one is served by its purpose-built index and reports its latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='benchmark-user', help="auth0_user_id used in the product queries")
+        parser.add_argument('--repeat', type=int, default=100, help="Executions per query for the latency figure")
+        parser.add_argument('--verbose-plans', action='store_true', help="Print the full query plans")
+
+    def hot_queries(self, user_id):
+        """(label, queryset, table, indexed columns) of every query the indexes were added for."""
+        return [
+            (
+                'product list',
+                Product.objects.filter(auth0_user_id=user_id).order_by('-modified_dt', 'id'),
+                Product._meta.db_table,
+                ['auth0_user_id', 'modified_dt', 'id'],
+            ),
+            (
+                'product list by category',
+                Product.objects.filter(auth0_user_id=user_id, category_id=1).order_by('-modified_dt', 'id'),
+                Product._meta.db_table,
+                ['auth0_user_id', 'category_id', 'modified_dt', 'id'],
+            ),
+            (
+                # The exact query the authentication middleware runs, role subquery included.
+                'token validation',
+                active_token_lookup('benchmark-token', 1),
+                TokenUsers._meta.db_table,
+                ['token', 'user_id'],
+            ),
+            (
+                'latest forecast version',
+                DemandForecast.objects.filter(product_id=1).order_by('-version')[:1],
+                DemandForecast._meta.db_table,
+                ['product_id', 'version'],
+            ),
+        ]
+
+    def index_names(self, cursor, table, columns):
+        constraints = connection.introspection.get_constraints(cursor, table)
+        return [
+            name for name, constraint in constraints.items()
+            if constraint['index'] or constraint['unique']
+            if constraint['columns'] == columns
+        ]
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Small local tables are cheaper to scan sequentially; disable that so the
+                # plan shows whether a usable index exists at all.
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset, table, columns in self.hot_queries(options['user']):
+                names = self.index_names(cursor, table, columns)
+                plan = queryset.explain()
+
+                start = time.perf_counter()
+                for _ in range(options['repeat']):
+                    list(queryset)
+                elapsed_ms = (time.perf_counter() - start) * 1000 / max(options['repeat'], 1)
+
+                used = [name for name in names if name in plan]
+                if used:
+                    self.stdout.write(f"OK   {label}: {used[0]} ({elapsed_ms:.3f} ms/query)")
+                else:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(
+                        f"FAIL {label}: expected one of {names or ['<missing index on ' + ', '.join(columns) + '>']}"
+                    ))
+                if options['verbose_plans'] or not used:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f"Queries not served by an index: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All hot queries use their indexes"))
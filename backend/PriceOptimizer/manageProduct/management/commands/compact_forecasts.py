@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from manageProduct import retention
+from manageProduct.models import DemandForecast, DemandForecastSummary
+
+
+class Command(BaseCommand):
+    help = (
+        "Applies the demand forecast retention policy: versions beyond the newest N per product "
+        "and older than X days are rolled up into DemandForecastSummary and deleted, in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-versions', type=int, default=None, help="Newest versions kept per product (default: FORECAST_RETENTION_VERSIONS)")
+        parser.add_argument('--keep-days', type=int, default=None, help="Versions younger than this are always kept (default: FORECAST_RETENTION_DAYS)")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Products per transaction (default: FORECAST_COMPACTION_CHUNK_SIZE)")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted")
+        parser.add_argument('--vacuum', action='store_true', help="Run VACUUM (ANALYZE) on the forecast table afterwards (PostgreSQL)")
+
+    def handle(self, *args, **options):
+        for option in ('keep_versions', 'chunk_size'):
+            if options[option] is not None and options[option] <= 0:
+                raise CommandError(f"--{option.replace('_', '-')} must be a positive integer")
+        if options['keep_days'] is not None and options['keep_days'] < 0:
+            raise CommandError("--keep-days must not be negative")
+
+        before = retention.table_size(DemandForecast)
+        self.stdout.write(f"Before: {self.describe(before)}")
+
+        def report(products, deleted):
+            self.stdout.write(f"Compacted {products} products, {deleted} versions {'prunable' if options['dry_run'] else 'deleted'}")
+
+        result = retention.compact_forecasts(
+            keep_versions=options['keep_versions'],
+            keep_days=options['keep_days'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+            progress=report,
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {result.deleted} of {before.rows} versions would be deleted"))
+            return
+
+        if options['vacuum']:
+            retention.vacuum(DemandForecast)
+        after = retention.table_size(DemandForecast)
+        self.stdout.write(f"After: {self.describe(after)}")
+        self.stdout.write(f"Summaries: {self.describe(retention.table_size(DemandForecastSummary))}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {result.deleted} versions ({result.deleted / max(before.rows, 1):.1%} of the table) "
+            f"and updated {result.summaries} summaries"
+        ))
+
+    def describe(self, size):
+        if size.bytes is None:
+            return f"{size.rows} rows"
+        return f"{size.rows} rows, {size.bytes / 1024 / 1024:.1f} MiB"
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from manageProduct import importer
+
+
+class Command(BaseCommand):
+    help = "Bulk imports products from a CSV or Parquet file for one user."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or Parquet file to import")
+        parser.add_argument('--user', required=True, help="auth0_user_id the products are created for")
+        parser.add_argument('--format', choices=importer.FILE_FORMATS, help="File format, defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=None, help="Rows per validation/insert batch")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"File not found: {path}")
+
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in importer.FILE_FORMATS:
+            raise CommandError(f"Unsupported file format '{file_format}', use --format")
+
+        def report(rows_read, created):
+            self.stdout.write(f"Read {rows_read} rows, created {created} products")
+
+        with path.open('rb') as source:
+            try:
+                result = importer.import_products(
+                    importer.read_rows(source, file_format), options['user'],
+                    batch_size=options['batch_size'], progress=report,
+                )
+            except ImportError as e:
+                raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully imported {result.created} products, {len(result.errors)} rows rejected"
+        ))
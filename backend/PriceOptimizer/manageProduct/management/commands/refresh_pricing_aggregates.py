@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from manageProduct import analytics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-user, per-category pricing analytics aggregates from the products. "
+        "They are kept up to date by the write paths; use this after changes made outside them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='users', help="Only rebuild this auth0_user_id (repeatable)")
+
+    def handle(self, *args, **options):
+        refreshed = analytics.refresh_users(options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} pricing aggregates"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from manageProduct import repricing
+
+
+class Command(BaseCommand):
+    help = "Recomputes optimized_price for all products, or a subset by user/category, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only reprice products of this auth0_user_id")
+        parser.add_argument('--category', help="Only reprice products in this category name")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Products per bulk_update chunk")
+        parser.add_argument(
+            '--changed-only', action='store_true',
+            help="Only reprice products changed or re-forecast since the last successful catalog-wide reprice",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size is not None and chunk_size <= 0:
+            raise CommandError("--chunk-size must be a positive integer")
+
+        def report(done, total):
+            self.stdout.write(f"Repriced {done}/{total} products")
+
+        updated = repricing.reprice_catalog(
+            user_id=options['user'],
+            category=options['category'],
+            changed_only=options['changed_only'],
+            chunk_size=chunk_size,
+            progress=report,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Successfully repriced {updated} products"))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from manageProduct import forecast_runner
+
+
+class Command(BaseCommand):
+    help = (
+        "Forecasts all products, or a subset by user/category, in parallel: the products are "
+        "partitioned by id range or by category and each partition runs in its own process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only forecast products of this auth0_user_id")
+        parser.add_argument('--category', help="Only forecast products in this category name")
+        parser.add_argument('--partition-by', choices=forecast_runner.PARTITION_MODES, default='id')
+        parser.add_argument('--partition-size', type=int, default=None, help="Products per partition (default: FORECAST_PARTITION_SIZE)")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Products per batched fit and insert (default: JOB_CHUNK_SIZE)")
+        parser.add_argument('--processes', type=int, default=None, help="Pool processes (default: JOB_WORKER_PROCESSES or CPU count)")
+        parser.add_argument('--seed', type=int, default=None, help="Run seed (default: FORECAST_RUN_SEED)")
+        parser.add_argument(
+            '--changed-only', action='store_true',
+            help="Only forecast products whose pricing inputs changed since the last successful catalog-wide run",
+        )
+
+    def handle(self, *args, **options):
+        for option in ('partition_size', 'chunk_size', 'processes'):
+            if options[option] is not None and options[option] <= 0:
+                raise CommandError(f"--{option.replace('_', '-')} must be a positive integer")
+
+        def report(done, total):
+            self.stdout.write(f"Forecast {done}/{total} products")
+
+        report = forecast_runner.run_forecasts(
+            params={'user_id': options['user'], 'category': options['category']},
+            partition_by=options['partition_by'],
+            partition_size=options['partition_size'],
+            processes=options['processes'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size'],
+            changed_only=options['changed_only'],
+            progress=report,
+        )
+        rate = report.products / report.seconds if report.seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report.forecasts_created} forecasts over {report.partitions} partitions "
+            f"in {report.seconds:.2f}s ({rate:.0f} products/s)"
+        ))
@@ -0,0 +1,56 @@
+import logging
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from manageProduct import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued forecasting and repricing jobs. Each job is split into product id chunks "
+        "that are executed on a local process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None, help="Pool processes (default: JOB_WORKER_PROCESSES or CPU count)")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Products per chunk (default: JOB_CHUNK_SIZE)")
+        parser.add_argument('--poll-interval', type=float, default=None, help="Seconds between polls of an empty queue")
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty")
+
+    def handle(self, *args, **options):
+        processes = options['processes'] or jobs.default_processes()
+        chunk_size = options['chunk_size']
+        if processes <= 0 or (chunk_size is not None and chunk_size <= 0):
+            raise CommandError("--processes and --chunk-size must be positive integers")
+        poll_interval = options['poll_interval'] or settings.JOB_POLL_INTERVAL
+
+        worker = jobs.worker_name()
+        pool = jobs.create_pool(processes)
+        self.stdout.write(f"Job worker {worker} started with {processes} processes")
+        try:
+            while True:
+                job = jobs.claim_next(worker)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                self.stdout.write(f"Running {job}")
+                try:
+                    job = jobs.run_job(job, pool, chunk_size=chunk_size)
+                    self.stdout.write(self.style.SUCCESS(f"Finished {job}: {job.result}"))
+                except BrokenProcessPool as e:
+                    logging.error(f"Job {job.id} failed, restarting the process pool: {e}")
+                    pool.shutdown(cancel_futures=True)
+                    pool = jobs.create_pool(processes)
+                except Exception as e:
+                    logging.error(f"Job {job.id} failed: {e}")
+                    self.stdout.write(self.style.ERROR(f"Job {job.id} failed: {e}"))
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping job worker")
+        finally:
+            pool.shutdown(cancel_futures=True)
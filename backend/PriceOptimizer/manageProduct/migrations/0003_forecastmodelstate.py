@@ -0,0 +1,31 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0002_alter_product_auth0_user_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastModelState',
+            fields=[
+                ('created_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('modified_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast_state', serialize=False, to='manageProduct.product')),
+                ('level', models.FloatField()),
+                ('trend', models.FloatField()),
+                ('alpha', models.FloatField()),
+                ('beta', models.FloatField()),
+                ('inputs_fingerprint', models.CharField(max_length=64)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0003_forecastmodelstate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['auth0_user_id', '-modified_dt', 'id'], name='product_user_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['auth0_user_id', 'category', '-modified_dt', 'id'], name='product_user_category_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0004_product_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='demandforecast',
+            name='curve_demand',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='demandforecast',
+            name='curve_max_price',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='demandforecast',
+            name='curve_min_price',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:51
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0005_demandforecast_curve'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('modified_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('kind', models.CharField(max_length=32)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('params', models.JSONField(default=dict)),
+                ('auth0_user_id', models.CharField(max_length=255)),
+                ('progress_done', models.IntegerField(default=0)),
+                ('progress_total', models.IntegerField(default=0)),
+                ('result', models.JSONField(null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('worker', models.CharField(blank=True, default='', max_length=255)),
+                ('started_dt', models.DateTimeField(null=True)),
+                ('finished_dt', models.DateTimeField(null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_dt'], name='job_status_created_idx')],
+            },
+        ),
+    ]
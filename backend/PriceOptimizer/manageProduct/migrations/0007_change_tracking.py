@@ -0,0 +1,39 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:53
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0006_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessingRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('modified_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('kind', models.CharField(max_length=32)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='running', max_length=16)),
+                ('started_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_dt', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='inputs_modified_dt',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['inputs_modified_dt'], name='product_inputs_modified_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingrun',
+            index=models.Index(fields=['kind', 'status', '-started_dt'], name='run_kind_status_started_idx'),
+        ),
+    ]
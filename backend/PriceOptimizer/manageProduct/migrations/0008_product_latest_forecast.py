@@ -0,0 +1,28 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:55
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def backfill_latest_forecast(apps, schema_editor):
+    Product = apps.get_model('manageProduct', 'Product')
+    DemandForecast = apps.get_model('manageProduct', 'DemandForecast')
+    latest = DemandForecast.objects.filter(product_id=OuterRef('pk')).order_by('-version').values('pk')[:1]
+    Product.objects.update(latest_forecast=Subquery(latest))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0007_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='latest_forecast',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='manageProduct.demandforecast'),
+        ),
+        migrations.RunPython(backfill_latest_forecast, migrations.RunPython.noop),
+    ]
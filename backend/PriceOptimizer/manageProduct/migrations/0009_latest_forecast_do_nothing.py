@@ -0,0 +1,19 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0008_product_latest_forecast'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='latest_forecast',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='manageProduct.demandforecast'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0009_latest_forecast_do_nothing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecastSummary',
+            fields=[
+                ('created_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('modified_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='forecast_summary', serialize=False, to='manageProduct.product')),
+                ('versions_compacted', models.IntegerField(default=0)),
+                ('first_version', models.IntegerField()),
+                ('last_version', models.IntegerField()),
+                ('first_created_dt', models.DateTimeField()),
+                ('last_created_dt', models.DateTimeField()),
+                ('min_forecast_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('max_forecast_value', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('sum_forecast_value', models.DecimalField(decimal_places=2, max_digits=18)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0010_demandforecastsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandObservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('modified_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('observed_on', models.DateField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('units', models.IntegerField()),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='manageProduct.product')),
+            ],
+            options={
+                'unique_together': {('product', 'observed_on')},
+            },
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.18 on 2026-10-18 16:02
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_pricing_aggregates(apps, schema_editor):
+    Product = apps.get_model('manageProduct', 'Product')
+    PricingAggregate = apps.get_model('manageProduct', 'PricingAggregate')
+    total = models.DecimalField(max_digits=20, decimal_places=2)
+    zero = Value(Decimal(0))
+    rows = Product.objects.order_by().values('auth0_user_id', 'category_id').annotate(
+        product_count=Count('id'),
+        units_sold_total=Coalesce(Sum('units_sold'), 0),
+        stock_total=Coalesce(Sum('stock_available'), 0),
+        revenue=Coalesce(Sum(F('selling_price') * F('units_sold'), output_field=total), zero, output_field=total),
+        margin=Coalesce(Sum((F('selling_price') - F('cost_price')) * F('units_sold'), output_field=total), zero, output_field=total),
+        stock_value=Coalesce(Sum(F('cost_price') * F('stock_available'), output_field=total), zero, output_field=total),
+        rating_sum=Coalesce(Sum('customer_rating'), zero, output_field=total),
+        forecast_count=Count('latest_forecast'),
+        forecast_units=Coalesce(Sum('latest_forecast__forecast_value', output_field=total), zero, output_field=total),
+        forecast_revenue=Coalesce(Sum(F('latest_forecast__forecast_value') * F('optimized_price'), output_field=total), zero, output_field=total),
+    )
+    PricingAggregate.objects.bulk_create([
+        PricingAggregate(
+            **{field: value for field, value in row.items() if field not in ('units_sold_total', 'stock_total')},
+            units_sold=row['units_sold_total'],
+            stock_available=row['stock_total'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0011_demandobservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('modified_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('auth0_user_id', models.CharField(max_length=255)),
+                ('product_count', models.IntegerField(default=0)),
+                ('units_sold', models.BigIntegerField(default=0)),
+                ('stock_available', models.BigIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('margin', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('stock_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('rating_sum', models.DecimalField(decimal_places=1, default=0, max_digits=14)),
+                ('forecast_count', models.IntegerField(default=0)),
+                ('forecast_units', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('forecast_revenue', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='manageProduct.category')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pricingaggregate',
+            constraint=models.UniqueConstraint(fields=('auth0_user_id', 'category'), name='pricing_aggregate_user_category_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='pricingaggregate',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('auth0_user_id',), name='pricing_aggregate_user_uncategorized_uniq'),
+        ),
+        migrations.RunPython(backfill_pricing_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.18 on 2026-10-18 16:25
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('manageProduct', '0012_pricingaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandHistoryPartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('modified_dt', models.DateTimeField(default=django.utils.timezone.now)),
+                ('partition_size', models.IntegerField()),
+                ('partition', models.IntegerField()),
+                ('version', models.CharField(max_length=32)),
+            ],
+            options={
+                'unique_together': {('partition_size', 'partition')},
+            },
+        ),
+    ]
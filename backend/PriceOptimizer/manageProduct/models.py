@@ -28,6 +28,22 @@ class Product(BaseModel):
     optimized_price = models.DecimalField(max_digits=10, decimal_places=2)
 
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)  
+    # Last change of a pricing input (cost_price, selling_price, units_sold); incremental
+    # forecast and reprice runs only process products changed since their last run.
+    inputs_modified_dt = models.DateTimeField(default=timezone.now)
+    # Highest DemandForecast version of the product, maintained when forecasts are created.
+    # DO_NOTHING keeps forecast deletes set-based (no collector pass over the products); the
+    # latest version is only ever deleted together with its product.
+    latest_forecast = models.OneToOneField(
+        'DemandForecast', on_delete=models.DO_NOTHING, null=True, blank=True, related_name='+'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['auth0_user_id', '-modified_dt', 'id'], name='product_user_modified_idx'),
+            models.Index(fields=['auth0_user_id', 'category', '-modified_dt', 'id'], name='product_user_category_idx'),
+            models.Index(fields=['inputs_modified_dt'], name='product_inputs_modified_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -37,12 +53,175 @@ class DemandForecast(BaseModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, null=True)  
     forecast_value = models.DecimalField(max_digits=10, decimal_places=2)
     version = models.IntegerField(default=1)
+    # Demand curve sampled when the forecast was generated: DEMAND_CURVE_POINTS little-endian
+    # float32 demand values at evenly spaced prices from curve_min_price to curve_max_price.
+    curve_min_price = models.FloatField(null=True)
+    curve_max_price = models.FloatField(null=True)
+    curve_demand = models.BinaryField(null=True)
 
     class Meta:
         unique_together = ('product', 'version')
 
     def __str__(self):
         return f"Product: {self.product.name if self.product else 'Deleted Product'}, Version: {self.version}"
-    
 
 
+class DemandObservation(BaseModel):
+    """
+    Observed demand of a product on one day: the price it sold at and the units sold.
+    Read in bulk through the columnar history store (history_store.py).
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    observed_on = models.DateField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    units = models.IntegerField()
+
+    class Meta:
+        unique_together = ('product', 'observed_on')
+
+    def __str__(self):
+        return f"Product {self.product_id} on {self.observed_on}: {self.units} units at {self.price}"
+
+
+class DemandHistoryPartition(BaseModel):
+    """
+    Version of one partition of the demand history store (history_store.py).
+    Every observation write replaces the version of the partitions it touches
+    in its own transaction, so every host notices that its files are stale.
+    """
+    partition_size = models.IntegerField()
+    partition = models.IntegerField()
+    version = models.CharField(max_length=32)
+
+    class Meta:
+        unique_together = ('partition_size', 'partition')
+
+    def __str__(self):
+        return f"Demand history partition {self.partition} of {self.partition_size} products, version {self.version}"
+
+
+class DemandForecastSummary(BaseModel):
+    """
+    Roll-up of the DemandForecast versions of a product removed by the
+    forecast retention policy (compact_forecasts).
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='forecast_summary')
+    versions_compacted = models.IntegerField(default=0)
+    first_version = models.IntegerField()
+    last_version = models.IntegerField()
+    first_created_dt = models.DateTimeField()
+    last_created_dt = models.DateTimeField()
+    min_forecast_value = models.DecimalField(max_digits=10, decimal_places=2)
+    max_forecast_value = models.DecimalField(max_digits=10, decimal_places=2)
+    sum_forecast_value = models.DecimalField(max_digits=18, decimal_places=2)
+
+    def __str__(self):
+        return f"Forecast summary for product {self.product_id}"
+
+
+class PricingAggregate(BaseModel):
+    """
+    Pricing totals of one user's products in one category (category NULL for
+    uncategorized products), kept up to date by the product write paths and
+    forecast runs (analytics.py) so dashboards read one row per category.
+    """
+    auth0_user_id = models.CharField(max_length=255)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True)
+    product_count = models.IntegerField(default=0)
+    units_sold = models.BigIntegerField(default=0)
+    stock_available = models.BigIntegerField(default=0)
+    # sum(selling_price * units_sold), sum((selling_price - cost_price) * units_sold)
+    revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    margin = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    # sum(cost_price * stock_available)
+    stock_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    rating_sum = models.DecimalField(max_digits=14, decimal_places=1, default=0)
+    # Over the products' latest forecasts: forecast units and forecast units * optimized_price
+    forecast_count = models.IntegerField(default=0)
+    forecast_units = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    forecast_revenue = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['auth0_user_id', 'category'], name='pricing_aggregate_user_category_uniq'),
+            models.UniqueConstraint(
+                fields=['auth0_user_id'], condition=models.Q(category__isnull=True),
+                name='pricing_aggregate_user_uncategorized_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Pricing aggregate of {self.auth0_user_id}, category {self.category_id}"
+
+
+class ForecastModelState(BaseModel):
+    """
+    Fitted demand forecasting parameters cached per product, so products whose
+    inputs did not change since the last fit are forecast without refitting.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='forecast_state')
+    level = models.FloatField()
+    trend = models.FloatField()
+    alpha = models.FloatField()
+    beta = models.FloatField()
+    inputs_fingerprint = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"Forecast state for product {self.product_id}"
+
+
+
+class Job(BaseModel):
+    """
+    A background forecasting or repricing job, queued in the database and
+    executed by the run_job_worker management command.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    kind = models.CharField(max_length=32)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+    params = models.JSONField(default=dict)
+    auth0_user_id = models.CharField(max_length=255)
+    progress_done = models.IntegerField(default=0)
+    progress_total = models.IntegerField(default=0)
+    result = models.JSONField(null=True)
+    error = models.TextField(blank=True, default='')
+    worker = models.CharField(max_length=255, blank=True, default='')
+    started_dt = models.DateTimeField(null=True)
+    finished_dt = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_dt'], name='job_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+
+class ProcessingRun(BaseModel):
+    """
+    A catalog-wide forecast or reprice run. The start of the last successful
+    run of a kind is the watermark of the next incremental run.
+    """
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(RUNNING, 'Running'), (SUCCEEDED, 'Succeeded'), (FAILED, 'Failed')]
+
+    kind = models.CharField(max_length=32)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=RUNNING)
+    started_dt = models.DateTimeField(default=timezone.now)
+    finished_dt = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'status', '-started_dt'], name='run_kind_status_started_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} run {self.id} ({self.status})"
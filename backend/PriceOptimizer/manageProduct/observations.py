@@ -0,0 +1,78 @@
+"""
+Demand observation ingestion.
+
+A batch of observations is validated with DemandObservationSerializer(many=True)
+against products fetched with one in_bulk query, and written with a single
+upsert keyed on (product, observed_on), so re-sending a day overwrites it. The
+pricing inputs of the touched products are marked changed (for incremental
+forecast and reprice runs) and their history store partitions get a new
+version in the same transaction.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from manageProduct.history_store import get_demand_history_store
+from manageProduct.models import DemandObservation, Product
+from manageProduct.serializer import DemandObservationSerializer
+
+
+def _product_ids(items):
+    ids = set()
+    for item in items:
+        try:
+            ids.add(int(item.get('product')))
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return ids
+
+
+def record_observations(items):
+    """
+    Validates and upserts a batch of observations.
+
+    Args:
+        items: list of dicts with 'product', 'observed_on', 'price' and 'units'.
+
+    Returns:
+        tuple: (number of observations recorded, list of per-item errors with their index)
+    """
+    context = {'products': Product.objects.in_bulk(list(_product_ids(items)))}
+    serializer = DemandObservationSerializer(data=items, many=True, context=context)
+    errors = []
+    if serializer.is_valid():
+        valid = serializer.validated_data
+    else:
+        # ListSerializer drops the validated items when any item fails, so the
+        # clean items are validated again on their own.
+        errors = [
+            {'index': index, 'errors': item_errors}
+            for index, item_errors in enumerate(serializer.errors) if item_errors
+        ]
+        clean_items = [item for item, item_errors in zip(items, serializer.errors) if not item_errors]
+        serializer = DemandObservationSerializer(data=clean_items, many=True, context=context)
+        valid = serializer.validated_data if serializer.is_valid() else []
+
+    if not valid:
+        return 0, errors
+
+    # One row per (product, day); the last one sent wins, as it would across requests.
+    latest = {(item['product'].id, item['observed_on']): item for item in valid}
+    now = timezone.now()
+    observations = [
+        DemandObservation(
+            product_id=product_id, observed_on=observed_on, price=item['price'], units=item['units'],
+            created_dt=now, modified_dt=now,
+        )
+        for (product_id, observed_on), item in latest.items()
+    ]
+    product_ids = sorted({product_id for product_id, _ in latest})
+    with transaction.atomic():
+        DemandObservation.objects.bulk_create(
+            observations,
+            update_conflicts=True,
+            unique_fields=['product', 'observed_on'],
+            update_fields=['price', 'units', 'modified_dt'],
+        )
+        Product.objects.filter(id__in=product_ids).update(inputs_modified_dt=now)
+        get_demand_history_store().invalidate(product_ids)
+    return len(observations), errors
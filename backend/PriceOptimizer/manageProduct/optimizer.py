@@ -0,0 +1,265 @@
+"""
+Vectorized price optimization engine.
+
+Every product is modelled with a linear demand curve
+
+    units = intercept - slope * price
+
+fitted from its (price, units) history. The profit-maximizing price of such a
+curve is ``(intercept / slope + cost) / 2``, so once the curves are fitted the
+whole catalog is repriced with a handful of NumPy array operations instead of
+one Python loop iteration (or one HTTP call) per product.
+"""
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.conf import settings
+
+from manageProduct.history_store import get_demand_history_store
+from manageProduct.models import Product
+from PriceOptimizer.Metrics.metrics import timed
+
+
+DemandCurves = namedtuple('DemandCurves', ['intercept', 'slope'])
+
+PricingInputs = namedtuple('PricingInputs', [
+    'product_ids', 'cost_price', 'selling_price', 'units_sold', 'history_prices', 'history_units'
+])
+
+Simulation = namedtuple('Simulation', ['prices', 'demand', 'revenue', 'margin'])
+
+CENT = Decimal('0.01')
+
+
+def _elasticity():
+    return float(getattr(settings, 'PRICE_ELASTICITY_DEFAULT', 1.5))
+
+
+def _max_markup():
+    return float(getattr(settings, 'PRICE_MAX_MARKUP', 1.5))
+
+
+def pad_ragged(row_index, values, n_rows):
+    """
+    Scatters a flat array of values into a NaN-padded (n_rows, max_len) matrix.
+
+    ``row_index`` gives the destination row of every value and must be sorted,
+    values belonging to the same row keep their relative order.
+    """
+    row_index = np.asarray(row_index, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    counts = np.bincount(row_index, minlength=n_rows)
+    width = int(counts.max()) if counts.size else 0
+    matrix = np.full((n_rows, max(width, 1)), np.nan)
+    if row_index.size:
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        columns = np.arange(row_index.size) - starts[row_index]
+        matrix[row_index, columns] = values
+    return matrix
+
+
+def fit_demand_curves(history_prices, history_units, reference_prices, reference_units, elasticity=None):
+    """
+    Fits one linear demand curve per row of the NaN-padded history matrices.
+
+    Rows with at least two distinct prices get an ordinary least squares fit.
+    Rows without usable price variation (or with an upward sloping fit) are
+    anchored at their mean observed demand around the reference price using
+    the configured default price elasticity.
+
+    Returns:
+        DemandCurves: arrays of intercepts and slopes, one entry per product.
+    """
+    elasticity = _elasticity() if elasticity is None else elasticity
+    prices = np.asarray(history_prices, dtype=np.float64)
+    units = np.asarray(history_units, dtype=np.float64)
+    reference_prices = np.asarray(reference_prices, dtype=np.float64)
+    reference_units = np.asarray(reference_units, dtype=np.float64)
+
+    observed = ~np.isnan(prices) & ~np.isnan(units)
+    counts = observed.sum(axis=1)
+    safe_counts = np.maximum(counts, 1)
+
+    p = np.where(observed, prices, 0.0)
+    q = np.where(observed, units, 0.0)
+    mean_p = p.sum(axis=1) / safe_counts
+    mean_q = q.sum(axis=1) / safe_counts
+
+    dp = np.where(observed, prices - mean_p[:, None], 0.0)
+    dq = np.where(observed, units - mean_q[:, None], 0.0)
+    var_p = (dp * dp).sum(axis=1)
+    cov_pq = (dp * dq).sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fitted_slope = -cov_pq / var_p
+    fitted = (counts >= 2) & (var_p > 1e-9) & (fitted_slope > 0)
+
+    anchor_p = np.where(counts > 0, mean_p, reference_prices)
+    anchor_q = np.where(counts > 0, mean_q, reference_units)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prior_slope = np.where(anchor_p > 0, elasticity * anchor_q / anchor_p, 0.0)
+
+    slope = np.where(fitted, fitted_slope, prior_slope)
+    intercept = anchor_q + slope * anchor_p
+    return DemandCurves(intercept=intercept, slope=slope)
+
+
+def optimal_prices(curves, cost_prices, selling_prices, max_markup=None):
+    """
+    Computes the profit-maximizing price for every fitted demand curve.
+
+    Prices are clipped to ``[cost_price, selling_price * max_markup]``. Curves
+    without a usable demand signal (zero slope or no demand) keep their
+    current selling price.
+    """
+    max_markup = _max_markup() if max_markup is None else max_markup
+    cost = np.asarray(cost_prices, dtype=np.float64)
+    selling = np.asarray(selling_prices, dtype=np.float64)
+
+    usable = (curves.slope > 0) & (curves.intercept > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unconstrained = (curves.intercept / curves.slope + cost) / 2
+    prices = np.where(usable, unconstrained, selling)
+    upper = np.maximum(selling * max_markup, cost)
+    return np.clip(prices, cost, upper)
+
+
+@timed('optimizer.load_pricing_inputs')
+def load_pricing_inputs(product_ids):
+    """
+    Loads everything the engine needs for the given products.
+
+    Demand curves are fitted on observed (price, units) data only: the
+    product's DemandObservations, read from the columnar history store, plus
+    its current ``(selling_price, units_sold)``. A product without observations
+    therefore has a single point and is priced with the elasticity prior
+    anchored on its ``units_sold``. Forecast outputs are not used as observations.
+    """
+    rows = list(
+        Product.objects.filter(id__in=product_ids)
+        .order_by('id')
+        .values_list('id', 'cost_price', 'selling_price', 'units_sold')
+    )
+    if not rows:
+        empty = np.empty(0)
+        return PricingInputs(np.empty(0, dtype=np.int64), empty, empty, empty, np.empty((0, 1)), np.empty((0, 1)))
+
+    ids, cost, selling, units_sold = zip(*rows)
+    ids = np.asarray(ids, dtype=np.int64)
+    cost = np.asarray(cost, dtype=np.float64)
+    selling = np.asarray(selling, dtype=np.float64)
+    units_sold = np.asarray(units_sold, dtype=np.float64)
+
+    observed = get_demand_history_store().rows(ids)
+    own_rows = np.arange(ids.size)
+    row_index = np.concatenate((own_rows, np.searchsorted(ids, observed.product_ids)))
+    order = np.argsort(row_index, kind='stable')
+    row_index = row_index[order]
+    history_units = np.concatenate((units_sold, observed.units))[order]
+    history_prices = np.concatenate((selling, observed.prices))[order]
+    return PricingInputs(
+        ids, cost, selling, units_sold,
+        pad_ragged(row_index, history_prices, ids.size), pad_ragged(row_index, history_units, ids.size),
+    )
+
+
+def to_decimal(value):
+    """Rounds an engine value to a two decimal place Decimal."""
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def fit_inputs(inputs):
+    """Fits the demand curves of already loaded PricingInputs."""
+    return fit_demand_curves(
+        inputs.history_prices, inputs.history_units, inputs.selling_price, inputs.units_sold
+    )
+
+
+def optimize_inputs(inputs):
+    """Runs the engine over already loaded PricingInputs and returns the price array."""
+    return optimal_prices(fit_inputs(inputs), inputs.cost_price, inputs.selling_price)
+
+
+def simulate(curves, cost_prices, prices):
+    """
+    Evaluates the demand curves at a matrix of candidate prices.
+
+    Args:
+        curves: DemandCurves of n products.
+        cost_prices: n cost prices.
+        prices: (n, k) candidate prices, one row per product.
+
+    Returns:
+        Simulation: (n, k) matrices of the prices, predicted units (never below
+        zero), revenue and margin (``(price - cost) * units``).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    cost = np.asarray(cost_prices, dtype=np.float64)
+    demand = np.maximum(curves.intercept[:, None] - curves.slope[:, None] * prices, 0.0)
+    return Simulation(
+        prices=prices,
+        demand=demand,
+        revenue=prices * demand,
+        margin=(prices - cost[:, None]) * demand,
+    )
+
+
+@timed('optimizer.simulate_prices')
+def simulate_prices(product_ids, prices=None, price_changes=None):
+    """
+    What-if API: predicts demand, revenue and margin of the given products at
+    every candidate price.
+
+    Exactly one of the grids is used:
+        prices: absolute candidate prices, applied to every product.
+        price_changes: percentage changes relative to each product's current
+                       selling price, e.g. [-10, 0, 10].
+
+    Returns:
+        tuple: (product id array, Simulation with one row per product).
+               Unknown ids are left out.
+    """
+    inputs = load_pricing_inputs(product_ids)
+    if prices is not None:
+        grid = np.broadcast_to(np.asarray(prices, dtype=np.float64), (inputs.product_ids.size, len(prices)))
+    else:
+        changes = np.asarray(price_changes, dtype=np.float64)
+        grid = inputs.selling_price[:, None] * (1 + changes[None, :] / 100)
+    return inputs.product_ids, simulate(fit_inputs(inputs), inputs.cost_price, grid)
+
+
+@timed('optimizer.optimize_prices')
+def optimize_prices(product_ids):
+    """
+    Batch API: computes optimized prices for a list of product ids.
+
+    Returns:
+        dict: product id -> optimized price (Decimal, two decimal places).
+              Unknown ids are left out.
+    """
+    inputs = load_pricing_inputs(product_ids)
+    prices = optimize_inputs(inputs)
+    return {int(product_id): to_decimal(price) for product_id, price in zip(inputs.product_ids, prices)}
+
+
+def optimize_new_prices(cost_prices, selling_prices, units_sold):
+    """
+    Computes optimized prices for products that have no stored history yet,
+    e.g. rows of a bulk import, in one vectorized pass.
+
+    Returns:
+        numpy.ndarray: optimized prices, one per product.
+    """
+    selling = np.asarray(selling_prices, dtype=np.float64)
+    units = np.asarray(units_sold, dtype=np.float64)
+    curves = fit_demand_curves(selling[:, None], units[:, None], selling, units)
+    return optimal_prices(curves, cost_prices, selling)
+
+
+def optimize_price(cost_price, selling_price, units_sold):
+    """
+    Computes the optimized price of a single product that has no stored history yet.
+    """
+    price = optimize_new_prices([cost_price], [selling_price], [units_sold])[0]
+    return float(to_decimal(price))
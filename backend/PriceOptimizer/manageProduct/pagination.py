@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination for product lists.
+
+Products are ordered by ``(-modified_dt, id)``. A cursor encodes the sort key of
+the last row of a page, and the next page is fetched with a range condition on
+that key instead of an OFFSET, so every page costs the same index range scan
+no matter how deep the client has paged.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+PRODUCT_ORDERING = ('-modified_dt', 'id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(modified_dt, product_id):
+    payload = json.dumps([modified_dt.isoformat(), product_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        modified_dt, product_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        modified_dt = parse_datetime(modified_dt)
+        product_id = int(product_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor("Invalid pagination cursor")
+    if modified_dt is None:
+        raise InvalidCursor("Invalid pagination cursor")
+    return modified_dt, product_id
+
+
+def _page_queryset(queryset, cursor):
+    queryset = queryset.order_by(*PRODUCT_ORDERING)
+    if cursor:
+        modified_dt, product_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(modified_dt__lt=modified_dt) | Q(modified_dt=modified_dt, id__gt=product_id)
+        )
+    return queryset
+
+
+def _split_page(rows, page_size, sort_key):
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*sort_key(rows[-1]))
+
+
+async def apaginate(queryset, cursor, page_size, sort_key):
+    """
+    Returns one page of the queryset, ordered by PRODUCT_ORDERING.
+
+    Args:
+        queryset: products to paginate.
+        cursor: cursor returned with the previous page, or None for the first page.
+        page_size: maximum number of rows in the page.
+        sort_key: returns the (modified_dt, id) of a row.
+
+    Returns:
+        tuple: (list of products, cursor of the next page or None on the last page)
+    """
+    rows = [row async for row in _page_queryset(queryset, cursor)[:page_size + 1]]
+    return _split_page(rows, page_size, sort_key)
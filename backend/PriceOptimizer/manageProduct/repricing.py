@@ -0,0 +1,114 @@
+"""
+Catalog-wide repricing.
+
+Walks the selected products in primary key order, one chunk at a time, runs the
+optimization engine over each chunk and writes the new ``optimized_price``
+values back with a single ``bulk_update`` per chunk. The cached product lists of
+the owners of each chunk are invalidated after it is written.
+"""
+from django.conf import settings
+
+from manageProduct import analytics, change_tracking, optimizer
+from manageProduct.list_cache import invalidate_product_lists
+from manageProduct.models import Product
+from PriceOptimizer.Metrics.metrics import timed
+
+
+def _default_chunk_size():
+    return int(getattr(settings, 'REPRICE_CHUNK_SIZE', 2000))
+
+
+def filter_products(user_id=None, category=None, product_id_list=None, changed_since=None):
+    """
+    Returns the products selected for repricing, optionally restricted to one
+    user (``auth0_user_id``), one category name, a list of ids and/or to the
+    products changed since a watermark (see change_tracking.changed_filter).
+    """
+    products = Product.objects.all()
+    if user_id:
+        products = products.filter(auth0_user_id=user_id)
+    if category:
+        products = products.filter(category__name=category)
+    if product_id_list is not None:
+        products = products.filter(id__in=product_id_list)
+    return products.filter(change_tracking.changed_filter(changed_since))
+
+
+def iter_id_chunks(queryset, chunk_size):
+    """
+    Yields lists of product ids using keyset pagination on the primary key, so
+    memory stays flat and no long-lived cursor is held between chunks.
+    """
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+@timed('repricing.reprice_chunk')
+def reprice_chunk(product_ids):
+    """
+    Recomputes and stores ``optimized_price`` for one chunk of product ids.
+
+    Returns:
+        int: number of products updated.
+    """
+    inputs = optimizer.load_pricing_inputs(product_ids)
+    prices = optimizer.optimize_inputs(inputs)
+    products = [
+        Product(id=int(product_id), optimized_price=optimizer.to_decimal(price))
+        for product_id, price in zip(inputs.product_ids, prices)
+    ]
+    with analytics.track_changes(product_ids):
+        Product.objects.bulk_update(products, ['optimized_price'], batch_size=len(products) or None)
+    invalidate_product_lists(
+        *Product.objects.filter(id__in=product_ids).values_list('auth0_user_id', flat=True).distinct()
+    )
+    return len(products)
+
+
+def reprice_products(queryset=None, chunk_size=None, progress=None):
+    """
+    Reprices every product of the queryset in streamed chunks.
+
+    Args:
+        queryset: products to reprice, all products when omitted.
+        chunk_size: number of products loaded, optimized and written per chunk.
+        progress: optional callable invoked as ``progress(done, total)`` after each chunk.
+
+    Returns:
+        int: total number of products updated.
+    """
+    queryset = Product.objects.all() if queryset is None else queryset
+    chunk_size = chunk_size or _default_chunk_size()
+    total = queryset.count()
+
+    done = 0
+    for ids in iter_id_chunks(queryset, chunk_size):
+        done += reprice_chunk(ids)
+        if progress:
+            progress(done, total)
+    return done
+
+
+def reprice_catalog(user_id=None, category=None, changed_only=False, chunk_size=None, progress=None):
+    """
+    Reprices the catalog, or one user's/category's products, as a tracked run.
+
+    Args:
+        changed_only: only reprice products whose inputs changed since the last
+                      successful catalog-wide reprice.
+
+    Returns:
+        int: total number of products updated.
+    """
+    params = {'user_id': user_id, 'category': category}
+    with change_tracking.tracked_run('reprice', record=change_tracking.is_catalog_wide(params)) as since:
+        if changed_only:
+            params = change_tracking.changed_params(params, since)
+        return reprice_products(filter_products(**params), chunk_size=chunk_size, progress=progress)
@@ -0,0 +1,160 @@
+"""
+Demand forecast retention and compaction.
+
+Every forecast request adds a DemandForecast version per product. The
+retention policy keeps, per product, the newest
+FORECAST_RETENTION_VERSIONS versions plus every version younger than
+FORECAST_RETENTION_DAYS; older versions are rolled up into the product's
+DemandForecastSummary (count, version and date range, min/max/sum of the
+values) and deleted.
+
+Compaction walks the products in primary key chunks, one transaction per
+chunk: the prunable versions of the chunk are picked with a window query,
+merged into the summaries with one upsert and deleted with one DELETE.
+The latest version (Product.latest_forecast) is always kept.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from manageProduct.models import DemandForecast, DemandForecastSummary, Product
+from manageProduct.repricing import iter_id_chunks
+
+
+CompactionReport = namedtuple('CompactionReport', ['products', 'deleted', 'summaries'])
+
+TableSize = namedtuple('TableSize', ['rows', 'bytes'])
+
+SUMMARY_FIELDS = [
+    'versions_compacted', 'first_version', 'last_version', 'first_created_dt', 'last_created_dt',
+    'min_forecast_value', 'max_forecast_value', 'sum_forecast_value', 'modified_dt',
+]
+
+
+def prunable_forecasts(product_ids, keep_versions, cutoff):
+    """
+    Versions of the given products outside the retention policy: not among the
+    newest ``keep_versions`` of their product, created before ``cutoff`` and not
+    the product's latest forecast.
+
+    The versions are ranked over all versions of a product in a subquery; the
+    age condition is applied outside of it, as a condition in the same WHERE
+    clause would drop the rows before they are ranked.
+    """
+    beyond_newest = (
+        DemandForecast.objects.filter(product_id__in=product_ids)
+        .annotate(recency=Window(RowNumber(), partition_by=[F('product_id')], order_by=F('version').desc()))
+        .filter(recency__gt=keep_versions)
+        .values('id')
+    )
+    latest = Product.objects.filter(id__in=product_ids, latest_forecast__isnull=False).values('latest_forecast')
+    return DemandForecast.objects.filter(id__in=beyond_newest, created_dt__lt=cutoff).exclude(id__in=latest)
+
+
+def merge_summaries(rows, summaries, now):
+    """
+    Folds (product_id, version, forecast_value, created_dt) rows into the
+    existing summaries (a product id -> DemandForecastSummary mapping).
+
+    Returns:
+        list: the new or updated DemandForecastSummary instances.
+    """
+    touched = {}
+    for product_id, version, forecast_value, created_dt in rows:
+        summary = touched.get(product_id) or summaries.get(product_id)
+        if summary is None:
+            summary = DemandForecastSummary(
+                product_id=product_id, first_version=version, last_version=version,
+                first_created_dt=created_dt, last_created_dt=created_dt,
+                min_forecast_value=forecast_value, max_forecast_value=forecast_value, sum_forecast_value=0,
+            )
+        summary.versions_compacted += 1
+        summary.first_version = min(summary.first_version, version)
+        summary.last_version = max(summary.last_version, version)
+        summary.first_created_dt = min(summary.first_created_dt, created_dt)
+        summary.last_created_dt = max(summary.last_created_dt, created_dt)
+        summary.min_forecast_value = min(summary.min_forecast_value, forecast_value)
+        summary.max_forecast_value = max(summary.max_forecast_value, forecast_value)
+        summary.sum_forecast_value += forecast_value
+        summary.modified_dt = now
+        touched[product_id] = summary
+    return list(touched.values())
+
+
+def compact_chunk(product_ids, keep_versions, cutoff, dry_run=False):
+    """
+    Rolls up and deletes the prunable versions of one chunk of products.
+
+    Returns:
+        tuple: (versions deleted, summaries written); nothing is written with dry_run.
+    """
+    with transaction.atomic():
+        rows = list(
+            prunable_forecasts(product_ids, keep_versions, cutoff)
+            .values_list('id', 'product_id', 'version', 'forecast_value', 'created_dt')
+        )
+        if not rows or dry_run:
+            return len(rows), 0
+
+        summaries = DemandForecastSummary.objects.select_for_update().in_bulk(
+            list({product_id for _, product_id, _, _, _ in rows})
+        )
+        merged = merge_summaries([row[1:] for row in rows], summaries, timezone.now())
+        DemandForecastSummary.objects.bulk_create(
+            merged, update_conflicts=True, unique_fields=['product'], update_fields=SUMMARY_FIELDS
+        )
+        deleted, _ = DemandForecast.objects.filter(id__in=[row[0] for row in rows]).delete()
+        return deleted, len(merged)
+
+
+def compact_forecasts(keep_versions=None, keep_days=None, chunk_size=None, dry_run=False, progress=None):
+    """
+    Applies the retention policy to the whole forecast history.
+
+    Args:
+        keep_versions: newest versions kept per product (at least 1).
+        keep_days: versions younger than this are kept regardless of their rank.
+        chunk_size: products compacted per transaction.
+        dry_run: only count the versions that would be deleted.
+        progress: optional callable invoked as ``progress(products_done, deleted)`` after each chunk.
+
+    Returns:
+        CompactionReport
+    """
+    keep_versions = max(keep_versions or settings.FORECAST_RETENTION_VERSIONS, 1)
+    keep_days = settings.FORECAST_RETENTION_DAYS if keep_days is None else keep_days
+    chunk_size = chunk_size or settings.FORECAST_COMPACTION_CHUNK_SIZE
+    cutoff = timezone.now() - timedelta(days=keep_days)
+
+    products = deleted = summaries = 0
+    for ids in iter_id_chunks(Product.objects.all(), chunk_size):
+        chunk_deleted, chunk_summaries = compact_chunk(ids, keep_versions, cutoff, dry_run=dry_run)
+        products += len(ids)
+        deleted += chunk_deleted
+        summaries += chunk_summaries
+        if progress:
+            progress(products, deleted)
+    return CompactionReport(products, deleted, summaries)
+
+
+def table_size(model):
+    """Row count and, on PostgreSQL, the total on-disk size (table, indexes and TOAST) of a model's table."""
+    rows = model.objects.count()
+    size = None
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_total_relation_size(%s::regclass)', [connection.ops.quote_name(model._meta.db_table)])
+            size = cursor.fetchone()[0]
+    return TableSize(rows, size)
+
+
+def vacuum(model):
+    """Runs VACUUM (ANALYZE) on PostgreSQL so the space of deleted rows can be reused."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(f'VACUUM (ANALYZE) {connection.ops.quote_name(model._meta.db_table)}')
@@ -1,6 +1,11 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from rest_framework import serializers
-from .models import DemandForecast, Product, Category
+from . import demand_curves
+from .category_cache import get_category_cache
+from .change_tracking import inputs_changed
+from .models import DemandForecast, DemandObservation, Product, Category
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -19,9 +24,17 @@ class ProductSerializer(serializers.ModelSerializer):
     Serializer for Product model.
     Converts Product model instances to JSON representation.
     It includes the related CategorySerializer to display the product's category.
+    An optional 'fields' argument restricts the output to a subset of Meta.fields.
     """
     category = CategorySerializer(read_only=True)
 
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
     class Meta:
         model = Product
         fields = [
@@ -54,44 +67,187 @@ class AddProductSerializer(serializers.ModelSerializer):
         """
         Custom create method for adding a product.
         Extracts the category_name from the validated data,
-        gets or creates the corresponding Category instance,
+        gets or creates the corresponding Category through the category cache,
         and then creates the Product with the category.
         """
         category_name = validated_data.pop('category_name')
-        category, _ = Category.objects.get_or_create(name=category_name)   
-        product = Product.objects.create(category=category, **validated_data)  
+        category_id, _ = get_category_cache().get_id(category_name)
+        product = Product.objects.create(category_id=category_id, **validated_data)  
         return product
     
 
+class ProductPatchSerializer(serializers.ModelSerializer):
+    """
+    Serializer validating the changes of one product in a bulk update.
+    Used with partial=True (and many=True for per-product patches); the
+    category is given by name and resolved for the whole batch through the
+    category cache, so validation issues no per-row queries.
+    """
+    category_name = serializers.CharField(max_length=255, required=False)
+
+    class Meta:
+        model = Product
+        fields = [
+            'name', 'description', 'cost_price', 'selling_price', 'stock_available',
+            'units_sold', 'customer_rating', 'optimized_price', 'category_name'
+        ]
+
+
+VERSION_CONFLICT_RETRIES = 3
+
+
+class ProductPrimaryKeyField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field for Product that resolves ids from a prefetched
+    ``context['products']`` mapping (as returned by ``in_bulk``) when one is
+    provided, so validating a list of N items does not issue N queries.
+    """
+    def to_internal_value(self, data):
+        products = self.context.get('products')
+        if products is None:
+            return super().to_internal_value(data)
+        try:
+            product = products.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if product is None:
+            self.fail('does_not_exist', pk_value=data)
+        return product
+
+
+class ProductImportSerializer(serializers.Serializer):
+    """
+    Serializer validating one row of a bulk product import.
+    Used with many=True so a whole batch of rows is validated at once; the
+    errors of invalid rows line up with their position in the batch.
+    """
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(allow_blank=True, default='')
+    category_name = serializers.CharField(max_length=255)
+    cost_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    selling_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    stock_available = serializers.IntegerField()
+    units_sold = serializers.IntegerField()
+    customer_rating = serializers.DecimalField(max_digits=3, decimal_places=1, required=False)
+
+    def validate(self, attrs):
+        if attrs['cost_price'] >= attrs['selling_price']:
+            raise serializers.ValidationError("Cost price should be less than the selling price")
+        return attrs
+
+
+class DemandForecastListSerializer(serializers.ListSerializer):
+    """
+    List serializer used for ``DemandForecastSerializer(many=True)``.
+    Creates all forecasts in one transaction: the latest version of every
+    requested product is read with a single query on the products and the new
+    rows are written with a single bulk_create. Each row stores the product's
+    demand curve, sampled in one batched pass before the transaction.
+    """
+    def create(self, validated_data):
+        """
+        Assigns consecutive versions per product and bulk inserts the forecasts.
+
+        The product rows are locked for the duration of the transaction so
+        concurrent requests for the same products are serialized instead of
+        colliding on the ('product', 'version') unique constraint. If a
+        conflict still happens the whole batch is retried with fresh versions.
+
+        The current versions are read through the products' latest_forecast
+        pointers while locking them, and the pointers are moved to the new rows
+        with one bulk_update in the same transaction.
+        """
+        product_ids = {item['product'].id for item in validated_data}
+        curves = demand_curves.build_curves(product_ids)
+        for attempt in range(VERSION_CONFLICT_RETRIES):
+            try:
+                with transaction.atomic():
+                    latest_versions = dict(
+                        Product.objects.select_for_update(of=('self',))
+                        .filter(id__in=product_ids)
+                        .values_list('id', 'latest_forecast__version')
+                    )
+                    forecasts = []
+                    for item in validated_data:
+                        product_id = item['product'].id
+                        latest_versions[product_id] = (latest_versions.get(product_id) or 0) + 1
+                        curve = curves.get(product_id)
+                        forecasts.append(DemandForecast(
+                            version=latest_versions[product_id],
+                            curve_min_price=curve.min_price if curve else None,
+                            curve_max_price=curve.max_price if curve else None,
+                            curve_demand=curve.demand if curve else None,
+                            **item,
+                        ))
+                    forecasts = DemandForecast.objects.bulk_create(forecasts)
+                    # With several forecasts for one product in the batch, the last one is the latest.
+                    latest = {forecast.product_id: forecast for forecast in forecasts}
+                    Product.objects.bulk_update(
+                        [Product(id=product_id, latest_forecast=forecast) for product_id, forecast in latest.items()],
+                        ['latest_forecast'],
+                    )
+                    return forecasts
+            except IntegrityError:
+                if attempt == VERSION_CONFLICT_RETRIES - 1:
+                    raise
+
+
 class DemandForecastSerializer(serializers.ModelSerializer):
     """
     Serializer for DemandForecast model.
     Converts DemandForecast instances to JSON representation.
     Handles creating a new DemandForecast while incrementing the version number automatically.
+    With many=True, DemandForecastListSerializer creates the whole batch set-based.
     """
+    product = ProductPrimaryKeyField(queryset=Product.objects.all())
+
     class Meta:
         model = DemandForecast
         fields = ['product', 'forecast_value']  
+        list_serializer_class = DemandForecastListSerializer
 
     def create(self, validated_data):
         """
         Custom create method to automatically assign the next version number
         when a new DemandForecast is created for a product.
-        It finds the latest version for the given product and increments the version number.
+        It reads the latest version through the product's latest_forecast pointer,
+        increments it and moves the pointer to the new forecast.
         """
         product = validated_data['product']
-        latest_forecast = DemandForecast.objects.filter(product=product).order_by('-version').first()
+        latest_forecast = product.latest_forecast
         new_version = latest_forecast.version + 1 if latest_forecast else 1  
         validated_data['version'] = new_version
-        return super().create(validated_data)  
+        forecast = super().create(validated_data)
+        product.latest_forecast = forecast
+        product.save(update_fields=['latest_forecast'])
+        return forecast
     
 
+class DemandObservationSerializer(serializers.ModelSerializer):
+    """
+    Serializer validating one demand observation: the product, the day, the price it
+    sold at and the units sold. Used with many=True and a prefetched
+    ``context['products']`` mapping for ingestion; an existing observation of the
+    same product and day is overwritten, so the unique_together validator is disabled.
+    """
+    product = ProductPrimaryKeyField(queryset=Product.objects.all())
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'))
+    units = serializers.IntegerField(min_value=0)
+
+    class Meta:
+        model = DemandObservation
+        fields = ['product', 'observed_on', 'price', 'units']
+        validators = []
+
+
 class ProductPutSerializer(serializers.ModelSerializer):
     class Meta:
         model = Product
         fields = '__all__'  
-        read_only_fields = ['created_dt', 'modified_dt']  
+        read_only_fields = ['created_dt', 'modified_dt', 'inputs_modified_dt', 'latest_forecast']  
 
     def update(self, instance, validated_data):
         validated_data['modified_dt'] = timezone.now()
+        if inputs_changed(instance, validated_data):
+            validated_data['inputs_modified_dt'] = validated_data['modified_dt']
         return super().update(instance, validated_data)
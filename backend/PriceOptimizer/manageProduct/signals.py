@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from manageProduct import analytics
+from manageProduct.category_cache import get_category_cache
+from manageProduct.list_cache import invalidate_product_lists
+from manageProduct.models import Category, Product
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_cache(sender, instance, created=False, **kwargs):
+    """
+    Drops the cached categories whenever a category is created, changed or
+    deleted. Product lists show the category name, so renaming or deleting a
+    category also invalidates the lists of the users with products in it.
+    """
+    get_category_cache().invalidate()
+    if created:
+        return
+    totals = getattr(instance, '_product_totals', None)
+    if totals is not None:
+        # Deleted: the products no longer reference the category, use the owners read before.
+        user_ids = {user_id for user_id, _ in totals}
+    else:
+        user_ids = Product.objects.filter(category=instance).values_list('auth0_user_id', flat=True).distinct()
+    invalidate_product_lists(*user_ids)
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_totals(sender, instance, **kwargs):
+    """Reads the totals of the category's products before they are moved to no category."""
+    instance._product_totals = analytics.product_totals_of(Product.objects.filter(category=instance))
+
+
+@receiver(post_delete, sender=Category)
+def move_totals_to_uncategorized(sender, instance, **kwargs):
+    """
+    Deleting a category drops its pricing aggregates and moves its products to
+    no category (SET_NULL), so their totals are added to the owners'
+    uncategorized groups.
+    """
+    totals = getattr(instance, '_product_totals', {})
+    analytics.apply_deltas({}, {(user_id, None): values for (user_id, _), values in totals.items()})
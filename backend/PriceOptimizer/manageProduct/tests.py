@@ -1,3 +1,863 @@
-from django.test import TestCase
+import tempfile
+from concurrent.futures import Future
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from manageProduct import analytics, change_tracking, forecasting, importer, jobs, optimizer, repricing, retention
+from manageProduct.category_cache import get_category_cache
+from manageProduct.history_store import DemandHistoryStore, get_demand_history_store
+from manageProduct.list_cache import get_product_list_cache
+from manageProduct.models import Category, DemandForecast, DemandForecastSummary, DemandObservation, Job, PricingAggregate, Product
+from manageProduct.observations import record_observations
+from PriceOptimizer.Cache.token_cache import get_token_cache
+from userAuth.models import Roles, TokenUsers, UserRoles, Users
+
+
+class ProductApiTestCase(TestCase):
+    """
+    Base case with an authenticated Admin user. Requests go through the full
+    middleware stack with the user's token; the process-wide caches are reset
+    per test, as the rolled back rows they may reference no longer exist.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.user = Users.objects.create(username='tester', password='x', name='Tester', email='tester@example.com', created=now)
+        UserRoles.objects.create(user=cls.user, role=Roles.objects.create(name='Admin', description=''))
+        TokenUsers.objects.create(user=cls.user, token='test-token', created=now, expires_at=now + timedelta(hours=3))
+        cls.user_id = str(cls.user.user_id)
+
+    def setUp(self):
+        get_token_cache.cache_clear()
+        get_category_cache.cache_clear()
+        self.client = Client(headers={'Authorization': 'Bearer test-token', 'user_id': self.user_id})
+
+    def create_product(self, **fields):
+        values = {
+            'auth0_user_id': self.user_id,
+            'name': 'Product',
+            'description': '',
+            'cost_price': Decimal('10.00'),
+            'selling_price': Decimal('20.00'),
+            'stock_available': 5,
+            'units_sold': 100,
+            'customer_rating': Decimal('4.0'),
+            'optimized_price': Decimal('20.00'),
+        }
+        values.update(fields)
+        return Product.objects.create(**values)
+
+
+class ProductListPaginationTests(ProductApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Equal timestamps, so the pages are split on the id tie-breaker.
+        modified_dt = timezone.now()
+        self.ids = [self.create_product(name=f'Product {index}', modified_dt=modified_dt).id for index in range(5)]
+
+    def fetch(self, **params):
+        response = self.client.get('/pot/api/products/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_cover_every_product_once(self):
+        page = self.fetch(page_size=2)
+        pages = [[product['id'] for product in page['results']]]
+        while page['next_cursor']:
+            page = self.fetch(page_size=2, cursor=page['next_cursor'])
+            pages.append([product['id'] for product in page['results']])
+
+        self.assertEqual([len(ids) for ids in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), sorted(self.ids))
+
+    def test_full_last_page_has_no_next_cursor(self):
+        page = self.fetch(page_size=5)
+        self.assertEqual(len(page['results']), 5)
+        self.assertIsNone(page['next_cursor'])
+
+        first = self.fetch(page_size=4)
+        last = self.fetch(page_size=4, cursor=first['next_cursor'])
+        self.assertEqual([product['id'] for product in last['results']], [max(self.ids)])
+        self.assertIsNone(last['next_cursor'])
+
+    def test_newer_products_come_first(self):
+        newest = self.create_product(name='Newest', modified_dt=timezone.now() + timedelta(minutes=1))
+        page = self.fetch(page_size=1)
+        self.assertEqual(page['results'][0]['id'], newest.id)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/pot/api/products/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid pagination cursor'})
+
+    def test_invalid_page_size_is_rejected(self):
+        for page_size in ('0', '-1', 'ten'):
+            response = self.client.get('/pot/api/products/', {'page_size': page_size})
+            self.assertEqual(response.status_code, 400)
+
+
+class ProductListCacheTests(ProductApiTestCase):
+    """The list cache needs a cache shared between processes; a file based one stands in for Redis."""
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        caches = {**settings.CACHES, 'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': cache_dir.name,
+        }}
+        settings_override = override_settings(CACHES=caches, PRODUCT_LIST_CACHE_BACKEND='shared')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_product_list_cache.cache_clear()
+        self.addCleanup(get_product_list_cache.cache_clear)
+        self.product = self.create_product(name='Cached')
+
+    def test_matching_etag_gets_not_modified(self):
+        response = self.client.get('/pot/api/products/')
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get('/pot/api/products/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get('/pot/api/products/')['ETag']
+        response = self.client.get('/pot/api/products/', {'search': 'cached'}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_product_update_invalidates_cached_list(self):
+        etag = self.client.get('/pot/api/products/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f'/pot/api/product/{self.product.id}/', {'name': 'Renamed'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/pot/api/products/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([product['name'] for product in response.json()], ['Renamed'])
+
+    def test_category_rename_and_delete_invalidate_cached_list(self):
+        category = Category.objects.create(name='Tools')
+        Product.objects.filter(id=self.product.id).update(category=category)
+        etag = self.client.get('/pot/api/products/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            category.name = 'Hardware'
+            category.save()
+        response = self.client.get('/pot/api/products/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['category'] for product in response.json()], [{'name': 'Hardware'}])
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            category.delete()
+        response = self.client.get('/pot/api/products/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['category'] for product in response.json()], [None])
+
+
+class CategoryListTests(ProductApiTestCase):
+
+    def test_deleted_category_changes_etag(self):
+        Category.objects.create(name='Kept')
+        removed = Category.objects.create(name='Removed')
+        response = self.client.get('/pot/api/categories/')
+        etag = response['ETag']
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.client.get('/pot/api/categories/', headers={'If-None-Match': etag}).status_code, 304)
+
+        removed.delete()
+
+        response = self.client.get('/pot/api/categories/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json(), {'categories': ['Kept']})
+
+
+class MetricsTests(ProductApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(METRICS_ENABLED=True, METRICS_SAMPLE_RATE=1.0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # The metrics middleware is only installed if enabled when a client's handler loads it.
+        self.client = Client(headers={'Authorization': 'Bearer test-token', 'user_id': self.user_id})
+
+    def scrape(self):
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        samples = {}
+        for line in response.content.decode().splitlines():
+            if not line.startswith('#'):
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        return samples
+
+    def test_requests_and_queries_are_counted(self):
+        requests = 'http_requests_total{method="GET",endpoint="pot/api/products/",status="200"}'
+        queries = 'db_queries_per_request_sum{method="GET",endpoint="pot/api/products/"}'
+        before = self.scrape()
+
+        self.create_product()
+        self.assertEqual(self.client.get('/pot/api/products/').status_code, 200)
+
+        after = self.scrape()
+        self.assertEqual(after[requests] - before.get(requests, 0), 1)
+        self.assertGreater(after[queries] - before.get(queries, 0), 0)
+
+    def test_disallowed_address_is_forbidden(self):
+        response = self.client.get('/metrics/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn(b'http_requests_total', response.content)
+
+    def test_disabled_metrics_are_not_found(self):
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.client.get('/metrics/').status_code, 404)
+
+
+class ProductBulkTests(ProductApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.first = self.create_product(name='First')
+        self.second = self.create_product(name='Second')
+        self.missing_id = self.second.id + 1000
+
+    def bulk(self, method, data):
+        response = getattr(self.client, method)('/pot/api/products/bulk/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_patch_reports_outcome_per_product(self):
+        results = self.bulk('patch', {'products': [
+            {'id': self.first.id, 'selling_price': '25.00', 'category_name': 'Bulk'},
+            {'id': self.missing_id, 'name': 'Ghost'},
+            {'id': self.second.id, 'cost_price': 'cheap'},
+            {'id': 'first', 'name': 'Nameless'},
+        ]})
+
+        self.assertEqual([(result['id'], result['status']) for result in results], [
+            (self.first.id, 'updated'),
+            (self.missing_id, 'not_found'),
+            (self.second.id, 'invalid'),
+            ('first', 'invalid'),
+        ])
+        self.assertIn('cost_price', results[2]['errors'])
+        self.assertIn('id', results[3]['errors'])
+
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.selling_price, Decimal('25.00'))
+        self.assertEqual(self.first.category.name, 'Bulk')
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.cost_price, Decimal('10.00'))
+
+    def test_patch_same_changes_for_listed_products(self):
+        results = self.bulk('patch', {'product_id_list': [self.first.id, self.missing_id], 'changes': {'stock_available': 7}})
+
+        self.assertEqual(results, [
+            {'id': self.first.id, 'status': 'updated'},
+            {'id': self.missing_id, 'status': 'not_found'},
+        ])
+        self.assertEqual(
+            dict(Product.objects.values_list('id', 'stock_available')),
+            {self.first.id: 7, self.second.id: 5},
+        )
+
+    def test_patch_with_invalid_changes_is_rejected(self):
+        response = self.client.patch('/pot/api/products/bulk/', {
+            'product_id_list': [self.first.id], 'changes': {'units_sold': 'many'},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.units_sold, 100)
+
+    def test_delete_reports_outcome_per_product(self):
+        results = self.bulk('delete', {'product_id_list': [self.first.id, self.missing_id]})
+
+        self.assertEqual(results, [
+            {'id': self.first.id, 'status': 'deleted'},
+            {'id': self.missing_id, 'status': 'not_found'},
+        ])
+        self.assertEqual(list(Product.objects.values_list('id', flat=True)), [self.second.id])
+
+
+class DemandHistoryTestCase(ProductApiTestCase):
+    """Base case with the demand history store in a temporary directory."""
+
+    def setUp(self):
+        super().setUp()
+        history_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(history_dir.cleanup)
+        settings_override = override_settings(DEMAND_HISTORY_DIR=history_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_demand_history_store.cache_clear()
+        self.addCleanup(get_demand_history_store.cache_clear)
+
+    def observe(self, product, observations, start=date(2024, 1, 1)):
+        """Records (price, units) observations of a product on consecutive days."""
+        with self.captureOnCommitCallbacks(execute=True):
+            recorded, errors = record_observations([
+                {'product': product.id, 'observed_on': start + timedelta(days=day), 'price': price, 'units': units}
+                for day, (price, units) in enumerate(observations)
+            ])
+        self.assertEqual(errors, [])
+        self.assertEqual(recorded, len(observations))
+
+    def create_stale_forecast(self, product, value):
+        forecast = DemandForecast.objects.create(product=product, forecast_value=value, version=1)
+        Product.objects.filter(id=product.id).update(latest_forecast=forecast)
+
+
+class DemandHistoryStoreTests(DemandHistoryTestCase):
+
+    def history(self, *products):
+        response = self.client.get('/pot/api/demand-observations/', {'product_ids': ','.join(str(product.id) for product in products)})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['history']
+
+    def test_prices_and_units_are_exact(self):
+        product = self.create_product()
+        self.observe(product, [('300000.01', 3), ('99999999.99', 2147483647), ('0.07', 0)])
+
+        self.assertEqual(self.history(product)[str(product.id)], [
+            {'observed_on': '2024-01-01', 'price': '300000.01', 'units': 3},
+            {'observed_on': '2024-01-02', 'price': '99999999.99', 'units': 2147483647},
+            {'observed_on': '2024-01-03', 'price': '0.07', 'units': 0},
+        ])
+
+    def test_reingested_day_replaces_the_observation(self):
+        product = self.create_product()
+        self.observe(product, [('20.00', 50), ('21.00', 40)])
+        self.assertEqual([day['units'] for day in self.history(product)[str(product.id)]], [50, 40])
+
+        # The second day again, with new values, and a new third day.
+        self.observe(product, [('22.00', 30), ('23.00', 20)], start=date(2024, 1, 2))
+
+        self.assertEqual(self.history(product)[str(product.id)], [
+            {'observed_on': '2024-01-01', 'price': '20.00', 'units': 50},
+            {'observed_on': '2024-01-02', 'price': '22.00', 'units': 30},
+            {'observed_on': '2024-01-03', 'price': '23.00', 'units': 20},
+        ])
+        self.assertEqual(DemandObservation.objects.filter(product=product).count(), 3)
+
+    def test_duplicate_days_in_one_batch_keep_the_last(self):
+        product = self.create_product()
+        with self.captureOnCommitCallbacks(execute=True):
+            recorded, errors = record_observations([
+                {'product': product.id, 'observed_on': '2024-01-01', 'price': '20.00', 'units': 50},
+                {'product': product.id, 'observed_on': '2024-01-01', 'price': '25.00', 'units': 45},
+            ])
+        self.assertEqual((recorded, errors), (1, []))
+        self.assertEqual(self.history(product)[str(product.id)], [
+            {'observed_on': '2024-01-01', 'price': '25.00', 'units': 45},
+        ])
+
+    def test_writes_reach_stores_of_other_hosts(self):
+        # A store with its own directory stands in for another host's local files.
+        with tempfile.TemporaryDirectory() as other_dir:
+            other_host = DemandHistoryStore(other_dir, partition_size=settings.DEMAND_HISTORY_PARTITION_SIZE)
+            product = self.create_product()
+            self.observe(product, [('20.00', 50)])
+            self.assertEqual(other_host.rows([product.id]).units.tolist(), [50.0])
+
+            self.observe(product, [('20.00', 60)])
+            self.assertEqual(other_host.rows([product.id]).units.tolist(), [60.0])
+
+
+class PriceOptimizerTests(DemandHistoryTestCase):
+
+    def test_price_fitted_on_observations(self):
+        # With the current (20, 100) point: units = 180 - 4 * price, so the best price
+        # is (180 / 4 + 10) / 2 = 27.50, within [cost, 1.5 * selling].
+        product = self.create_product()
+        self.observe(product, [('10.00', 140), ('30.00', 60)])
+
+        self.assertEqual(optimizer.optimize_prices([product.id]), {product.id: Decimal('27.50')})
+
+    def test_price_without_observations_uses_elasticity_prior(self):
+        # Slope 1.5 * 100 / 20 = 7.5 through (20, 100): (250 / 7.5 + 10) / 2 = 21.67.
+        product = self.create_product()
+
+        self.assertEqual(optimizer.optimize_prices([product.id]), {product.id: Decimal('21.67')})
+
+    def test_forecasts_are_not_used_as_observations(self):
+        product = self.create_product()
+        self.observe(product, [('10.00', 140), ('30.00', 60)])
+        self.create_stale_forecast(product, Decimal('5000.00'))
+
+        self.assertEqual(optimizer.optimize_prices([product.id]), {product.id: Decimal('27.50')})
+
+    def test_price_is_clipped_to_markup(self):
+        # Observed demand barely reacts to the price, so the unconstrained optimum is far above 1.5 * 20.
+        product = self.create_product()
+        self.observe(product, [('10.00', 101), ('30.00', 99)])
+
+        self.assertEqual(optimizer.optimize_prices([product.id]), {product.id: Decimal('30.00')})
+
+    def test_unknown_products_are_left_out(self):
+        product = self.create_product()
+        prices = optimizer.optimize_prices([product.id, product.id + 1000])
+        self.assertEqual(list(prices), [product.id])
+
+
+class IncrementalRepriceTests(DemandHistoryTestCase):
+
+    def test_second_run_reprices_only_changed_products(self):
+        unchanged, forecasted, observed, edited = (self.create_product(name=name) for name in ('Unchanged', 'Forecasted', 'Observed', 'Edited'))
+        self.assertEqual(repricing.reprice_catalog(changed_only=True), 4)
+        self.assertEqual(repricing.reprice_catalog(changed_only=True), 0)
+
+        # Forecasts are not an optimizer input; observations and price edits are.
+        self.create_stale_forecast(forecasted, 80)
+        self.observe(observed, [('20.00', 50)])
+        response = self.client.put(f'/pot/api/product/{edited.id}/', {'cost_price': '12.00'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+        selected = repricing.filter_products(**change_tracking.changed_params({}, change_tracking.last_watermark('reprice')))
+        self.assertEqual(sorted(selected.values_list('id', flat=True)), [observed.id, edited.id])
+        self.assertEqual(repricing.reprice_catalog(changed_only=True), 2)
+        self.assertEqual(repricing.reprice_catalog(changed_only=True), 0)
+
+
+class RepriceViewTests(DemandHistoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        supplier = Users.objects.create(username='supplier', password='x', name='Supplier', email='supplier@example.com', created=now)
+        UserRoles.objects.create(user=supplier, role=Roles.objects.create(name='Supplier', description=''))
+        TokenUsers.objects.create(user=supplier, token='supplier-token', created=now, expires_at=now + timedelta(hours=3))
+        self.supplier_id = str(supplier.user_id)
+        self.supplier = Client(headers={'Authorization': 'Bearer supplier-token', 'user_id': self.supplier_id})
+        # Stale optimized prices, so a reprice visibly changes them.
+        self.own = self.create_product(name='Own', auth0_user_id=self.supplier_id, optimized_price=Decimal('1.00'))
+        self.foreign = self.create_product(name='Foreign', auth0_user_id='owner', optimized_price=Decimal('1.00'))
+
+    def reprice(self, client, **body):
+        return client.post('/pot/api/reprice/', body, content_type='application/json')
+
+    def optimized_price(self, product):
+        product.refresh_from_db()
+        return product.optimized_price
+
+    def test_non_admin_cannot_reprice_other_users_products(self):
+        for body in ({'user_id': 'owner'}, {'user_id': 'owner', 'async': True}, {'all_users': True}):
+            with self.subTest(**body):
+                response = self.reprice(self.supplier, **body)
+                self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.optimized_price(self.foreign), Decimal('1.00'))
+        self.assertEqual(self.optimized_price(self.own), Decimal('1.00'))
+        self.assertFalse(Job.objects.exists())
+
+    def test_non_admin_reprices_own_products(self):
+        response = self.reprice(self.supplier)
+        self.assertEqual((response.status_code, response.json()), (200, {'repriced': 1}))
+        self.assertNotEqual(self.optimized_price(self.own), Decimal('1.00'))
+        self.assertEqual(self.optimized_price(self.foreign), Decimal('1.00'))
+
+    def test_admin_reprices_other_users_products(self):
+        response = self.reprice(self.client, user_id='owner')
+        self.assertEqual((response.status_code, response.json()), (200, {'repriced': 1}))
+        self.assertNotEqual(self.optimized_price(self.foreign), Decimal('1.00'))
+        self.assertEqual(self.optimized_price(self.own), Decimal('1.00'))
+
+
+class InlinePool:
+    """Stands in for the worker process pool: runs each chunk in the test process, inside the test transaction."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class JobTests(DemandHistoryTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.ids = [self.create_product(name=f'Product {index}').id for index in range(3)]
+
+    def run_next(self):
+        job = jobs.claim_next('worker-1')
+        self.assertEqual(job.status, Job.RUNNING)
+        return jobs.run_job(job, InlinePool(), chunk_size=2)
+
+    def job_status(self, job, client=None):
+        response = (client or self.client).get(f'/pot/api/jobs/{job.id}/')
+        return response.status_code, response.json()
+
+    def test_queued_jobs_succeed_with_result(self):
+        reprice = jobs.enqueue('reprice', {'user_id': self.user_id}, self.user_id)
+        forecast = jobs.enqueue('forecast', {'product_id_list': self.ids[:2]}, self.user_id)
+
+        self.assertEqual(self.run_next().id, reprice.id)
+        status, body = self.job_status(reprice)
+        self.assertEqual(status, 200)
+        self.assertEqual((body['status'], body['result'], body['error']), (Job.SUCCEEDED, {'repriced': 3}, None))
+        self.assertEqual(body['progress'], {'done': 3, 'total': 3})
+        self.assertIsNotNone(body['finished_dt'])
+
+        self.assertEqual(self.run_next().id, forecast.id)
+        self.assertEqual(self.job_status(forecast)[1]['result'], {'forecasts_created': 2})
+        self.assertEqual(DemandForecast.objects.filter(product_id__in=self.ids).count(), 2)
+        self.assertIsNone(jobs.claim_next('worker-1'))
+
+    def test_raising_chunk_fails_job(self):
+        def failing_chunk(product_ids):
+            raise ValueError('engine unavailable')
+
+        job = jobs.enqueue('reprice', {'user_id': self.user_id}, self.user_id)
+        with mock.patch.dict(jobs.JOB_KINDS, {'reprice': jobs.JobKind(run_chunk=failing_chunk, result_key='repriced')}):
+            with self.assertRaises(ValueError):
+                self.run_next()
+
+        status, body = self.job_status(job)
+        self.assertEqual((body['status'], body['error'], body['result']), (Job.FAILED, 'engine unavailable', None))
+        self.assertIsNotNone(body['finished_dt'])
+
+    def test_other_user_cannot_read_job(self):
+        job = jobs.enqueue('reprice', {'user_id': self.user_id}, self.user_id)
+        now = timezone.now()
+        other = Users.objects.create(username='other', password='x', name='Other', email='other@example.com', created=now)
+        UserRoles.objects.create(user=other, role=Roles.objects.get(name='Admin'))
+        TokenUsers.objects.create(user=other, token='other-token', created=now, expires_at=now + timedelta(hours=3))
+        client = Client(headers={'Authorization': 'Bearer other-token', 'user_id': str(other.user_id)})
+
+        self.assertEqual(self.job_status(job, client), (404, {'error': 'Job not found'}))
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = jobs.enqueue('reprice', {'user_id': self.user_id}, self.user_id)
+        self.assertEqual(jobs.claim_next('worker-1').id, job.id)
+        Job.objects.filter(id=job.id).update(progress_done=2, progress_total=3)
+        self.assertIsNone(jobs.claim_next('worker-2'))
+
+        stale_since = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER + 1)
+        Job.objects.filter(id=job.id).update(modified_dt=stale_since)
+        reclaimed = jobs.claim_next('worker-2')
+        self.assertEqual((reclaimed.id, reclaimed.worker, reclaimed.progress_done), (job.id, 'worker-2', 0))
+
+        job = jobs.run_job(reclaimed, InlinePool(), chunk_size=2)
+        self.assertEqual((job.status, job.worker, job.progress_done, job.progress_total), (Job.SUCCEEDED, 'worker-2', 3, 3))
+
+
+class DemandForecastingTests(DemandHistoryTestCase):
+
+    def test_forecast_of_flat_observed_demand(self):
+        product = self.create_product(units_sold=100)
+        self.observe(product, [('20.00', 50)] * 4)
+
+        self.assertEqual(forecasting.forecast_products([product.id]), {product.id: Decimal('50.00')})
+
+    def test_forecast_without_observations_is_units_sold(self):
+        product = self.create_product(units_sold=80)
+
+        self.assertEqual(forecasting.forecast_products([product.id]), {product.id: Decimal('80.00')})
+
+    def test_forecasts_are_not_fed_back(self):
+        observed = self.create_product(units_sold=100)
+        self.observe(observed, [('20.00', 50)] * 4)
+        unobserved = self.create_product(units_sold=80)
+        for product in (observed, unobserved):
+            self.create_stale_forecast(product, Decimal('500.00'))
+
+        self.assertEqual(
+            forecasting.forecast_products([observed.id, unobserved.id]),
+            {observed.id: Decimal('50.00'), unobserved.id: Decimal('80.00')},
+        )
+
+    def test_new_observation_refits_cached_model(self):
+        product = self.create_product()
+        self.observe(product, [('20.00', 50)] * 4)
+        self.assertEqual(forecasting.forecast_products([product.id]), {product.id: Decimal('50.00')})
+
+        self.observe(product, [('20.00', 110)], start=date(2024, 1, 5))
+        self.assertGreater(forecasting.forecast_products([product.id])[product.id], Decimal('50.00'))
+
+    def test_holt_follows_linear_trend(self):
+        models = forecasting.fit_holt([[10.0, 20.0, 30.0, 40.0, 50.0, 60.0]], alpha_grid=(1.0,), beta_grid=(1.0,))
+        self.assertEqual(forecasting.forecast_values(models.level, models.trend).tolist(), [70.0])
+
+
+class LatestForecastTests(DemandHistoryTestCase):
+
+    def forecast(self, *products):
+        response = self.client.post('/pot/api/demand-forecast/', {'product_id_list': [product.id for product in products]}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+
+    def latest_versions(self, *products):
+        product_ids = [product.id for product in products]
+        by_get = self.client.get('/pot/api/demand-forecast/latest/', {'product_ids': ','.join(map(str, product_ids))})
+        by_post = self.client.post('/pot/api/demand-forecast/latest/', {'product_id_list': product_ids}, content_type='application/json')
+        self.assertEqual((by_get.status_code, by_post.status_code), (200, 200))
+        self.assertEqual(by_get.json(), by_post.json())
+        return {forecast['product']: forecast['version'] for forecast in by_get.json()['forecasts']}
+
+    def test_highest_version_per_product(self):
+        first, second, unforecast = (self.create_product(name=name) for name in ('First', 'Second', 'Unforecast'))
+        self.forecast(first, second)
+        self.forecast(first)
+        self.assertEqual(self.latest_versions(first, second, unforecast), {first.id: 2, second.id: 1})
+
+        self.forecast(second)
+        self.forecast(second)
+        self.assertEqual(self.latest_versions(first, second, unforecast), {first.id: 2, second.id: 3})
+        self.assertEqual(
+            DemandForecast.objects.filter(product=second).order_by('-version').values_list('version', flat=True).first(), 3,
+        )
+
+
+class ProductImportTests(ProductApiTestCase):
+
+    CSV = (
+        'name,description,category_name,cost_price,selling_price,stock_available,units_sold\n'
+        'Lamp,Desk lamp,Lighting,10.00,20.00,5,100\n'
+        ',No name,Lighting,10.00,20.00,5,100\n'
+        'Chair,,Furniture,30.00,25.00,2,10\n'
+        'Table,,Furniture,40.00,80.00,many,10\n'
+        'Shelf,,Furniture,15.00,35.00,3,12\n'
+    )
+
+    def upload(self, content, name='products.csv'):
+        return self.client.post('/pot/api/products/import/', {'file': SimpleUploadedFile(name, content.encode())})
+
+    def test_rejected_rows_are_reported_by_row_number(self):
+        response = self.upload(self.CSV)
+
+        self.assertEqual(response.status_code, 201)
+        report = response.json()
+        self.assertEqual((report['created'], report['rejected']), (2, 3))
+        self.assertEqual([error['row'] for error in report['errors']], [2, 3, 4])
+        self.assertIn('name', report['errors'][0]['errors'])
+        self.assertIn('non_field_errors', report['errors'][1]['errors'])
+        self.assertIn('stock_available', report['errors'][2]['errors'])
+        self.assertEqual(
+            sorted(Product.objects.filter(auth0_user_id=self.user_id).values_list('name', 'category__name')),
+            [('Lamp', 'Lighting'), ('Shelf', 'Furniture')],
+        )
+
+    def test_row_numbers_continue_across_batches(self):
+        rows = list(importer.read_csv(SimpleUploadedFile('products.csv', self.CSV.encode())))
+        report = importer.import_products(rows, self.user_id, batch_size=2)
+
+        self.assertEqual(report.created, 2)
+        self.assertEqual([error['row'] for error in report.errors], [2, 3, 4])
+
+    def test_file_without_valid_rows_is_rejected(self):
+        header, _, rows = self.CSV.partition('\n')
+        invalid_rows = rows.splitlines()[1:4]
+        response = self.upload('\n'.join([header, *invalid_rows]) + '\n')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.json()['created'], response.json()['rejected']), (0, 3))
+        self.assertFalse(Product.objects.exists())
+
+    def test_unsupported_format_is_rejected(self):
+        response = self.upload(self.CSV, name='products.xlsx')
+        self.assertEqual(response.status_code, 400)
+
+
+class PricingAggregateTests(ProductApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for name, category_name, units_sold in (('Lamp', 'Lighting', 100), ('Bulb', 'Lighting', 300), ('Chair', 'Furniture', 20)):
+            response = self.client.post('/pot/api/product/', {
+                'name': name, 'description': name, 'category_name': category_name, 'cost_price': '10.00',
+                'selling_price': '20.00', 'stock_available': 5, 'units_sold': units_sold,
+            }, content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+        self.products = {product.name: product for product in Product.objects.all()}
+        forecast = DemandForecast.objects.create(product=self.products['Lamp'], forecast_value=Decimal('90.00'))
+        Product.objects.filter(id=forecast.product_id).update(latest_forecast=forecast)
+        # Another user's products must not leak into this user's totals.
+        self.create_product(auth0_user_id='other-user', category=self.products['Chair'].category)
+        analytics.refresh_users()
+
+    def expected_aggregates(self):
+        """The aggregates of every (user, category) group, summed product by product."""
+        groups = {}
+        for product in Product.objects.select_related('latest_forecast'):
+            totals = groups.setdefault((product.auth0_user_id, product.category_id), dict.fromkeys(analytics.AGGREGATE_FIELDS, 0))
+            totals['product_count'] += 1
+            totals['units_sold'] += product.units_sold
+            totals['stock_available'] += product.stock_available
+            totals['revenue'] += product.selling_price * product.units_sold
+            totals['margin'] += (product.selling_price - product.cost_price) * product.units_sold
+            totals['stock_value'] += product.cost_price * product.stock_available
+            totals['rating_sum'] += product.customer_rating
+            if product.latest_forecast:
+                totals['forecast_count'] += 1
+                totals['forecast_units'] += product.latest_forecast.forecast_value
+                totals['forecast_revenue'] += product.latest_forecast.forecast_value * product.optimized_price
+        return groups
+
+    def assertAggregatesMatch(self):
+        stored = {
+            (aggregate.auth0_user_id, aggregate.category_id): {field: getattr(aggregate, field) for field in analytics.AGGREGATE_FIELDS}
+            for aggregate in PricingAggregate.objects.all()
+        }
+        self.assertEqual(stored, self.expected_aggregates())
+
+    def test_totals_after_create(self):
+        self.assertAggregatesMatch()
+        self.assertEqual(analytics.user_summary(self.user_id)['totals']['product_count'], 3)
+
+    def test_totals_after_put(self):
+        response = self.client.put(f"/pot/api/product/{self.products['Lamp'].id}/", {
+            'selling_price': '25.00', 'units_sold': 150, 'category_name': 'Furniture',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertAggregatesMatch()
+
+    def test_totals_after_delete(self):
+        response = self.client.delete(f"/pot/api/product/{self.products['Chair'].id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertAggregatesMatch()
+        self.assertFalse(PricingAggregate.objects.filter(auth0_user_id=self.user_id, category__name='Furniture').exists())
+
+    def test_totals_after_bulk_updates(self):
+        response = self.client.patch('/pot/api/products/bulk/', {'products': [
+            {'id': self.products['Lamp'].id, 'cost_price': '12.00', 'category_name': 'Garden'},
+            {'id': self.products['Chair'].id, 'stock_available': 50},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertAggregatesMatch()
+
+        response = self.client.patch('/pot/api/products/bulk/', {
+            'product_id_list': [product.id for product in self.products.values()],
+            'changes': {'selling_price': '30.00', 'category_name': 'Lighting'},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertAggregatesMatch()
+
+    def test_totals_after_bulk_delete(self):
+        response = self.client.delete('/pot/api/products/bulk/', {
+            'product_id_list': [self.products['Lamp'].id, self.products['Chair'].id],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertAggregatesMatch()
+
+    def test_totals_after_category_delete(self):
+        Category.objects.get(name='Lighting').delete()
+        self.assertAggregatesMatch()
+
+    def test_totals_after_forecast_and_reprice_chunks(self):
+        product_ids = [product.id for product in self.products.values()]
+        jobs.forecast_chunk(product_ids)
+        self.assertAggregatesMatch()
+        self.assertEqual(PricingAggregate.objects.get(auth0_user_id=self.user_id, category__name='Furniture').forecast_count, 1)
+
+        Product.objects.filter(id__in=product_ids).update(optimized_price=Decimal('1.00'))
+        analytics.refresh_users()
+        repricing.reprice_chunk(product_ids)
+        self.assertAggregatesMatch()
+
+    def test_totals_after_import(self):
+        report = importer.import_products([
+            {'name': 'Sofa', 'category_name': 'Furniture', 'cost_price': '100.00', 'selling_price': '150.00', 'stock_available': '2', 'units_sold': '4'},
+            {'name': 'Rake', 'category_name': 'Garden', 'cost_price': '5.00', 'selling_price': '9.00', 'stock_available': '20', 'units_sold': '40'},
+        ], self.user_id)
+        self.assertEqual(report.created, 2)
+        self.assertAggregatesMatch()
+
+    def test_write_reads_only_the_changed_products(self):
+        # The delta of one product is the same however large its group is.
+        for index in range(20):
+            self.create_product(name=f'Filler {index}', category=self.products['Lamp'].category)
+        analytics.refresh_users()
+        lamp = self.products['Lamp']
+        with CaptureQueriesContext(connection) as queries:
+            with analytics.track_changes([lamp.id]):
+                Product.objects.filter(id=lamp.id).update(units_sold=1)
+        self.assertAggregatesMatch()
+        product_reads = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT') and 'manageProduct_product' in query['sql']]
+        self.assertEqual(len(product_reads), 3)
+        for sql in product_reads:
+            self.assertIn(f'"manageProduct_product"."id" IN ({lamp.id})', sql)
+
+
+class ForecastRetentionTests(ProductApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_product()
+        now = timezone.now()
+        # Versions 1-10 are 200 days old, versions 11-20 a day old.
+        self.forecasts = [
+            DemandForecast.objects.create(
+                product=self.product, version=version, forecast_value=Decimal(version),
+                created_dt=now - timedelta(days=200 if version <= 10 else 1),
+            )
+            for version in range(1, 21)
+        ]
+        Product.objects.filter(id=self.product.id).update(latest_forecast=self.forecasts[-1])
+
+    def remaining_versions(self):
+        return list(DemandForecast.objects.filter(product=self.product).order_by('version').values_list('version', flat=True))
+
+    def test_old_versions_beyond_newest_are_compacted(self):
+        report = retention.compact_forecasts(keep_versions=10, keep_days=90)
+
+        self.assertEqual(report, retention.CompactionReport(products=1, deleted=10, summaries=1))
+        self.assertEqual(self.remaining_versions(), list(range(11, 21)))
+
+    def test_old_versions_among_newest_are_kept(self):
+        report = retention.compact_forecasts(keep_versions=15, keep_days=90)
+
+        self.assertEqual(report.deleted, 5)
+        self.assertEqual(self.remaining_versions(), list(range(6, 21)))
+
+    def test_recent_versions_are_kept(self):
+        report = retention.compact_forecasts(keep_versions=1, keep_days=90)
+
+        self.assertEqual(report.deleted, 10)
+        self.assertEqual(self.remaining_versions(), list(range(11, 21)))
+
+    def test_dry_run_deletes_nothing(self):
+        report = retention.compact_forecasts(keep_versions=10, keep_days=90, dry_run=True)
+
+        self.assertEqual((report.deleted, report.summaries), (10, 0))
+        self.assertEqual(len(self.remaining_versions()), 20)
+
+    def test_summary_rolls_up_compacted_versions(self):
+        retention.compact_forecasts(keep_versions=15, keep_days=90)
+        retention.compact_forecasts(keep_versions=10, keep_days=90)
+
+        summary = DemandForecastSummary.objects.get(product=self.product)
+        self.assertEqual(summary.versions_compacted, 10)
+        self.assertEqual((summary.first_version, summary.last_version), (1, 10))
+        self.assertEqual((summary.min_forecast_value, summary.max_forecast_value), (Decimal('1.00'), Decimal('10.00')))
+        self.assertEqual(summary.sum_forecast_value, Decimal('55.00'))
+        self.assertEqual(summary.first_created_dt, self.forecasts[0].created_dt)
+        self.assertEqual(summary.last_created_dt, self.forecasts[9].created_dt)
+
+    def test_latest_forecast_is_kept(self):
+        # Even when the latest forecast is not the highest version, it is never deleted.
+        Product.objects.filter(id=self.product.id).update(latest_forecast=self.forecasts[0])
+
+        retention.compact_forecasts(keep_versions=1, keep_days=0)
+
+        self.assertEqual(self.remaining_versions(), [1, 20])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.latest_forecast.version, 1)
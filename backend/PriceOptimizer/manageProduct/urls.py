@@ -1,13 +1,24 @@
 
 from django.contrib import admin
 from django.urls import path
-from manageProduct.views import AddDemandForecastView, CategoryListView, ProductListView, ProductView
+from manageProduct.views import AddDemandForecastView, CategoryListView, DemandCurveView, DemandObservationView, JobView, LatestForecastView, OptimizedPriceView, PriceSimulationView, PricingAnalyticsView, ProductBulkView, ProductExportView, ProductImportView, ProductListView, ProductView, RepriceView
 
 
 urlpatterns = [
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/export/', ProductExportView.as_view(), name='product-export'),
+    path('products/import/', ProductImportView.as_view(), name='product-import'),
+    path('products/bulk/', ProductBulkView.as_view(), name='product-bulk'),
     path('product/', ProductView.as_view(), name='add-product'),
     path('product/<int:product_id>/', ProductView.as_view(), name='delete-product'),
     path('demand-forecast/', AddDemandForecastView.as_view(), name='add-demand-forecast'),
+    path('demand-forecast/latest/', LatestForecastView.as_view(), name='latest-demand-forecasts'),
+    path('demand-observations/', DemandObservationView.as_view(), name='demand-observations'),
+    path('demand-curves/', DemandCurveView.as_view(), name='demand-curves'),
+    path('optimized-prices/', OptimizedPriceView.as_view(), name='optimized-prices'),
+    path('simulate-prices/', PriceSimulationView.as_view(), name='simulate-prices'),
+    path('reprice/', RepriceView.as_view(), name='reprice'),
+    path('analytics/', PricingAnalyticsView.as_view(), name='pricing-analytics'),
+    path('jobs/<int:job_id>/', JobView.as_view(), name='job-status'),
 ]
@@ -1,78 +1,177 @@
 import logging
 import random
-from django.http import JsonResponse
+from datetime import timedelta
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views import View
 from rest_framework.views import APIView
 from django.utils.decorators import method_decorator
-from PriceOptimizer.Decorator.decorators import role_required
-from manageProduct.models import Category, Product
+from PriceOptimizer.Decorator.decorators import async_method_decorator, role_required
+from django.db import transaction
+from django.db.models import F
+from manageProduct.models import DemandForecast, Job, Product
+from manageProduct import analytics, bulk_products, demand_curves, export, forecasting, importer, jobs, observations, optimizer, repricing
+from manageProduct.category_cache import get_category_cache
+from manageProduct.fast_serializer import ProductRowSerializer
+from manageProduct.history_store import EPOCH, get_demand_history_store
+from manageProduct.list_cache import get_product_list_cache, invalidate_product_lists
+from manageProduct.pagination import InvalidCursor, apaginate
 from django.shortcuts import get_object_or_404
 from manageProduct.serializer import AddProductSerializer, DemandForecastSerializer, ProductPutSerializer, ProductSerializer
 
 
 
-class CategoryListView(APIView):
+class CategoryListView(View):
+    """
+    Async view: under ASGI the category query runs on the event loop through the async ORM.
+    Categories are served from the category cache and support conditional GETs.
+    """
 
-    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
-    def get(self, request):
+    @async_method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    async def get(self, request):
         """
         Handles GET requests to retrieve all categories.
 
-        This view fetches all the categories from the database and returns a JSON response
-        containing the 'id' and 'name' of each category.
+        This view fetches all the categories from the category cache and returns a JSON response
+        containing the 'name' of each category.
+
+        The response carries an ETag derived from the category names; a request with a
+        matching If-None-Match header gets an empty 304 response instead. No Last-Modified
+        is sent: deleting a category would not move it forward.
 
         If an error occurs during data retrieval, an appropriate error message is returned.
         """
         try:
-            categories = Category.objects.all()
-            category_names = categories.values_list('name', flat=True)
-            category_names_list = list(category_names)
-            logging.info(f"Successfully fetched category data")
-            return JsonResponse({'categories':category_names_list}, status=200)
+            snapshot = await get_category_cache().asnapshot()
+            response = get_conditional_response(request, etag=snapshot.etag)
+            if response is None:
+                response = JsonResponse({'categories': snapshot.names}, status=200)
+                logging.info(f"Successfully fetched category data")
+
+            response['ETag'] = snapshot.etag
+            return response
         except Exception as e:
             logging.error(f"Error fetching categories: {e}")
             return JsonResponse({'error': 'An error occurred while fetching categories'}, status=500)
         
 
-class ProductListView(APIView):
+class ProductListView(View):
     """
     API to fetch all products for a specific user with optimized database queries.
-    Uses select_related to minimize the number of database calls.
+    Reads only the serialized columns with values_list (joining the category name)
+    and renders them with the fast ProductRowSerializer. Rendered lists are cached per
+    user until the user's catalog changes.
+    Async view: rows are fetched through the async ORM and serialized from memory.
     """
     
-    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
-    def get(self, request, *args, **kwargs):
+    @async_method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    async def get(self, request, *args, **kwargs):
         """
         Handles GET requests to list all products for a specific user.
         The user ID is expected in the request headers.
+
+        Optional query parameters:
+        - category: only return products of this category name.
+        - search: only return products whose name contains this text (case-insensitive).
+        - fields: comma-separated subset of the product fields to return.
+        - page_size / cursor: keyset pagination on (-modified_dt, id). When either is given
+          the response is {'results': [...], 'next_cursor': ...} instead of a plain list.
+
+        The response carries an ETag; a request with a matching If-None-Match header gets an
+        empty 304 response instead.
         """
         try:
             user_id = request.headers.get('User-ID') 
             
             if not user_id:
                 return JsonResponse({'error': 'User-ID header missing'}, status=400)
-            
-            products = Product.objects.select_related('category').filter(auth0_user_id=user_id).order_by('-modified_dt')
-            serializer = ProductSerializer(products, many=True)
 
-            logging.info(f"Successfully fetched Product List for user_id: {user_id}")
-            return JsonResponse(serializer.data, safe=False, status=200)
+            list_cache = get_product_list_cache()
+            if list_cache is None:
+                return await self.render(request, user_id)
+
+            cached = await list_cache.alookup(user_id, request.GET)
+            response = get_conditional_response(request, etag=cached.etag)
+            if response is None:
+                body = await list_cache.aget(cached)
+                if body is not None:
+                    logging.info(f"Served cached Product List for user_id: {user_id}")
+                    response = HttpResponse(body, content_type='application/json', status=200)
+            if response is None:
+                response = await self.render(request, user_id)
+                if response.status_code != 200:
+                    return response
+                await list_cache.aset(cached, response.content)
 
+            response['ETag'] = cached.etag
+            return response
         except Exception as e:
             logging.error(f"Error fetching products for user_id {user_id}: {e}")
             return JsonResponse({'error': 'An error occurred while fetching products'}, status=500)
 
+    async def render(self, request, user_id):
+        """
+        Queries and renders the product list of a user. Error responses are returned
+        as JsonResponses with a 4xx status and are never cached.
+        """
+        fields = request.GET.get('fields')
+        if fields:
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
+            unknown_fields = set(fields) - set(ProductSerializer.Meta.fields)
+            if unknown_fields:
+                return JsonResponse({'error': f"Unknown fields: {', '.join(sorted(unknown_fields))}"}, status=400)
+
+        products = Product.objects.filter(auth0_user_id=user_id)
+
+        category = request.GET.get('category')
+        if category:
+            products = products.filter(category__name=category)
+
+        search = request.GET.get('search')
+        if search:
+            products = products.filter(name__icontains=search)
+
+        serializer = ProductRowSerializer(fields=fields or None)
+        # modified_dt and id trail the serialized columns as the keyset sort key.
+        products = products.values_list(*serializer.columns, 'modified_dt', 'id')
+
+        cursor = request.GET.get('cursor')
+        page_size = request.GET.get('page_size')
+        if cursor is None and page_size is None:
+            rows = [row async for row in products.order_by('-modified_dt', 'id')]
+            logging.info(f"Successfully fetched Product List for user_id: {user_id}")
+            return HttpResponse(serializer.render(rows), content_type='application/json', status=200)
+
+        try:
+            page_size = int(page_size or settings.PRODUCT_LIST_PAGE_SIZE)
+        except ValueError:
+            return JsonResponse({'error': 'page_size must be a positive integer'}, status=400)
+        if page_size <= 0:
+            return JsonResponse({'error': 'page_size must be a positive integer'}, status=400)
+        page_size = min(page_size, settings.PRODUCT_LIST_MAX_PAGE_SIZE)
+
+        try:
+            page, next_cursor = await apaginate(products, cursor, page_size, sort_key=lambda row: row[-2:])
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        logging.info(f"Successfully fetched Product List page for user_id: {user_id}")
+        return HttpResponse(serializer.render_page(page, next_cursor), content_type='application/json', status=200)
+
+
 class ProductView(APIView):
     """
     API to add a new product and delete an existing product. 
     """
-    def generate_optimized_price(self, cost_price: float, selling_price: float) -> float:
+    def generate_optimized_price(self, cost_price: float, selling_price: float, units_sold: float) -> float:
         """
-        Generate a random price between cost price and selling price
+        Generate the profit-maximizing price for a new product using the optimization engine
         """
         if cost_price >= selling_price:
             raise ValueError("Cost price should be less than the selling price")
-        optimized_price = round(random.uniform(cost_price, selling_price), 2)
-        return optimized_price
+        return optimizer.optimize_price(cost_price, selling_price, units_sold)
     
     @method_decorator(role_required(['Admin', 'Supplier', 'Support', 'Buyer']))
     def post(self, request):
@@ -88,10 +187,13 @@ class ProductView(APIView):
             request_data = request.data.copy()
             request_data['auth0_user_id'] = user_id
             request_data['customer_rating']= random.randint(1, 5)
-            request_data['optimized_price']= self.generate_optimized_price(float(request_data.get('cost_price', 0)), float(request_data.get('selling_price', 0)))
+            request_data['optimized_price']= self.generate_optimized_price(float(request_data.get('cost_price', 0)), float(request_data.get('selling_price', 0)), float(request_data.get('units_sold', 0)))
             serializer = AddProductSerializer(data=request_data)
             if serializer.is_valid():
-                serializer.save()
+                with transaction.atomic():
+                    product = serializer.save()
+                    analytics.add_products([product.id])
+                invalidate_product_lists(user_id)
                 logging.info(f"Successfully Created Product Entry")
                 return JsonResponse({},status=201)
             
@@ -112,7 +214,9 @@ class ProductView(APIView):
             if not product:
                 logging.error(f"Product not found")
                 return JsonResponse({"error": "Product not found"}, status=404)
-            product.delete()
+            with analytics.track_changes([product.id]):
+                product.delete()
+            invalidate_product_lists(product.auth0_user_id)
             logging.info(f"Product and associated demand forecasts deleted successfully")
             return JsonResponse({"message": "Product and associated demand forecasts deleted successfully"}, status=200)
         except Exception as e:
@@ -129,7 +233,7 @@ class ProductView(APIView):
         - request: The incoming HTTP request with potential updates for a Product.
         - product_id: The ID of the Product to be updated.
         
-        If the 'category' field is provided in the request, the method checks if the category exists.
+        If the 'category' field is provided in the request, the method checks the category cache for it.
         If it exists, the category ID is used for the update. If it doesn't exist, a new category is created
         and the ID of the newly created category is used.
         """
@@ -139,8 +243,8 @@ class ProductView(APIView):
 
             category_name = request.data.get('category_name')
             if category_name:
-                category, created = Category.objects.get_or_create(name=category_name)
-                request.data['category'] = category.id
+                category_id, created = get_category_cache().get_id(category_name)
+                request.data['category'] = category_id
                 if created:
                     logging.info(f"Category '{category_name}' created and assigned to product.")
                 else:
@@ -148,7 +252,9 @@ class ProductView(APIView):
             
             serializer = ProductPutSerializer(product, data=request.data, partial=True)
             if serializer.is_valid():
-                serializer.save()
+                with analytics.track_changes([product.id]):
+                    serializer.save()
+                invalidate_product_lists(product.auth0_user_id)
                 logging.info(f"Product with ID {product_id} updated successfully.")
                 return JsonResponse({}, status=200)
             else:
@@ -159,9 +265,81 @@ class ProductView(APIView):
             return JsonResponse({'error': 'An error occurred during the update process. Please try again later.'}, status=500)
         
 
+class ProductBulkView(APIView):
+    """
+    API to update or delete many products in one request and one transaction.
+    Every response lists an outcome per product id: 'updated', 'deleted', 'not_found' or
+    'invalid' (with the validation errors).
+    """
+
+    def parse_ids(self, product_id_list):
+        if not product_id_list or not isinstance(product_id_list, list):
+            raise ValueError("Product ID list is missing or invalid")
+        if len(product_id_list) > settings.BULK_PRODUCTS_MAX_ITEMS:
+            raise ValueError(f"At most {settings.BULK_PRODUCTS_MAX_ITEMS} products can be changed at once")
+        try:
+            return [int(product_id) for product_id in product_id_list]
+        except (TypeError, ValueError):
+            raise ValueError("Product ID list is missing or invalid")
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Support']))
+    def patch(self, request):
+        """
+        Handles PATCH requests with either:
+        - 'products': a list of partial updates, each with the product 'id' and the fields to change; or
+        - 'product_id_list' and 'changes': one partial update applied to all listed products.
+        A category is changed with 'category_name', as in the single product update.
+        """
+        try:
+            patches = request.data.get('products')
+            if patches is not None:
+                if not isinstance(patches, list) or not patches:
+                    return JsonResponse({"error": "'products' must be a non-empty list"}, status=400)
+                if len(patches) > settings.BULK_PRODUCTS_MAX_ITEMS:
+                    return JsonResponse({"error": f"At most {settings.BULK_PRODUCTS_MAX_ITEMS} products can be changed at once"}, status=400)
+                results = bulk_products.update_products(patches)
+            else:
+                try:
+                    product_ids = self.parse_ids(request.data.get('product_id_list'))
+                except ValueError as e:
+                    return JsonResponse({"error": str(e)}, status=400)
+                changes = request.data.get('changes')
+                if not isinstance(changes, dict) or not changes:
+                    return JsonResponse({"error": "'changes' must be a non-empty object"}, status=400)
+                results, errors = bulk_products.update_products_with(product_ids, changes)
+                if errors:
+                    return JsonResponse({"error": errors}, status=400)
+
+            logging.info(f"Bulk updated {sum(result.get('status') == bulk_products.UPDATED for result in results)} products")
+            return JsonResponse({"results": results}, status=200)
+        except Exception as e:
+            logging.error(f"Error bulk updating products: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Support']))
+    def delete(self, request):
+        """
+        Handles DELETE requests with a 'product_id_list' body. The products are deleted together
+        with their demand forecasts.
+        """
+        try:
+            try:
+                product_ids = self.parse_ids(request.data.get('product_id_list'))
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+
+            results = bulk_products.delete_products(product_ids)
+            logging.info(f"Bulk deleted {sum(result['status'] == bulk_products.DELETED for result in results)} products")
+            return JsonResponse({"results": results}, status=200)
+        except Exception as e:
+            logging.error(f"Error bulk deleting products: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
 class AddDemandForecastView(APIView):
     """
-    API to add demand forecasts for multiple products. The forecast values are automatically generated.
+    API to add demand forecasts for multiple products. The forecast values are generated by the
+    batched forecasting engine.
     """
 
     @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
@@ -169,7 +347,11 @@ class AddDemandForecastView(APIView):
         """
         Handles the creation of new demand forecasts for given product IDs.
         The product IDs are taken from the request body, and the user is taken from the request header.
-        A random forecast value is generated for each product.
+        Forecast values for all products are computed in one batched pass; products whose inputs
+        did not change since their last fit reuse their cached model.
+
+        With "async": true in the body the forecasts are queued as a background job instead and
+        the response is 202 with the job id; poll jobs/<job_id>/ for progress and the result.
         """
         try:
             user_id = request.META.get('HTTP_USER_ID')
@@ -180,26 +362,45 @@ class AddDemandForecastView(APIView):
             if not product_id_list or not isinstance(product_id_list, list):
                 return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
 
-            products = Product.objects.filter(id__in=product_id_list)
-            if not products.exists():
+            try:
+                product_id_list = [int(product_id) for product_id in product_id_list]
+            except (TypeError, ValueError):
+                return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+
+            if request.data.get('async'):
+                job = jobs.enqueue('forecast', {'product_id_list': product_id_list}, user_id)
+                logging.info(f"Queued forecast job {job.id} for {len(product_id_list)} products")
+                return JsonResponse({"job_id": job.id, "status": job.status}, status=202)
+
+            products = Product.objects.in_bulk(product_id_list)
+            if not products:
                 return JsonResponse({"error": "No products found for the provided IDs"}, status=404)
 
+            forecasts = forecasting.forecast_products(list(products))
+
+            forecast_data = []
             created_forecasts = []
             for product_id in product_id_list:
-                forecast_data = {
-                    'product': int(product_id),  
-                    'forecast_value': round(random.uniform(50, 500), 2), 
-                    'created_by': user_id
-                }
-                serializer = DemandForecastSerializer(data=forecast_data)
-                if serializer.is_valid():
-                    serializer.save()
-                    logging.info(f"Successfully created demand forecast for product ID {product_id}")
-                    created_forecasts.append(serializer.data)
+                if product_id in products:
+                    forecast_data.append({
+                        'product': product_id,
+                        'forecast_value': forecasts[product_id],
+                    })
                 else:
-                    logging.error(f"Error with product ID {product_id}: {str(serializer.errors)}")
+                    logging.error(f"Error with product ID {product_id}: product does not exist")
                     created_forecasts.append({product_id: product_id})
 
+            serializer = DemandForecastSerializer(data=forecast_data, many=True, context={'products': products})
+            if serializer.is_valid():
+                with analytics.track_changes(list(products)):
+                    serializer.save()
+                invalidate_product_lists(*{product.auth0_user_id for product in products.values()})
+                logging.info(f"Successfully created {len(forecast_data)} demand forecasts")
+                created_forecasts = serializer.data + created_forecasts
+            else:
+                logging.error(f"Error creating demand forecasts: {str(serializer.errors)}")
+                return JsonResponse({"error": serializer.errors}, status=400)
+
             if created_forecasts:
                 logging.info(f"Successfully created demand forecasts for all product IDs")
                 return JsonResponse({
@@ -212,4 +413,471 @@ class AddDemandForecastView(APIView):
                 }, status=400)
         except Exception as e:
             logging.error(f"Error creating demand forecasts: {e}")
-            return JsonResponse({"error": "Internal server error"}, status=500)
\ No newline at end of file
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+class DemandCurveView(APIView):
+    """
+    API to read the demand-vs-price curves stored with the demand forecasts.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def get(self, request):
+        """
+        Handles GET requests with a comma-separated 'product_ids' query parameter and returns the
+        demand curve of each product's latest forecast, or of the forecast 'version' when given.
+
+        Each curve is a list of prices and the predicted demand at each of them. Products without
+        a stored curve (no forecast yet, or forecasts older than the curves) are left out.
+        """
+        try:
+            product_ids = [int(product_id) for product_id in request.query_params.get('product_ids', '').split(',') if product_id.strip()]
+            version = request.query_params.get('version')
+            version = int(version) if version else None
+        except ValueError:
+            return JsonResponse({"error": "product_ids and version must be integers"}, status=400)
+        if not product_ids:
+            return JsonResponse({"error": "product_ids is missing"}, status=400)
+
+        try:
+            forecasts = DemandForecast.objects.filter(product_id__in=product_ids, curve_demand__isnull=False)
+            if version is None:
+                forecasts = forecasts.filter(product__latest_forecast=F('id'))
+            else:
+                forecasts = forecasts.filter(version=version)
+
+            curves = []
+            for product_id, forecast_version, min_price, max_price, data in forecasts.values_list(
+                'product_id', 'version', 'curve_min_price', 'curve_max_price', 'curve_demand'
+            ):
+                demand = demand_curves.unpack_curve(data)
+                curves.append({
+                    'product': product_id,
+                    'version': forecast_version,
+                    'prices': demand_curves.curve_prices(min_price, max_price, demand.size).round(2).tolist(),
+                    'demand': demand.round(2).tolist(),
+                })
+
+            logging.info(f"Fetched {len(curves)} demand curves")
+            return JsonResponse({"curves": curves}, status=200)
+        except Exception as e:
+            logging.error(f"Error fetching demand curves: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+class LatestForecastView(APIView):
+    """
+    API to read the latest demand forecast of many products in one query, through the
+    products' latest_forecast pointers.
+    """
+
+    def latest_forecasts(self, product_ids):
+        if not product_ids:
+            return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+        if len(product_ids) > settings.LATEST_FORECASTS_MAX_PRODUCTS:
+            return JsonResponse({"error": f"At most {settings.LATEST_FORECASTS_MAX_PRODUCTS} products can be read at once"}, status=400)
+
+        rows = Product.objects.filter(id__in=product_ids, latest_forecast__isnull=False).values_list(
+            'id', 'latest_forecast__version', 'latest_forecast__forecast_value', 'latest_forecast__created_dt'
+        )
+        forecasts = [
+            {'product': product_id, 'version': version, 'forecast_value': str(forecast_value), 'created_dt': created_dt}
+            for product_id, version, forecast_value, created_dt in rows
+        ]
+        logging.info(f"Fetched latest forecasts of {len(forecasts)} products")
+        return JsonResponse({"forecasts": forecasts}, status=200)
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def get(self, request):
+        """
+        Handles GET requests with a comma-separated 'product_ids' query parameter.
+        Products without any forecast are left out.
+        """
+        try:
+            product_ids = [int(product_id) for product_id in request.query_params.get('product_ids', '').split(',') if product_id.strip()]
+        except ValueError:
+            return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+        return self.latest_forecasts(product_ids)
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def post(self, request):
+        """
+        Handles POST requests with a 'product_id_list' body, for lists too long for a query string.
+        """
+        product_id_list = request.data.get('product_id_list')
+        if not isinstance(product_id_list, list):
+            return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+        try:
+            product_ids = [int(product_id) for product_id in product_id_list]
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+        return self.latest_forecasts(product_ids)
+
+
+class DemandObservationView(APIView):
+    """
+    API to record observed demand (the price a product sold at and the units sold on a day)
+    and to read it back from the columnar demand history store.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Support']))
+    def post(self, request):
+        """
+        Handles POST requests with an 'observations' list of {'product', 'observed_on', 'price', 'units'}
+        items. An observation of a product and day that already exists is overwritten. Invalid items
+        are skipped and reported with their index.
+        """
+        try:
+            items = request.data.get('observations')
+            if not isinstance(items, list) or not items:
+                return JsonResponse({"error": "'observations' must be a non-empty list"}, status=400)
+            if len(items) > settings.DEMAND_OBSERVATIONS_MAX_ITEMS:
+                return JsonResponse({"error": f"At most {settings.DEMAND_OBSERVATIONS_MAX_ITEMS} observations can be recorded at once"}, status=400)
+
+            recorded, errors = observations.record_observations(items)
+            logging.info(f"Recorded {recorded} demand observations, {len(errors)} invalid")
+            return JsonResponse({"recorded": recorded, "errors": errors}, status=201 if recorded else 400)
+        except Exception as e:
+            logging.error(f"Error recording demand observations: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def get(self, request):
+        """
+        Handles GET requests with a comma-separated 'product_ids' query parameter and returns
+        the observed (date, price, units) series of every product, oldest first.
+        """
+        try:
+            product_ids = [int(product_id) for product_id in request.query_params.get('product_ids', '').split(',') if product_id.strip()]
+        except ValueError:
+            return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+        if not product_ids:
+            return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+        if len(product_ids) > settings.DEMAND_OBSERVATIONS_MAX_PRODUCTS:
+            return JsonResponse({"error": f"At most {settings.DEMAND_OBSERVATIONS_MAX_PRODUCTS} products' demand history can be read at once"}, status=400)
+
+        try:
+            rows = get_demand_history_store().rows(product_ids)
+            history = {}
+            for product_id, day, price, units in zip(rows.product_ids.tolist(), rows.days.tolist(), rows.prices.tolist(), rows.units.tolist()):
+                history.setdefault(str(product_id), []).append({
+                    'observed_on': (EPOCH + timedelta(days=day)).isoformat(),
+                    'price': str(optimizer.to_decimal(price)),
+                    'units': int(units),
+                })
+            return JsonResponse({"history": history}, status=200)
+        except Exception as e:
+            logging.error(f"Error reading demand history: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+class OptimizedPriceView(APIView):
+    """
+    API to compute optimized prices for a batch of products in one vectorized pass.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def post(self, request):
+        """
+        Handles POST requests with a 'product_id_list' and returns the profit-maximizing
+        price for every product found. The stored prices are not modified.
+        """
+        try:
+            product_id_list = request.data.get('product_id_list')
+            if not product_id_list or not isinstance(product_id_list, list):
+                return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+
+            optimized_prices = optimizer.optimize_prices([int(product_id) for product_id in product_id_list])
+            if not optimized_prices:
+                return JsonResponse({"error": "No products found for the provided IDs"}, status=404)
+
+            logging.info(f"Successfully optimized prices for {len(optimized_prices)} products")
+            return JsonResponse({
+                "optimized_prices": [
+                    {'product': product_id, 'optimized_price': str(price)}
+                    for product_id, price in optimized_prices.items()
+                ],
+            }, status=200)
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+        except Exception as e:
+            logging.error(f"Error optimizing prices: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+class PriceSimulationView(APIView):
+    """
+    API to simulate demand, revenue and margin of a batch of products over a grid of candidate prices.
+    """
+
+    def parse_grid(self, values, name):
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"'{name}' must be a non-empty list of numbers")
+        if len(values) > settings.SIMULATION_MAX_PRICE_POINTS:
+            raise ValueError(f"'{name}' accepts at most {settings.SIMULATION_MAX_PRICE_POINTS} values")
+        try:
+            return [float(value) for value in values]
+        except (TypeError, ValueError):
+            raise ValueError(f"'{name}' must be a non-empty list of numbers")
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def post(self, request):
+        """
+        Handles POST requests with a 'product_id_list' and exactly one price grid:
+        - 'prices': absolute candidate prices, applied to every product.
+        - 'price_changes': percentage changes relative to each product's selling price, e.g. [-10, 0, 10].
+
+        Returns, per product found, the candidate prices with the predicted demand, revenue and
+        margin at each of them. Nothing is stored.
+        """
+        try:
+            product_id_list = request.data.get('product_id_list')
+            if not product_id_list or not isinstance(product_id_list, list):
+                return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+            if len(product_id_list) > settings.SIMULATION_MAX_PRODUCTS:
+                return JsonResponse({"error": f"At most {settings.SIMULATION_MAX_PRODUCTS} products can be simulated at once"}, status=400)
+            try:
+                product_id_list = [int(product_id) for product_id in product_id_list]
+            except (TypeError, ValueError):
+                return JsonResponse({"error": "Product ID list is missing or invalid"}, status=400)
+
+            prices = request.data.get('prices')
+            price_changes = request.data.get('price_changes')
+            if (prices is None) == (price_changes is None):
+                return JsonResponse({"error": "Provide exactly one of 'prices' or 'price_changes'"}, status=400)
+            try:
+                if prices is not None:
+                    prices = self.parse_grid(prices, 'prices')
+                    if min(prices) < 0:
+                        raise ValueError("'prices' must not be negative")
+                else:
+                    price_changes = self.parse_grid(price_changes, 'price_changes')
+                    if min(price_changes) <= -100:
+                        raise ValueError("'price_changes' must be greater than -100")
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+
+            product_ids, simulation = optimizer.simulate_prices(product_id_list, prices=prices, price_changes=price_changes)
+            if not product_ids.size:
+                return JsonResponse({"error": "No products found for the provided IDs"}, status=404)
+
+            columns = [matrix.round(2).tolist() for matrix in simulation]
+            logging.info(f"Simulated {product_ids.size} products at {simulation.prices.shape[1]} prices")
+            return JsonResponse({
+                "simulations": [
+                    {'product': product_id, **dict(zip(simulation._fields, rows))}
+                    for product_id, *rows in zip(product_ids.tolist(), *columns)
+                ],
+            }, status=200)
+        except Exception as e:
+            logging.error(f"Error simulating prices: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+class RepriceView(APIView):
+    """
+    API to recompute and store optimized prices for the whole catalog or a filtered subset.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Support']))
+    def post(self, request):
+        """
+        Handles POST requests to reprice products in chunks.
+        Reprices the requesting user's products. Admins may pass another 'user_id'
+        (auth0_user_id), or "all_users": true to reprice the whole catalog; for other roles a
+        'user_id' other than their own is rejected with 403.
+        Optional body fields: 'category' (category name) and 'chunk_size'. With
+        "changed_only": true only products whose pricing inputs or demand observations
+        changed since the last successful catalog-wide reprice are repriced.
+
+        With "async": true the repricing is queued as a background job instead and the
+        response is 202 with the job id; poll jobs/<job_id>/ for progress and the result.
+        """
+        try:
+            chunk_size = request.data.get('chunk_size')
+            if chunk_size is not None:
+                chunk_size = int(chunk_size)
+                if chunk_size <= 0:
+                    return JsonResponse({"error": "chunk_size must be a positive integer"}, status=400)
+
+            own_user_id = str(getattr(request, 'user_id', None) or request.META.get('HTTP_USER_ID', ''))
+            is_admin = getattr(request, 'user_role', None) == 'Admin'
+            user_id = request.data.get('user_id')
+            if request.data.get('all_users'):
+                if not is_admin:
+                    return JsonResponse({"error": "Only admins can reprice the whole catalog"}, status=403)
+                user_id = None
+            elif user_id is None or str(user_id) == own_user_id:
+                user_id = own_user_id
+            elif not is_admin:
+                return JsonResponse({"error": "Only admins can reprice another user's products"}, status=403)
+
+            if request.data.get('async'):
+                job = jobs.enqueue('reprice', {
+                    'user_id': user_id,
+                    'category': request.data.get('category'),
+                    'changed_only': bool(request.data.get('changed_only')),
+                }, request.META.get('HTTP_USER_ID', ''))
+                logging.info(f"Queued reprice job {job.id}")
+                return JsonResponse({"job_id": job.id, "status": job.status}, status=202)
+
+            updated = repricing.reprice_catalog(
+                user_id=user_id,
+                category=request.data.get('category'),
+                changed_only=bool(request.data.get('changed_only')),
+                chunk_size=chunk_size,
+            )
+
+            logging.info(f"Successfully repriced {updated} products")
+            return JsonResponse({"repriced": updated}, status=200)
+        except (TypeError, ValueError):
+            return JsonResponse({"error": "chunk_size must be a positive integer"}, status=400)
+        except Exception as e:
+            logging.error(f"Error repricing products: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+class JobView(APIView):
+    """
+    API to read the status, progress and result of a background job.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def get(self, request, job_id):
+        """
+        Handles GET requests for a job queued by the user in the User-ID header.
+        The result is set once the job has succeeded, the error once it has failed.
+        """
+        user_id = request.META.get('HTTP_USER_ID')
+        if not user_id:
+            return JsonResponse({'error': 'User ID not found in headers'}, status=400)
+
+        job = Job.objects.filter(id=job_id, auth0_user_id=user_id).first()
+        if job is None:
+            return JsonResponse({"error": "Job not found"}, status=404)
+
+        return JsonResponse({
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "progress": {"done": job.progress_done, "total": job.progress_total},
+            "result": job.result,
+            "error": job.error or None,
+            "created_dt": job.created_dt,
+            "started_dt": job.started_dt,
+            "finished_dt": job.finished_dt,
+        }, status=200)
+
+
+class PricingAnalyticsView(APIView):
+    """
+    API serving the pricing analytics of a user (summary cards and the category breakdown)
+    from the precomputed per-category aggregates.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def get(self, request):
+        """
+        Handles GET requests for the user in the User-ID header, optionally limited to one
+        'category'. Returns the totals over the user's products (count, units sold, stock,
+        revenue, margin, stock value, average rating and latest forecast totals) and the same
+        figures per category.
+        """
+        user_id = request.META.get('HTTP_USER_ID')
+        if not user_id:
+            return JsonResponse({'error': 'User ID not found in headers'}, status=400)
+
+        try:
+            summary = analytics.user_summary(user_id, request.query_params.get('category'))
+            logging.info(f"Fetched pricing analytics for {len(summary['categories'])} categories")
+            return JsonResponse(summary, status=200)
+        except Exception as e:
+            logging.error(f"Error fetching pricing analytics: {e}")
+            return JsonResponse({"error": "Internal server error"}, status=500)
+
+
+class ProductExportView(APIView):
+    """
+    API to stream a user's full product catalog as NDJSON or as a JSON array.
+    Memory stays flat regardless of catalog size: rows are read and encoded in chunks.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Buyer', 'Support']))
+    def get(self, request):
+        """
+        Handles GET requests to export all products of the user in the User-ID header.
+
+        Optional query parameters:
+        - export_format: 'ndjson' (default, one product per line) or 'json' (a single array).
+          ('format' is reserved by DRF for content negotiation.)
+        - category / search: same filters as the product list.
+        """
+        user_id = request.headers.get('User-ID')
+        if not user_id:
+            return JsonResponse({'error': 'User-ID header missing'}, status=400)
+
+        export_format = request.query_params.get('export_format', 'ndjson')
+        if export_format not in export.CONTENT_TYPES:
+            return JsonResponse({'error': "export_format must be 'ndjson' or 'json'"}, status=400)
+
+        products = Product.objects.filter(auth0_user_id=user_id)
+        category = request.query_params.get('category')
+        if category:
+            products = products.filter(category__name=category)
+        search = request.query_params.get('search')
+        if search:
+            products = products.filter(name__icontains=search)
+
+        chunk_size = settings.PRODUCT_EXPORT_CHUNK_SIZE
+        if isinstance(request._request, ASGIRequest):
+            content = export.aiter_export(products, export_format, chunk_size)
+        else:
+            content = export.iter_export(products, export_format, chunk_size)
+
+        logging.info(f"Streaming {export_format} product export for user_id: {user_id}")
+        response = StreamingHttpResponse(content, content_type=export.CONTENT_TYPES[export_format])
+        response['Content-Disposition'] = f'attachment; filename="products.{export_format}"'
+        return response
+
+
+class ProductImportView(APIView):
+    """
+    API to bulk import products from an uploaded CSV or Parquet file.
+    """
+
+    @method_decorator(role_required(['Admin', 'Supplier', 'Support']))
+    def post(self, request):
+        """
+        Handles multipart POST requests with a 'file' upload. The products are created for
+        the user in the User-ID header. The format is taken from the optional 'file_format'
+        field ('csv' or 'parquet') or from the file extension.
+
+        Returns the number of products created and the errors of the rejected rows.
+        """
+        try:
+            user_id = request.META.get('HTTP_USER_ID')
+            if not user_id:
+                return JsonResponse({'error': 'User ID not found in headers'}, status=400)
+
+            upload = request.FILES.get('file')
+            if not upload:
+                return JsonResponse({'error': 'No file uploaded'}, status=400)
+
+            file_format = request.data.get('file_format') or upload.name.rsplit('.', 1)[-1].lower()
+            if file_format not in importer.FILE_FORMATS:
+                return JsonResponse({'error': f"Unsupported file format '{file_format}'"}, status=400)
+
+            report = importer.import_products(importer.read_rows(upload, file_format), user_id)
+            max_errors = settings.PRODUCT_IMPORT_MAX_REPORTED_ERRORS
+
+            logging.info(f"Imported {report.created} products with {len(report.errors)} rejected rows for user_id: {user_id}")
+            return JsonResponse({
+                'created': report.created,
+                'rejected': len(report.errors),
+                'errors': report.errors[:max_errors],
+            }, status=201 if report.created else 400)
+        except ImportError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except Exception as e:
+            logging.error(f"Error importing products: {e}")
+            return JsonResponse({'error': 'Internal server error'}, status=500)
\ No newline at end of file
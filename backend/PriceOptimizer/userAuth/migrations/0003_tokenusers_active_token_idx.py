@@ -0,0 +1,17 @@
+# Generated by Django 4.2.18 on 2026-10-18 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userAuth', '0002_tokenusers_expired_tokenusers_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tokenusers',
+            index=models.Index(condition=models.Q(('expired', False)), fields=['token', 'user'], name='tokenusers_active_token_idx'),
+        ),
+    ]
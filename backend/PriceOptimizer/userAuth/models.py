@@ -28,6 +28,11 @@ class TokenUsers(models.Model):
     expired = models.BooleanField(default=False)
     expires_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['token', 'user'], name='tokenusers_active_token_idx', condition=models.Q(expired=False)),
+        ]
+
 
 class UserRoles(models.Model):
     user=models.ForeignKey(Users, on_delete=models.CASCADE)
@@ -1,3 +1,87 @@
-from django.test import TestCase
+import hashlib
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from PriceOptimizer.Cache.token_cache import get_token_cache
+from userAuth.models import Roles, TokenUsers, UserRoles, Users
+
+
+class TokenAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = Users.objects.create(
+            username='tester', password=hashlib.sha512(b'secret').hexdigest(), name='Tester',
+            email='tester@example.com', created=timezone.now(),
+        )
+        UserRoles.objects.create(user=cls.user, role=Roles.objects.create(name='Supplier', description=''))
+        cls.user_id = str(cls.user.user_id)
+
+    def setUp(self):
+        # Validated tokens are cached per process; start every test from an empty cache.
+        get_token_cache.cache_clear()
+
+    def login(self):
+        response = Client().post('/pot/auth/login/', {'username': 'tester', 'password': 'secret'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['User-Role'], 'Supplier')
+        return Client(headers={'Authorization': response['Authorization'], 'user_id': self.user_id})
+
+    def test_token_is_rejected_after_logout(self):
+        client = self.login()
+        # The second request is served from the token cache.
+        self.assertEqual(client.get('/pot/api/products/').status_code, 200)
+        self.assertEqual(client.get('/pot/api/products/').status_code, 200)
+
+        self.assertEqual(client.post('/pot/auth/logout/').status_code, 200)
+
+        response = client.get('/pot/api/products/')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(TokenUsers.objects.filter(user=self.user, expired=False).exists())
+
+    def test_logout_during_validation_keeps_token_out_of_cache(self):
+        shared = override_settings(
+            CACHES={
+                'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'token-tests'},
+            },
+            TOKEN_CACHE_BACKEND='shared',
+        )
+        for backend in ('in-process', 'shared'):
+            with self.subTest(backend=backend):
+                if backend == 'shared':
+                    shared.enable()
+                    self.addCleanup(shared.disable)
+                get_token_cache.cache_clear()
+                client = self.login()
+                token_cache = get_token_cache()
+                cache_set = token_cache.set
+
+                def logout_then_set(*args, **kwargs):
+                    # The logout commits after the middleware validated the token but before it is cached.
+                    TokenUsers.objects.filter(user=self.user, expired=False).update(expired=True, expires_at=timezone.now())
+                    token_cache.invalidate_user(self.user_id)
+                    cache_set(*args, **kwargs)
+
+                with mock.patch.object(token_cache, 'set', side_effect=logout_then_set):
+                    self.assertEqual(client.get('/pot/api/products/').status_code, 200)
+
+                self.assertEqual(client.get('/pot/api/products/').status_code, 401)
+
+    def test_expired_token_is_rejected(self):
+        client = self.login()
+        TokenUsers.objects.filter(user=self.user).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertEqual(client.get('/pot/api/products/').status_code, 401)
+        self.assertFalse(TokenUsers.objects.filter(user=self.user, expired=False).exists())
+
+    def test_token_is_bound_to_its_user(self):
+        client = self.login()
+        other = Users.objects.create(username='other', password='x', name='Other', email='other@example.com', created=timezone.now())
+        token = client.defaults['HTTP_AUTHORIZATION']
+
+        response = Client(headers={'Authorization': token, 'user_id': str(other.user_id)}).get('/pot/api/products/')
+        self.assertEqual(response.status_code, 401)
@@ -5,6 +5,7 @@ from rest_framework import status
 import random, hashlib
 import datetime
 from userAuth.models import TokenUsers, UserRoles, Users
+from PriceOptimizer.Cache.token_cache import get_token_cache
 from django.utils import timezone
 from django.db.models import Q
 from datetime import timedelta
@@ -188,6 +189,7 @@ class LogoutAPIView(APIView):
                 expired=True, 
                 expires_at=timezone.now()
             )
+            get_token_cache().invalidate_user(user_id)
             return Response({"message": "Successfully logged out"}, status=status.HTTP_200_OK)
         except TokenUsers.DoesNotExist:
             return Response({"error": "Token not found or already expired"}, status=status.HTTP_404_NOT_FOUND)